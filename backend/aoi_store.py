@@ -0,0 +1,440 @@
+"""
+AOI Store - SQLite persistence for Area of Improvement tables, recommendations and documents
+Replaces config/aoi-tables.csv, config/aoi-recommendations.csv and config/aoi-documents.csv
+API payloads keep the camelCase keys the CSV files used
+"""
+
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Tuple
+
+import pandas as pd
+from database import get_db_connection, bulk_insert
+from storage_service import storage_service
+from windows_utils import safe_print
+
+# (API key, SQLite column, default) per entity, in CSV column order
+TABLE_FIELDS = [
+    ('id', 'id', None),
+    ('nama', 'nama', ''),
+    ('tahun', 'tahun', None),
+    ('targetType', 'target_type', ''),
+    ('targetDirektorat', 'target_direktorat', ''),
+    ('targetSubdirektorat', 'target_subdirektorat', ''),
+    ('targetDivisi', 'target_divisi', ''),
+    ('createdAt', 'created_at', None),
+    ('status', 'status', 'active'),
+]
+
+RECOMMENDATION_FIELDS = [
+    ('id', 'id', None),
+    ('aoiTableId', 'aoi_table_id', None),
+    ('jenis', 'jenis', 'REKOMENDASI'),
+    ('no', 'no', 1),
+    ('isi', 'isi', ''),
+    ('tingkatUrgensi', 'tingkat_urgensi', 'SEDANG'),
+    ('aspekAOI', 'aspek_aoi', ''),
+    ('pihakTerkait', 'pihak_terkait', ''),
+    ('organPerusahaan', 'organ_perusahaan', ''),
+    ('createdAt', 'created_at', None),
+    ('status', 'status', 'active'),
+]
+
+DOCUMENT_FIELDS = [
+    ('id', 'id', None),
+    ('fileName', 'file_name', ''),
+    ('fileSize', 'file_size', 0),
+    ('uploadDate', 'upload_date', None),
+    ('aoiRecommendationId', 'aoi_recommendation_id', None),
+    ('aoiJenis', 'aoi_jenis', 'REKOMENDASI'),
+    ('aoiUrutan', 'aoi_urutan', 1),
+    ('userId', 'user_id', ''),
+    ('userDirektorat', 'user_direktorat', ''),
+    ('userSubdirektorat', 'user_subdirektorat', ''),
+    ('userDivisi', 'user_divisi', ''),
+    ('fileType', 'file_type', ''),
+    ('status', 'status', 'active'),
+    ('tahun', 'tahun', None),
+    ('filePath', 'file_path', ''),
+]
+
+LEGACY_CSV_FILES = {
+    'aoi_tables': ('config/aoi-tables.csv', TABLE_FIELDS),
+    'aoi_recommendations': ('config/aoi-recommendations.csv', RECOMMENDATION_FIELDS),
+    'aoi_documents': ('config/aoi-documents.csv', DOCUMENT_FIELDS),
+}
+
+
+# Visibility of an AOI table for a resolved user scope; {t} is an optional table alias prefix
+SCOPE_CONDITION = """CASE
+    WHEN COALESCE({t}target_divisi, '') NOT IN ('', 'Tidak ada')
+        THEN {t}target_divisi = :divisi
+    WHEN COALESCE({t}target_subdirektorat, '') NOT IN ('', 'Tidak ada')
+        THEN {t}target_subdirektorat = :subdirektorat
+    WHEN COALESCE({t}target_direktorat, '') NOT IN ('', 'Tidak ada')
+        THEN :direktorat = '' OR {t}target_direktorat = :direktorat
+    ELSE 0
+END"""
+
+
+def _select_list(fields, alias: str = '') -> str:
+    """Column list aliased to API keys; with an alias, keys are prefixed '<alias>.'"""
+    if alias:
+        return ', '.join(f'{alias}.{column} AS "{alias}.{key}"' for key, column, _ in fields)
+    return ', '.join(f'{column} AS "{key}"' for key, column, _ in fields)
+
+
+def api_select_list(table: str) -> str:
+    """Column list of an AOI table aliased to its API (camelCase) keys"""
+    return _select_list({
+        'aoi_tables': TABLE_FIELDS,
+        'aoi_recommendations': RECOMMENDATION_FIELDS,
+        'aoi_documents': DOCUMENT_FIELDS,
+    }[table])
+
+
+def _to_record(row) -> Dict[str, Any]:
+    """Convert a row to an API record, mapping NULL to '' like the old CSV reads"""
+    return {key: ('' if value is None else value) for key, value in dict(row).items()}
+
+
+def _values_from(data: Dict[str, Any], fields, skip=('id',)) -> Dict[str, Any]:
+    """Pick SQLite column values from an API payload, applying field defaults"""
+    return {column: data.get(key, default) for key, column, default in fields if key not in skip}
+
+
+def _fetch_all(query: str, params=()) -> List[Dict[str, Any]]:
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        return [_to_record(row) for row in cursor.fetchall()]
+
+
+def _fetch_one(query: str, params=()) -> Optional[Dict[str, Any]]:
+    rows = _fetch_all(query, params)
+    return rows[0] if rows else None
+
+
+def _insert(cursor, table: str, values: Dict[str, Any]):
+    columns = list(values.keys())
+    cursor.execute(
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+        [values[c] for c in columns]
+    )
+
+
+def _update(cursor, table: str, key, values: Dict[str, Any]) -> bool:
+    assignments = ', '.join(f'{column} = ?' for column in values)
+    cursor.execute(f"UPDATE {table} SET {assignments} WHERE id = ?", [*values.values(), key])
+    return cursor.rowcount > 0
+
+
+# ============================================
+# AOI TABLES
+# ============================================
+
+def list_tables(year: Optional[int] = None) -> List[Dict[str, Any]]:
+    if year:
+        return _fetch_all(f"SELECT {_select_list(TABLE_FIELDS)} FROM aoi_tables WHERE tahun = ? ORDER BY rowid", (year,))
+    return _fetch_all(f"SELECT {_select_list(TABLE_FIELDS)} FROM aoi_tables ORDER BY rowid")
+
+
+def resolve_user_scope(divisi: str = '', subdirektorat: str = '', direktorat: str = '',
+                       year: Optional[int] = None) -> Dict[str, str]:
+    """Resolve a user's divisi → subdirektorat → direktorat hierarchy once
+
+    Looks the user's unit up in v_organizational_structure (preferring a divisi
+    match and the requested year); values that cannot be resolved fall back to
+    the ones supplied by the caller.
+    """
+    scope = {'divisi': divisi or '', 'subdirektorat': subdirektorat or '', 'direktorat': direktorat or ''}
+    if not scope['divisi'] and not scope['subdirektorat']:
+        return scope
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT subdirektorat_nama, direktorat_nama
+            FROM v_organizational_structure
+            WHERE divisi_nama = :divisi OR subdirektorat_nama = :subdirektorat
+            ORDER BY (divisi_nama = :divisi) DESC, (tahun = :year) DESC, tahun DESC
+            LIMIT 1
+        """, {'divisi': scope['divisi'], 'subdirektorat': scope['subdirektorat'], 'year': year})
+        row = cursor.fetchone()
+
+    if row:
+        scope['subdirektorat'] = row['subdirektorat_nama'] or scope['subdirektorat']
+        scope['direktorat'] = row['direktorat_nama'] or scope['direktorat']
+    return scope
+
+
+def list_tables_for_scope(scope: Dict[str, str], year: Optional[int] = None) -> List[Dict[str, Any]]:
+    """AOI tables visible to a resolved user scope, in one query
+
+    A table is matched on its most specific target: divisi, else subdirektorat,
+    else direktorat. Direktorat-level tables are only kept for every user when
+    the user's direktorat could not be resolved.
+    """
+    return _fetch_all(f"""
+        SELECT {_select_list(TABLE_FIELDS)} FROM aoi_tables
+        WHERE (:year IS NULL OR tahun = :year) AND {SCOPE_CONDITION.format(t='')}
+        ORDER BY rowid
+    """, {'year': year, **scope})
+
+
+def get_table(table_id: int) -> Optional[Dict[str, Any]]:
+    return _fetch_one(f"SELECT {_select_list(TABLE_FIELDS)} FROM aoi_tables WHERE id = ?", (table_id,))
+
+
+def create_table(table_id: int, data: Dict[str, Any]) -> Dict[str, Any]:
+    values = _values_from(data, TABLE_FIELDS)
+    values['created_at'] = values['created_at'] or datetime.now().isoformat()
+    with get_db_connection() as conn:
+        _insert(conn.cursor(), 'aoi_tables', {'id': table_id, **values})
+    return get_table(table_id)
+
+
+def update_table(table_id: int, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    values = _values_from(data, TABLE_FIELDS, skip=('id', 'createdAt'))
+    with get_db_connection() as conn:
+        if not _update(conn.cursor(), 'aoi_tables', table_id, values):
+            return None
+    return get_table(table_id)
+
+
+def delete_table(table_id: int) -> bool:
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM aoi_tables WHERE id = ?", (table_id,))
+        return cursor.rowcount > 0
+
+
+# ============================================
+# AOI RECOMMENDATIONS
+# ============================================
+
+def list_recommendations(aoi_table_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    if aoi_table_id:
+        return _fetch_all(f"""
+            SELECT {_select_list(RECOMMENDATION_FIELDS)} FROM aoi_recommendations
+            WHERE aoi_table_id = ? ORDER BY rowid
+        """, (aoi_table_id,))
+    return _fetch_all(f"SELECT {_select_list(RECOMMENDATION_FIELDS)} FROM aoi_recommendations ORDER BY rowid")
+
+
+def get_recommendation(recommendation_id: int) -> Optional[Dict[str, Any]]:
+    return _fetch_one(f"SELECT {_select_list(RECOMMENDATION_FIELDS)} FROM aoi_recommendations WHERE id = ?",
+                      (recommendation_id,))
+
+
+def create_recommendation(recommendation_id: int, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Insert a recommendation numbered after the table's existing ones (sequential, no gaps)"""
+    values = _values_from(data, RECOMMENDATION_FIELDS)
+    values['created_at'] = values['created_at'] or datetime.now().isoformat()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM aoi_recommendations WHERE aoi_table_id = ?",
+                       (values['aoi_table_id'],))
+        values['no'] = cursor.fetchone()[0] + 1 if values['aoi_table_id'] else 1
+        _insert(cursor, 'aoi_recommendations', {'id': recommendation_id, **values})
+    return get_recommendation(recommendation_id)
+
+
+def update_recommendation(recommendation_id: int, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    values = _values_from(data, RECOMMENDATION_FIELDS, skip=('id', 'createdAt'))
+    with get_db_connection() as conn:
+        if not _update(conn.cursor(), 'aoi_recommendations', recommendation_id, values):
+            return None
+    return get_recommendation(recommendation_id)
+
+
+def delete_recommendation(recommendation_id: int) -> Optional[int]:
+    """Delete a recommendation and close the numbering gap in its table
+
+    Returns the recommendation's aoiTableId, or None if it did not exist.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT aoi_table_id, no FROM aoi_recommendations WHERE id = ?", (recommendation_id,))
+        target = cursor.fetchone()
+        if target is None:
+            return None
+        cursor.execute("DELETE FROM aoi_recommendations WHERE id = ?", (recommendation_id,))
+        cursor.execute("""
+            UPDATE aoi_recommendations SET no = no - 1
+            WHERE aoi_table_id = ? AND no > ?
+        """, (target['aoi_table_id'], target['no']))
+        return target['aoi_table_id']
+
+
+# ============================================
+# AOI DOCUMENTS
+# ============================================
+
+def _document_filters(aoi_recommendation_id: Optional[int], tahun: Optional[int], status: Optional[str] = None):
+    conditions, params = [], []
+    if aoi_recommendation_id:
+        conditions.append('aoi_recommendation_id = ?')
+        params.append(aoi_recommendation_id)
+    if tahun:
+        conditions.append('tahun = ?')
+        params.append(tahun)
+    if status:
+        conditions.append('status = ?')
+        params.append(status)
+    return conditions, params
+
+
+def list_documents(aoi_recommendation_id: Optional[int] = None, tahun: Optional[int] = None) -> List[Dict[str, Any]]:
+    conditions, params = _document_filters(aoi_recommendation_id, tahun)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    return _fetch_all(f"SELECT {_select_list(DOCUMENT_FIELDS)} FROM aoi_documents {where} ORDER BY rowid", params)
+
+
+def page_documents(aoi_recommendation_id: Optional[int] = None, tahun: Optional[int] = None,
+                   status: Optional[str] = None, after_rowid: Optional[int] = None,
+                   limit: int = 500) -> List[Tuple[int, Dict[str, Any]]]:
+    """Keyset page of documents in insertion order as (rowid, record) pairs"""
+    conditions, params = _document_filters(aoi_recommendation_id, tahun, status)
+    if after_rowid is not None:
+        conditions.append('rowid > ?')
+        params.append(after_rowid)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    rows = _fetch_all(
+        f"SELECT rowid AS _rowid, {_select_list(DOCUMENT_FIELDS)} FROM aoi_documents {where} "
+        f"ORDER BY rowid LIMIT ?",
+        params + [limit]
+    )
+    return [(row.pop('_rowid'), row) for row in rows]
+
+
+def get_document(document_id: str) -> Optional[Dict[str, Any]]:
+    return _fetch_one(f"SELECT {_select_list(DOCUMENT_FIELDS)} FROM aoi_documents WHERE id = ?", (document_id,))
+
+
+def create_document(document_id: str, data: Dict[str, Any], replace_for_recommendation: bool = False) -> Dict[str, Any]:
+    """Insert a document record; optionally drop the recommendation's previous documents first"""
+    values = _values_from(data, DOCUMENT_FIELDS)
+    values['upload_date'] = values['upload_date'] or datetime.now().isoformat()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        if replace_for_recommendation:
+            cursor.execute("DELETE FROM aoi_documents WHERE aoi_recommendation_id = ?",
+                           (values['aoi_recommendation_id'],))
+        _insert(cursor, 'aoi_documents', {'id': document_id, **values})
+    return get_document(document_id)
+
+
+def update_document(document_id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    values = _values_from(data, DOCUMENT_FIELDS, skip=('id', 'uploadDate', 'filePath'))
+    with get_db_connection() as conn:
+        if not _update(conn.cursor(), 'aoi_documents', document_id, values):
+            return None
+    return get_document(document_id)
+
+
+def delete_document(document_id: str) -> bool:
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM aoi_documents WHERE id = ?", (document_id,))
+        return cursor.rowcount > 0
+
+
+def delete_documents(document_ids: List[str]) -> int:
+    if not document_ids:
+        return 0
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.executemany("DELETE FROM aoi_documents WHERE id = ?", [(d,) for d in document_ids])
+        return cursor.rowcount
+
+
+# ============================================
+# AOI TREE
+# ============================================
+
+def get_tree(year: Optional[int] = None, scope: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+    """Tables with their recommendations and documents nested, from one joined query
+
+    scope is a resolved user scope (see resolve_user_scope); None returns all tables.
+    """
+    scope_condition = SCOPE_CONDITION.format(t='t.') if scope else '1'
+    rows = _fetch_all(f"""
+        SELECT {_select_list(TABLE_FIELDS, 't')},
+               {_select_list(RECOMMENDATION_FIELDS, 'r')},
+               {_select_list(DOCUMENT_FIELDS, 'd')}
+        FROM aoi_tables t
+        LEFT JOIN aoi_recommendations r ON r.aoi_table_id = t.id
+        LEFT JOIN aoi_documents d ON d.aoi_recommendation_id = r.id
+        WHERE (:year IS NULL OR t.tahun = :year) AND {scope_condition}
+        ORDER BY t.rowid, r.no, r.rowid, d.rowid
+    """, {'year': year, **(scope or {'divisi': '', 'subdirektorat': '', 'direktorat': ''})})
+
+    tables: Dict[Any, Dict[str, Any]] = {}
+    recommendations: Dict[Any, Dict[str, Any]] = {}
+    for row in rows:
+        table = tables.get(row['t.id'])
+        if table is None:
+            table = {key: row[f't.{key}'] for key, _, _ in TABLE_FIELDS}
+            table['recommendations'] = []
+            tables[row['t.id']] = table
+        if row['r.id'] == '':
+            continue
+        recommendation = recommendations.get(row['r.id'])
+        if recommendation is None:
+            recommendation = {key: row[f'r.{key}'] for key, _, _ in RECOMMENDATION_FIELDS}
+            recommendation['documents'] = []
+            recommendations[row['r.id']] = recommendation
+            table['recommendations'].append(recommendation)
+        if row['d.id'] != '':
+            recommendation['documents'].append({key: row[f'd.{key}'] for key, _, _ in DOCUMENT_FIELDS})
+    return list(tables.values())
+
+
+# ============================================
+# YEAR CLEANUP & MIGRATION
+# ============================================
+
+def delete_year(year: int) -> Dict[str, int]:
+    """Delete a year's AOI tables, their recommendations and the year's documents"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            DELETE FROM aoi_recommendations
+            WHERE aoi_table_id IN (SELECT id FROM aoi_tables WHERE tahun = ?)
+        """, (year,))
+        recommendations = cursor.rowcount
+        cursor.execute("DELETE FROM aoi_tables WHERE tahun = ?", (year,))
+        tables = cursor.rowcount
+        cursor.execute("DELETE FROM aoi_documents WHERE tahun = ?", (year,))
+        documents = cursor.rowcount
+    return {'aoi_tables': tables, 'aoi_recommendations': recommendations, 'aoi_documents': documents}
+
+
+def migrate_csv_to_sqlite() -> bool:
+    """One-time import of the legacy config/aoi-*.csv files into SQLite
+
+    Recorded in data_migrations so it never runs twice; the CSV files are
+    left in place untouched as a backup.
+    """
+    migration_name = 'aoi_csv_to_sqlite'
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM data_migrations WHERE name = ?", (migration_name,))
+        if cursor.fetchone():
+            return False
+
+        for table, (csv_path, fields) in LEGACY_CSV_FILES.items():
+            if not storage_service.file_exists(csv_path):
+                continue
+            csv_data = storage_service.read_csv(csv_path)
+            if csv_data is None or csv_data.empty:
+                continue
+            csv_data = csv_data.astype(object).where(pd.notna(csv_data), None)
+            present = [(key, column) for key, column, _ in fields if key in csv_data.columns]
+            rows = [tuple(record[key] for key, _ in present)
+                    for record in csv_data.to_dict(orient='records')]
+            inserted = bulk_insert(cursor, table, [column for _, column in present], rows, conflict='OR IGNORE')
+            safe_print(f"🔄 Migrated {inserted} rows from {csv_path} to {table}")
+
+        cursor.execute("INSERT INTO data_migrations (name) VALUES (?)", (migration_name,))
+    return True
@@ -5,6 +5,7 @@ Provides /api/config/* endpoints for compatibility with frontend
 
 from flask import Blueprint, request, jsonify
 from database import get_db_connection
+from response_cache import conditional_get, entity_version
 from datetime import datetime
 import os
 import uuid
@@ -173,6 +174,7 @@ def config_checklist():
 # ============================================
 
 @config_bp.route('/config/tahun-buku', methods=['GET', 'POST', 'DELETE'])
+@conditional_get(entity_version('tahun-buku'))
 def config_tahun_buku():
     """Alias for year/fiscal configuration"""
     if request.method == 'GET':
@@ -237,25 +239,27 @@ def config_tahun_buku():
                             import pandas as pd
                             import numpy as np
 
-                            # Clean users.csv
-                            users_csv = storage_service.read_csv('config/users.csv')
-                            if users_csv is not None and not users_csv.empty and 'tahun' in users_csv.columns:
-                                mask = (users_csv['tahun'].notna()) & (users_csv['tahun'] != '') & (users_csv['tahun'] == year_value)
-                                users_csv = users_csv[~mask]
-                                storage_service.write_csv(users_csv, 'config/users.csv')
-
-                            # Clean checklist.csv
-                            checklist_csv = storage_service.read_csv('config/checklist.csv')
-                            if checklist_csv is not None and not checklist_csv.empty and 'tahun' in checklist_csv.columns:
-                                mask = (checklist_csv['tahun'].notna()) & (checklist_csv['tahun'] != '') & (checklist_csv['tahun'] == year_value)
-                                checklist_csv = checklist_csv[~mask]
-                                storage_service.write_csv(checklist_csv, 'config/checklist.csv')
-
-                            # Clear struktur-organisasi.csv entirely
-                            struktur_csv = pd.DataFrame(columns=['id', 'type', 'nama', 'deskripsi', 'parent_id',
-                                                                  'created_at', 'updated_at', 'kode', 'tahun', 'is_active'])
-                            storage_service.write_csv(struktur_csv, 'config/struktur-organisasi.csv')
-                            print(f"[OK] Cleaned CSV files for year {year_value}")
+                            with storage_service.transaction('config/checklist.csv', 'config/struktur-organisasi.csv', 'config/users.csv'), \
+                                    storage_service.write_behind():
+                                # Clean users.csv
+                                users_csv = storage_service.read_csv('config/users.csv')
+                                if users_csv is not None and not users_csv.empty and 'tahun' in users_csv.columns:
+                                    mask = (users_csv['tahun'].notna()) & (users_csv['tahun'] != '') & (users_csv['tahun'] == year_value)
+                                    users_csv = users_csv[~mask]
+                                    storage_service.write_csv(users_csv, 'config/users.csv')
+
+                                # Clean checklist.csv
+                                checklist_csv = storage_service.read_csv('config/checklist.csv', years=[year_value])
+                                if checklist_csv is not None and not checklist_csv.empty and 'tahun' in checklist_csv.columns:
+                                    mask = (checklist_csv['tahun'].notna()) & (checklist_csv['tahun'] != '') & (checklist_csv['tahun'] == year_value)
+                                    checklist_csv = checklist_csv[~mask]
+                                    storage_service.write_csv(checklist_csv, 'config/checklist.csv', years=[year_value])
+
+                                # Clear struktur-organisasi.csv entirely
+                                struktur_csv = pd.DataFrame(columns=['id', 'type', 'nama', 'deskripsi', 'parent_id',
+                                                                      'created_at', 'updated_at', 'kode', 'tahun', 'is_active'])
+                                storage_service.write_csv(struktur_csv, 'config/struktur-organisasi.csv')
+                                print(f"[OK] Cleaned CSV files for year {year_value}")
                         except Exception as e:
                             print(f"[WARNING] Could not clean CSV files during reactivation: {e}")
 
@@ -356,33 +360,27 @@ def config_tahun_buku():
                 from app import storage_service
                 import pandas as pd
 
-                uploaded_files = storage_service.read_excel('uploaded-files.xlsx')
-                if uploaded_files is not None and not uploaded_files.empty:
-                    original_count = len(uploaded_files)
-                    uploaded_files = uploaded_files[uploaded_files['year'] != year]
-                    deleted_count = original_count - len(uploaded_files)
-                    if deleted_count > 0:
-                        storage_service.write_excel(uploaded_files, 'uploaded-files.xlsx')
-                        cleanup_stats['uploaded_files_records'] = deleted_count
+                with storage_service.transaction('uploaded-files.xlsx'):
+                    uploaded_files = storage_service.read_excel('uploaded-files.xlsx', years=[year])
+                    if uploaded_files is not None and not uploaded_files.empty:
+                        original_count = len(uploaded_files)
+                        uploaded_files = uploaded_files[uploaded_files['year'] != year]
+                        deleted_count = original_count - len(uploaded_files)
+                        if deleted_count > 0:
+                            storage_service.write_excel(uploaded_files, 'uploaded-files.xlsx', years=[year])
+                            cleanup_stats['uploaded_files_records'] = deleted_count
             except Exception as e:
                 print(f"Warning: Could not clean uploaded-files.xlsx: {e}")
                 cleanup_stats['uploaded_files_records'] = 0
 
-            # 5. Clean AOI tracking file (aoi-documents.csv)
+            # 5. Clean AOI tracking records (aoi_tables, aoi_recommendations, aoi_documents)
             try:
-                from app import storage_service
-                import pandas as pd
+                import aoi_store
 
-                aoi_files = storage_service.read_csv('aoi-documents.csv')
-                if aoi_files is not None and not aoi_files.empty:
-                    original_count = len(aoi_files)
-                    aoi_files = aoi_files[aoi_files['year'] != year]
-                    deleted_count = original_count - len(aoi_files)
-                    if deleted_count > 0:
-                        storage_service.write_csv(aoi_files, 'aoi-documents.csv')
-                        cleanup_stats['aoi_tracking_records'] = deleted_count
+                aoi_stats = aoi_store.delete_year(year)
+                cleanup_stats['aoi_tracking_records'] = sum(aoi_stats.values())
             except Exception as e:
-                print(f"Warning: Could not clean aoi-documents.csv: {e}")
+                print(f"Warning: Could not clean AOI tracking records: {e}")
                 cleanup_stats['aoi_tracking_records'] = 0
 
             # 6. Delete assessment data (output.xlsx)
@@ -390,14 +388,17 @@ def config_tahun_buku():
                 from app import storage_service
                 import pandas as pd
 
-                output_data = storage_service.read_excel('web-output/output.xlsx')
-                if output_data is not None and not output_data.empty:
-                    original_count = len(output_data)
-                    output_data = output_data[output_data['Tahun'] != year]
-                    deleted_count = original_count - len(output_data)
-                    if deleted_count > 0:
-                        storage_service.write_excel(output_data, 'web-output/output.xlsx')
-                        cleanup_stats['assessment_records'] = deleted_count
+                with storage_service.transaction('web-output/output.xlsx'):
+                    output_data = storage_service.read_excel('web-output/output.xlsx', years=[year])
+                    if output_data is not None and not output_data.empty:
+                        original_count = len(output_data)
+                        output_data = output_data[output_data['Tahun'] != year]
+                        deleted_count = original_count - len(output_data)
+                        if deleted_count > 0:
+                            storage_service.write_excel(output_data, 'web-output/output.xlsx', years=[year])
+                            cleanup_stats['assessment_records'] = deleted_count
+                            import gcg_trends
+                            gcg_trends.recompute_year(year, output_data)
             except Exception as e:
                 print(f"Warning: Could not clean output.xlsx: {e}")
                 cleanup_stats['assessment_records'] = 0
@@ -409,26 +410,27 @@ def config_tahun_buku():
                 from app import storage_service
                 import pandas as pd
 
-                users_csv = storage_service.read_csv('config/users.csv')
-                if users_csv is not None and not users_csv.empty:
-                    original_count = len(users_csv)
-                    # Keep users where:
-                    # 1. tahun is empty/null (default users like Super Admin)
-                    # 2. tahun != year (users from other years)
-                    import numpy as np
-                    if 'tahun' in users_csv.columns:
-                        # Delete users where tahun == year (and tahun is not null/empty)
-                        mask = (users_csv['tahun'].notna()) & (users_csv['tahun'] != '') & (users_csv['tahun'] == year)
-                        users_csv = users_csv[~mask]
-                    deleted_count = original_count - len(users_csv)
-                    if deleted_count > 0:
-                        storage_service.write_csv(users_csv, 'config/users.csv')
-                        cleanup_stats['csv_users_deleted'] = deleted_count
-                        print(f"[OK] Step 6b: Deleted {deleted_count} users from users.csv")
+                with storage_service.transaction('config/users.csv'):
+                    users_csv = storage_service.read_csv('config/users.csv')
+                    if users_csv is not None and not users_csv.empty:
+                        original_count = len(users_csv)
+                        # Keep users where:
+                        # 1. tahun is empty/null (default users like Super Admin)
+                        # 2. tahun != year (users from other years)
+                        import numpy as np
+                        if 'tahun' in users_csv.columns:
+                            # Delete users where tahun == year (and tahun is not null/empty)
+                            mask = (users_csv['tahun'].notna()) & (users_csv['tahun'] != '') & (users_csv['tahun'] == year)
+                            users_csv = users_csv[~mask]
+                        deleted_count = original_count - len(users_csv)
+                        if deleted_count > 0:
+                            storage_service.write_csv(users_csv, 'config/users.csv')
+                            cleanup_stats['csv_users_deleted'] = deleted_count
+                            print(f"[OK] Step 6b: Deleted {deleted_count} users from users.csv")
+                        else:
+                            print(f"[INFO] Step 6b: No users to delete from users.csv")
                     else:
-                        print(f"[INFO] Step 6b: No users to delete from users.csv")
-                else:
-                    print(f"[INFO] Step 6b: users.csv is empty or not found")
+                        print(f"[INFO] Step 6b: users.csv is empty or not found")
             except Exception as e:
                 print(f"[ERROR] Step 6b ERROR: Could not clean users.csv: {e}")
                 cleanup_stats['csv_users_deleted'] = 0
@@ -438,26 +440,27 @@ def config_tahun_buku():
                 from app import storage_service
                 import pandas as pd
 
-                checklist_csv = storage_service.read_csv('config/checklist.csv')
-                if checklist_csv is not None and not checklist_csv.empty:
-                    original_count = len(checklist_csv)
-                    # Delete checklist items where tahun == year (and tahun is not null/empty)
-                    import numpy as np
-                    if 'tahun' in checklist_csv.columns:
-                        mask = (checklist_csv['tahun'].notna()) & (checklist_csv['tahun'] != '') & (checklist_csv['tahun'] == year)
-                        checklist_csv = checklist_csv[~mask]
-                    elif 'year' in checklist_csv.columns:
-                        mask = (checklist_csv['year'].notna()) & (checklist_csv['year'] != '') & (checklist_csv['year'] == year)
-                        checklist_csv = checklist_csv[~mask]
-                    deleted_count = original_count - len(checklist_csv)
-                    if deleted_count > 0:
-                        storage_service.write_csv(checklist_csv, 'config/checklist.csv')
-                        cleanup_stats['csv_checklist_deleted'] = deleted_count
-                        print(f"[OK] Step 6c: Deleted {deleted_count} checklist items from checklist.csv")
+                with storage_service.transaction('config/checklist.csv'):
+                    checklist_csv = storage_service.read_csv('config/checklist.csv', years=[year])
+                    if checklist_csv is not None and not checklist_csv.empty:
+                        original_count = len(checklist_csv)
+                        # Delete checklist items where tahun == year (and tahun is not null/empty)
+                        import numpy as np
+                        if 'tahun' in checklist_csv.columns:
+                            mask = (checklist_csv['tahun'].notna()) & (checklist_csv['tahun'] != '') & (checklist_csv['tahun'] == year)
+                            checklist_csv = checklist_csv[~mask]
+                        elif 'year' in checklist_csv.columns:
+                            mask = (checklist_csv['year'].notna()) & (checklist_csv['year'] != '') & (checklist_csv['year'] == year)
+                            checklist_csv = checklist_csv[~mask]
+                        deleted_count = original_count - len(checklist_csv)
+                        if deleted_count > 0:
+                            storage_service.write_csv(checklist_csv, 'config/checklist.csv', years=[year])
+                            cleanup_stats['csv_checklist_deleted'] = deleted_count
+                            print(f"[OK] Step 6c: Deleted {deleted_count} checklist items from checklist.csv")
+                        else:
+                            print(f"[INFO] Step 6c: No checklist items to delete from checklist.csv")
                     else:
-                        print(f"[INFO] Step 6c: No checklist items to delete from checklist.csv")
-                else:
-                    print(f"[INFO] Step 6c: checklist.csv is empty or not found")
+                        print(f"[INFO] Step 6c: checklist.csv is empty or not found")
             except Exception as e:
                 print(f"[ERROR] Step 6c ERROR: Could not clean checklist.csv: {e}")
                 cleanup_stats['csv_checklist_deleted'] = 0
@@ -467,26 +470,27 @@ def config_tahun_buku():
                 from app import storage_service
                 import pandas as pd
 
-                aspects_csv = storage_service.read_csv('config/aspects.csv')
-                if aspects_csv is not None and not aspects_csv.empty:
-                    original_count = len(aspects_csv)
-                    # Delete aspects where tahun == year (and tahun is not null/empty)
-                    import numpy as np
-                    if 'tahun' in aspects_csv.columns:
-                        mask = (aspects_csv['tahun'].notna()) & (aspects_csv['tahun'] != '') & (aspects_csv['tahun'] == year)
-                        aspects_csv = aspects_csv[~mask]
-                    elif 'year' in aspects_csv.columns:
-                        mask = (aspects_csv['year'].notna()) & (aspects_csv['year'] != '') & (aspects_csv['year'] == year)
-                        aspects_csv = aspects_csv[~mask]
-                    deleted_count = original_count - len(aspects_csv)
-                    if deleted_count > 0:
-                        storage_service.write_csv(aspects_csv, 'config/aspects.csv')
-                        cleanup_stats['csv_aspects_deleted'] = deleted_count
-                        print(f"[OK] Step 6d: Deleted {deleted_count} aspects from aspects.csv")
+                with storage_service.transaction('config/aspects.csv'):
+                    aspects_csv = storage_service.read_csv('config/aspects.csv', years=[year])
+                    if aspects_csv is not None and not aspects_csv.empty:
+                        original_count = len(aspects_csv)
+                        # Delete aspects where tahun == year (and tahun is not null/empty)
+                        import numpy as np
+                        if 'tahun' in aspects_csv.columns:
+                            mask = (aspects_csv['tahun'].notna()) & (aspects_csv['tahun'] != '') & (aspects_csv['tahun'] == year)
+                            aspects_csv = aspects_csv[~mask]
+                        elif 'year' in aspects_csv.columns:
+                            mask = (aspects_csv['year'].notna()) & (aspects_csv['year'] != '') & (aspects_csv['year'] == year)
+                            aspects_csv = aspects_csv[~mask]
+                        deleted_count = original_count - len(aspects_csv)
+                        if deleted_count > 0:
+                            storage_service.write_csv(aspects_csv, 'config/aspects.csv', years=[year])
+                            cleanup_stats['csv_aspects_deleted'] = deleted_count
+                            print(f"[OK] Step 6d: Deleted {deleted_count} aspects from aspects.csv")
+                        else:
+                            print(f"[INFO] Step 6d: No aspects to delete from aspects.csv")
                     else:
-                        print(f"[INFO] Step 6d: No aspects to delete from aspects.csv")
-                else:
-                    print(f"[INFO] Step 6d: aspects.csv is empty or not found")
+                        print(f"[INFO] Step 6d: aspects.csv is empty or not found")
             except Exception as e:
                 print(f"[ERROR] Step 6d ERROR: Could not clean aspects.csv: {e}")
                 cleanup_stats['csv_aspects_deleted'] = 0
@@ -8,7 +8,9 @@ print("[LOAD CHECK] api_routes.py is being loaded - NEW CODE IS HERE")
 print("="*70)
 
 from flask import Blueprint, request, jsonify
-from database import get_db_connection
+from database import get_db_connection, get_checklist_completion
+from user_directory import user_directory
+from pagination import PaginationError, parse_page_args, keyset_condition, finish_page, with_cursor_header
 from datetime import datetime
 import json
 
@@ -538,6 +540,7 @@ def update_user(user_id):
         query = f"UPDATE users SET {', '.join(update_fields)} WHERE id = ?"
         cursor.execute(query, params)
 
+    user_directory.invalidate()
     return jsonify({'message': 'User updated'})
 
 
@@ -606,25 +609,27 @@ def create_year():
                         from app import storage_service
                         import pandas as pd
 
-                        # Clean users.csv
-                        users_csv = storage_service.read_csv('config/users.csv')
-                        if users_csv is not None and not users_csv.empty and 'tahun' in users_csv.columns:
-                            mask = (users_csv['tahun'].notna()) & (users_csv['tahun'] != '') & (users_csv['tahun'] == year_value)
-                            users_csv = users_csv[~mask]
-                            storage_service.write_csv(users_csv, 'config/users.csv')
-
-                        # Clean checklist.csv
-                        checklist_csv = storage_service.read_csv('config/checklist.csv')
-                        if checklist_csv is not None and not checklist_csv.empty and 'tahun' in checklist_csv.columns:
-                            mask = (checklist_csv['tahun'].notna()) & (checklist_csv['tahun'] != '') & (checklist_csv['tahun'] == year_value)
-                            checklist_csv = checklist_csv[~mask]
-                            storage_service.write_csv(checklist_csv, 'config/checklist.csv')
-
-                        # Clear struktur-organisasi.csv entirely
-                        struktur_csv = pd.DataFrame(columns=['id', 'type', 'nama', 'deskripsi', 'parent_id',
-                                                              'created_at', 'updated_at', 'kode', 'tahun', 'is_active'])
-                        storage_service.write_csv(struktur_csv, 'config/struktur-organisasi.csv')
-                        print(f"[api_routes.py] Cleaned CSV files for year {year_value}")
+                        with storage_service.transaction('config/checklist.csv', 'config/struktur-organisasi.csv', 'config/users.csv'), \
+                                storage_service.write_behind():
+                            # Clean users.csv
+                            users_csv = storage_service.read_csv('config/users.csv')
+                            if users_csv is not None and not users_csv.empty and 'tahun' in users_csv.columns:
+                                mask = (users_csv['tahun'].notna()) & (users_csv['tahun'] != '') & (users_csv['tahun'] == year_value)
+                                users_csv = users_csv[~mask]
+                                storage_service.write_csv(users_csv, 'config/users.csv')
+
+                            # Clean checklist.csv
+                            checklist_csv = storage_service.read_csv('config/checklist.csv', years=[year_value])
+                            if checklist_csv is not None and not checklist_csv.empty and 'tahun' in checklist_csv.columns:
+                                mask = (checklist_csv['tahun'].notna()) & (checklist_csv['tahun'] != '') & (checklist_csv['tahun'] == year_value)
+                                checklist_csv = checklist_csv[~mask]
+                                storage_service.write_csv(checklist_csv, 'config/checklist.csv', years=[year_value])
+
+                            # Clear struktur-organisasi.csv entirely
+                            struktur_csv = pd.DataFrame(columns=['id', 'type', 'nama', 'deskripsi', 'parent_id',
+                                                                  'created_at', 'updated_at', 'kode', 'tahun', 'is_active'])
+                            storage_service.write_csv(struktur_csv, 'config/struktur-organisasi.csv')
+                            print(f"[api_routes.py] Cleaned CSV files for year {year_value}")
                     except Exception as e:
                         print(f"[api_routes.py WARNING] Could not clean CSV files: {e}")
 
@@ -713,28 +718,67 @@ def migrate_localstorage():
     })
 
 
+# ============================================
+# CHECKLIST COMPLETION ENDPOINTS
+# ============================================
+
+@api_bp.route('/checklist-completion/<int:year>', methods=['GET'])
+def get_checklist_completion_counters(year):
+    """Get required vs uploaded checklist items per aspek for a year
+
+    Served from the incrementally maintained checklist_completion counters.
+    Optional ?subdirektorat= limits the counts to one subdirektorat
+    (empty string = items not assigned to any subdirektorat).
+    """
+    subdirektorat = request.args.get('subdirektorat')
+    aspects = get_checklist_completion(year, subdirektorat)
+
+    total_required = sum(row['total_required'] for row in aspects)
+    total_uploaded = sum(row['total_uploaded'] for row in aspects)
+
+    return jsonify({
+        'year': year,
+        'subdirektorat': subdirektorat,
+        'aspects': aspects,
+        'total_required': total_required,
+        'total_uploaded': total_uploaded,
+        'completion_percentage': round(total_uploaded / total_required * 100, 2) if total_required else 0
+    })
+
+
 # ============================================
 # EXCEL EXPORT ENDPOINTS
 # ============================================
 
 @api_bp.route('/export/checklist', methods=['GET'])
 def export_checklist():
-    """Export checklist to Excel"""
+    """Export checklist to Excel (format=csv or format=zip streams it as CSV instead)"""
     import pandas as pd
     from io import BytesIO
     from flask import send_file
+    from csv_export import stream_export
 
     year = request.args.get('year', type=int)
+    export_format = request.args.get('format', 'xlsx').lower()
+
+    if year:
+        query = "SELECT * FROM checklist_gcg WHERE tahun = ? ORDER BY aspek, id"
+        params = (year,)
+        filename_base = f'checklist_gcg_{year}'
+    else:
+        query = "SELECT * FROM checklist_gcg ORDER BY tahun, aspek, id"
+        params = ()
+        filename_base = 'checklist_gcg_all_years'
+
+    if export_format != 'xlsx':
+        try:
+            return stream_export([('Checklist GCG', query, params)], filename_base, export_format)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
     with get_db_connection() as conn:
-        if year:
-            query = "SELECT * FROM checklist_gcg WHERE tahun = ? ORDER BY aspek, id"
-            df = pd.read_sql_query(query, conn, params=(year,))
-            filename = f'checklist_gcg_{year}.xlsx'
-        else:
-            query = "SELECT * FROM checklist_gcg ORDER BY tahun, aspek, id"
-            df = pd.read_sql_query(query, conn)
-            filename = 'checklist_gcg_all_years.xlsx'
+        df = pd.read_sql_query(query, conn, params=params)
+    filename = f'{filename_base}.xlsx'
 
     # Create Excel file in memory
     output = BytesIO()
@@ -753,50 +797,41 @@ def export_checklist():
 
 @api_bp.route('/export/all-data', methods=['GET'])
 def export_all_data():
-    """Export all database tables to Excel with multiple sheets"""
+    """Export all database tables to Excel with multiple sheets (format=zip: one CSV per sheet)"""
     import pandas as pd
     from io import BytesIO
     from flask import send_file
+    from csv_export import stream_export
 
     year = request.args.get('year', type=int)
+    export_format = request.args.get('format', 'xlsx').lower()
+
+    year_filter, params = (" WHERE tahun = ?", (year,)) if year else ("", ())
+    sheets = [
+        ('Checklist', "SELECT * FROM checklist_gcg" + year_filter +
+         (" ORDER BY aspek, id" if year else " ORDER BY tahun, aspek, id"), params),
+        ('Users', "SELECT id, email, role, name, direktorat, subdirektorat FROM users", ()),
+        ('Direktorat', "SELECT * FROM direktorat" + year_filter, params),
+        ('Subdirektorat', "SELECT * FROM subdirektorat" + year_filter, params),
+    ]
+    filename_base = f'gcg_data_{year}' if year else 'gcg_data_all'
+
+    if export_format != 'xlsx':
+        try:
+            return stream_export(sheets, filename_base, export_format, request.args.get('sheet'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
     output = BytesIO()
 
     with get_db_connection() as conn:
         with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            # Checklist
-            if year:
-                df_checklist = pd.read_sql_query(
-                    "SELECT * FROM checklist_gcg WHERE tahun = ? ORDER BY aspek, id",
-                    conn, params=(year,)
-                )
-            else:
-                df_checklist = pd.read_sql_query(
-                    "SELECT * FROM checklist_gcg ORDER BY tahun, aspek, id", conn
-                )
-            df_checklist.to_excel(writer, index=False, sheet_name='Checklist')
-
-            # Users
-            df_users = pd.read_sql_query("SELECT id, email, role, name, direktorat, subdirektorat FROM users", conn)
-            df_users.to_excel(writer, index=False, sheet_name='Users')
-
-            # Direktorat
-            if year:
-                df_direktorat = pd.read_sql_query("SELECT * FROM direktorat WHERE tahun = ?", conn, params=(year,))
-            else:
-                df_direktorat = pd.read_sql_query("SELECT * FROM direktorat", conn)
-            df_direktorat.to_excel(writer, index=False, sheet_name='Direktorat')
-
-            # Subdirektorat
-            if year:
-                df_subdirektorat = pd.read_sql_query("SELECT * FROM subdirektorat WHERE tahun = ?", conn, params=(year,))
-            else:
-                df_subdirektorat = pd.read_sql_query("SELECT * FROM subdirektorat", conn)
-            df_subdirektorat.to_excel(writer, index=False, sheet_name='Subdirektorat')
+            for sheet_name, query, sheet_params in sheets:
+                df = pd.read_sql_query(query, conn, params=sheet_params)
+                df.to_excel(writer, index=False, sheet_name=sheet_name)
 
     output.seek(0)
-
-    filename = f'gcg_data_{year}.xlsx' if year else 'gcg_data_all.xlsx'
+    filename = f'{filename_base}.xlsx'
 
     return send_file(
         output,
@@ -810,15 +845,25 @@ def export_all_data():
 # PERFORMA GCG ENDPOINTS
 # ============================================
 
+PERFORMA_GCG_SORT = ['tahun', 'level', "COALESCE(section, '')", 'id']
+
+
 @api_bp.route('/performa-gcg', methods=['GET'])
 def get_performa_gcg():
-    """Get PerformaGCG data, optionally filtered by year"""
+    """Get PerformaGCG data, optionally filtered by year/level/section (paginated)"""
     year = request.args.get('year', type=int)
     level = request.args.get('level', type=int)
+    section = request.args.get('section')
 
     with get_db_connection() as conn:
         cursor = conn.cursor()
 
+        columns = [row['name'] for row in cursor.execute("PRAGMA table_info(performa_gcg)").fetchall()]
+        try:
+            page = parse_page_args(request.args, columns)
+        except PaginationError as e:
+            return jsonify({'error': str(e)}), 400
+
         # Build query based on filters
         query = "SELECT * FROM performa_gcg WHERE 1=1"
         params = []
@@ -831,13 +876,24 @@ def get_performa_gcg():
             query += " AND level = ?"
             params.append(level)
 
-        query += " ORDER BY tahun, level, section"
+        if section:
+            query += " AND section = ?"
+            params.append(section)
+
+        if page.key is not None:
+            keyset, keyset_params = keyset_condition(PERFORMA_GCG_SORT, page.key)
+            query += f" AND {keyset}"
+            params.extend(keyset_params)
+
+        query += f" ORDER BY {', '.join(PERFORMA_GCG_SORT)} LIMIT ?"
+        params.append(page.fetch_limit)
 
         cursor.execute(query, params)
         rows = cursor.fetchall()
         data = [dict(row) for row in rows]
 
-    return jsonify(data)
+    data, next_cursor = finish_page(data, page, lambda r: [r['tahun'], r['level'], r['section'] or '', r['id']])
+    return with_cursor_header(jsonify(data), next_cursor)
 
 
 @api_bp.route('/performa-gcg/years', methods=['GET'])
@@ -902,22 +958,33 @@ def get_performa_gcg_summary(year):
 
 @api_bp.route('/performa-gcg/export', methods=['GET'])
 def export_performa_gcg():
-    """Export PerformaGCG data to Excel"""
+    """Export PerformaGCG data to Excel (format=csv or format=zip streams it as CSV instead)"""
     import pandas as pd
     from io import BytesIO
     from flask import send_file
+    from csv_export import stream_export
 
     year = request.args.get('year', type=int)
+    export_format = request.args.get('format', 'xlsx').lower()
+
+    if year:
+        query = "SELECT * FROM performa_gcg WHERE tahun = ? ORDER BY level, section"
+        params = (year,)
+        filename_base = f'performa_gcg_{year}'
+    else:
+        query = "SELECT * FROM performa_gcg ORDER BY tahun, level, section"
+        params = ()
+        filename_base = 'performa_gcg_all_years'
+
+    if export_format != 'xlsx':
+        try:
+            return stream_export([('Performa GCG', query, params)], filename_base, export_format)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
     with get_db_connection() as conn:
-        if year:
-            query = "SELECT * FROM performa_gcg WHERE tahun = ? ORDER BY level, section"
-            df = pd.read_sql_query(query, conn, params=(year,))
-            filename = f'performa_gcg_{year}.xlsx'
-        else:
-            query = "SELECT * FROM performa_gcg ORDER BY tahun, level, section"
-            df = pd.read_sql_query(query, conn)
-            filename = 'performa_gcg_all_years.xlsx'
+        df = pd.read_sql_query(query, conn, params=params)
+    filename = f'{filename_base}.xlsx'
 
     # Create Excel file in memory
     output = BytesIO()
@@ -5,7 +5,7 @@ Extends existing app.py with database operations and Excel export
 
 from flask import Flask, request, jsonify, send_file
 from flask_cors import CORS
-from database import get_db_connection
+from database import get_db_connection, get_checklist_completion
 from excel_exporter import export_to_excel
 import bcrypt
 import json
@@ -438,12 +438,8 @@ def get_stats(year):
     with get_db_connection() as conn:
         cursor = conn.cursor()
 
-        # Document completeness
-        cursor.execute("""
-            SELECT * FROM v_document_completeness
-            WHERE tahun = ?
-        """, (year,))
-        completeness = [dict(row) for row in cursor.fetchall()]
+        # Document completeness (maintained incrementally in checklist_completion)
+        completeness = get_checklist_completion(year)
 
         # Total documents
         cursor.execute("""
@@ -475,11 +471,10 @@ def get_stats(year):
 @app.route('/api/init-db', methods=['POST'])
 def initialize_database():
     """Initialize database (admin only)"""
-    from database import init_database, seed_database
+    from database import bootstrap_database
 
     try:
-        init_database()
-        seed_database()
+        bootstrap_database()
         return jsonify({'success': True, 'message': 'Database initialized successfully'})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
@@ -487,11 +482,10 @@ def initialize_database():
 
 if __name__ == '__main__':
     # Initialize database if it doesn't exist
-    from database import DB_PATH, init_database, seed_database
+    from database import DB_PATH, bootstrap_database
     if not os.path.exists(DB_PATH):
         print("Database not found. Initializing...")
-        init_database()
-        seed_database()
+        bootstrap_database()
 
     print("🚀 Starting GCG Document Hub API (SQLite + Excel Export)")
     print(f"📊 Excel exports will be saved to: backend/exports/")
@@ -16,7 +16,7 @@ from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 
-from flask import Flask, request, jsonify, send_file, make_response
+from flask import Flask, request, jsonify, send_file, make_response, g
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 import pandas as pd
@@ -32,7 +32,20 @@ env_path = Path(__file__).parent.parent / '.env'
 load_dotenv(dotenv_path=env_path)
 
 # Import storage service
-from storage_service import storage_service
+from storage_service import storage_service, StorageLockTimeout, migrate_partitioned_tables
+from user_directory import user_directory
+from session_tokens import issue_token, revoke_token, get_request_token, require_session
+from password_hasher import password_hasher, is_bcrypt_hash, HashPoolBusy
+import aoi_store
+import gcg_trends
+import change_log
+import search_index
+import export_jobs
+from export_jobs import export_queue
+from content_index import content_indexer
+from response_cache import conditional_get, entity_version, file_version
+from gcg_catalog import gcg_catalogue, GCG_MAPPING_PATH, SEARCH_LIMIT, MAX_SEARCH_LIMIT
+from pagination import PaginationError, parse_page_args, keyset_condition, frame_after, finish_page, with_cursor_header
 # from file_scanner import FileScanner  # COMMENTED OUT: Module doesn't exist, endpoint not used by frontend
 
 # Helper function to safely serialize pandas data to JSON
@@ -76,6 +89,51 @@ def migrate_config_to_csv():
 # Run migration on startup
 migrate_config_to_csv()
 
+# Bring the SQLite schema up to date (adds tables introduced after the DB was created)
+def migrate_database_schema():
+    """Apply the idempotent SQLite schema on startup"""
+    try:
+        from database import ensure_schema
+        ensure_schema()
+        change_log.install_triggers()
+    except Exception as e:
+        safe_print(f"⚠️ Error during database schema migration: {e}")
+
+migrate_database_schema()
+
+# One-time import of the legacy AOI CSV files into SQLite
+try:
+    if aoi_store.migrate_csv_to_sqlite():
+        safe_print("✅ AOI data migrated from CSV to SQLite")
+except Exception as e:
+    safe_print(f"⚠️ Error during AOI data migration: {e}")
+
+# One-time split of output.xlsx, uploaded-files.xlsx and the yearly config CSVs into per-year files
+try:
+    for table_path in migrate_partitioned_tables():
+        safe_print(f"✅ {table_path} migrated to per-year partitions")
+except Exception as e:
+    safe_print(f"⚠️ Error during per-year partition migration: {e}")
+
+# Full-text search index (FTS5) over checklist items, uploads and AOI recommendations
+try:
+    search_index.install()
+except Exception as e:
+    safe_print(f"⚠️ Error installing full-text search index: {e}")
+
+# Background text extraction of stored documents into the content FTS index
+try:
+    if content_indexer.install():
+        content_indexer.scan_in_background()
+except Exception as e:
+    safe_print(f"⚠️ Error starting document content indexing: {e}")
+
+# Build the materialized GCG trend aggregates once if they are still empty
+try:
+    gcg_trends.ensure_trends()
+except Exception as e:
+    safe_print(f"⚠️ Error building GCG trend aggregates: {e}")
+
 def generate_unique_id():
     """Generate a unique ID for database records"""
     return int(time.time() * 1000000) % 2147483647  # Generate int ID within PostgreSQL int range
@@ -95,7 +153,7 @@ CORS(app,
      origins=["*"],  # Allow all origins for development
      methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
      allow_headers=["Content-Type", "Authorization", "X-Requested-With"],
-     expose_headers=['Content-Disposition', 'Content-Type', 'Content-Length'],
+     expose_headers=['Content-Disposition', 'Content-Type', 'Content-Length', 'X-Next-Cursor'],
      supports_credentials=True)
 
 # Configuration
@@ -111,6 +169,12 @@ app.config['UPLOAD_FOLDER'] = str(UPLOAD_FOLDER)
 app.config['OUTPUT_FOLDER'] = str(OUTPUT_FOLDER)
 app.config['MAX_CONTENT_LENGTH'] = 500 * 1024 * 1024  # 500MB max file size (increased from 50MB)
 
+# Stored files rewritten when a whole year is deleted; locked together for the operation
+YEAR_SCOPED_FILES = (
+    'config/users.csv', 'config/checklist.csv', 'config/aspects.csv', 'config/struktur-organisasi.csv',
+    'config/tahun-buku.csv', 'config/checklist-assignments.csv', 'uploaded-files.xlsx',
+)
+
 def allowed_file(filename: str) -> bool:
     """Check if file extension is allowed."""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -135,6 +199,16 @@ def request_entity_too_large(error):
         'error': 'File terlalu besar. Maksimal 50MB per file.'
     }), 413
 
+@app.errorhandler(StorageLockTimeout)
+def storage_lock_timeout(error):
+    """Another worker kept a stored file locked too long; the client may retry"""
+    safe_print(f"⏳ {error}")
+    response = jsonify({
+        'error': 'Data sedang diperbarui oleh proses lain, silakan coba lagi.'
+    })
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
 @app.errorhandler(Exception)
 def handle_exception(error):
     """Handle all unhandled exceptions"""
@@ -598,7 +672,17 @@ def system_info():
     })
 
 
+def refresh_gcg_trend_year(year, df):
+    """Recompute the materialized GCG trend for the year a save/delete touched"""
+    try:
+        gcg_trends.recompute_year(int(year), df)
+        change_log.record_change('gcg-assessment', year, 'update', {'year': int(year)})
+    except Exception as e:
+        safe_print(f"WARNING: Could not refresh GCG trend for year {year}: {e}")
+
+
 @app.route('/api/save', methods=['POST'])
+@storage_service.transaction('web-output/output.xlsx')
 def save_assessment():
     """
     Save assessment data directly to output.xlsx (no JSON intermediate)
@@ -612,16 +696,18 @@ def save_assessment():
         saved_at = datetime.now().isoformat()
         
         # Load existing XLSX data and COMPLETELY REPLACE year's data (including deletions)
+        # Only the saved year's partition is read and rewritten; other years stay untouched
         all_rows = []
-        existing_df = storage_service.read_excel('web-output/output.xlsx')
+        current_year = data.get('year')
+        saved_years = [current_year] if current_year else None
+        existing_df = storage_service.read_excel('web-output/output.xlsx', years=saved_years)
         
         if existing_df is not None:
             try:
-                current_year = data.get('year')
                 
                 safe_print(f"🔧 DEBUG: Loading existing XLSX with {len(existing_df)} rows")
                 safe_print(f"🔧 DEBUG: Current year to save: {current_year}")
-                safe_print(f"🔧 DEBUG: Existing years in file: {existing_df['Tahun'].unique().tolist()}")
+                safe_print(f"🔧 DEBUG: Existing years in file: {storage_service.list_partitions('web-output/output.xlsx')}")
                 
                 # COMPLETELY REMOVE all existing data for this year (this handles deletions)
                 if current_year:
@@ -808,9 +894,10 @@ def save_assessment():
             df_sorted = df_unique.loc[df_unique.apply(sort_key, axis=1).sort_values().index]
             
             # Save XLSX using storage service
-            success = storage_service.write_excel(df_sorted, 'web-output/output.xlsx')
+            success = storage_service.write_excel(df_sorted, 'web-output/output.xlsx', years=saved_years)
             if success:
                 safe_print(f"SUCCESS: Saved to output.xlsx with {len(df_sorted)} rows (sorted: year->aspek->no->type)")
+                refresh_gcg_trend_year(year, df_sorted)
             else:
                 safe_print(f"ERROR: Failed to save output.xlsx")
             
@@ -833,6 +920,7 @@ def save_assessment():
 
 
 @app.route('/api/delete-year-data', methods=['DELETE'])
+@storage_service.transaction('web-output/output.xlsx')
 def delete_year_data():
     """
     Delete all assessment data for a specific year from output.xlsx
@@ -849,8 +937,8 @@ def delete_year_data():
         
         safe_print(f"🗑️ DEBUG: Received delete request for year: {year_to_delete}")
         
-        # Load existing XLSX data
-        existing_df = storage_service.read_excel('web-output/output.xlsx')
+        # Load only the year's partition; the other years' files are not touched
+        existing_df = storage_service.read_excel('web-output/output.xlsx', years=[year_to_delete])
         
         if existing_df is None:
             return jsonify({
@@ -859,9 +947,7 @@ def delete_year_data():
             }), 404
         
         try:
-            safe_print(f"🔧 DEBUG: Loading existing XLSX with {len(existing_df)} rows")
-            safe_print(f"🔧 DEBUG: Year to delete: {year_to_delete}")
-            safe_print(f"🔧 DEBUG: Existing years in file: {existing_df['Tahun'].unique().tolist()}")
+            safe_print(f"🔧 DEBUG: Loading {len(existing_df)} rows for year {year_to_delete}")
             
             # Check if the year exists in the data
             if year_to_delete not in existing_df['Tahun'].values:
@@ -876,50 +962,14 @@ def delete_year_data():
             deleted_count = original_count - len(filtered_df)
             
             safe_print(f"🗑️ DEBUG: Deleted {deleted_count} rows for year {year_to_delete}")
-            safe_print(f"🔧 DEBUG: Remaining {len(filtered_df)} rows from other years")
             
-            # Save the filtered data back to the XLSX file
-            if len(filtered_df) > 0:
-                # Sort the remaining data properly before saving
-                def sort_key(row):
-                    year = row['Tahun']
-                    section = str(row['Section']) if pd.notna(row['Section']) else ''
-                    no = row['No']
-                    row_type = str(row['Type']) if pd.notna(row['Type']) else 'indicator'
-                    
-                    # Convert 'no' to numeric for proper sorting
-                    try:
-                        no_numeric = int(no) if str(no).isdigit() else 9999
-                    except (ValueError, TypeError):
-                        no_numeric = 9999
-                    
-                    # Type priority: header=0, indicators=1, subtotal=2, total=3 (appears last)
-                    type_priority = {'header': 0, 'indicator': 1, 'subtotal': 2, 'total': 3}.get(row_type, 1)
-                    
-                    # Special handling for total rows: they should appear at the very end of each year
-                    if row_type == 'total':
-                        # Use 'ZZZZZ' as section to ensure total rows sort last within each year
-                        section = 'ZZZZZ'
-                    
-                    return (year, section, type_priority, no_numeric)
-                
-                # Apply sorting
-                df_sorted = filtered_df.loc[filtered_df.apply(sort_key, axis=1).sort_values().index]
-                success = storage_service.write_excel(df_sorted, 'web-output/output.xlsx')
-                if success:
-                    safe_print(f"SUCCESS: Updated output.xlsx with {len(df_sorted)} rows (deleted {deleted_count} rows for year {year_to_delete})")
-                else:
-                    safe_print(f"ERROR: Failed to update output.xlsx after deletion")
+            # Rewrite the year's partition (removed when no rows remain)
+            success = storage_service.write_excel(filtered_df, 'web-output/output.xlsx', years=[year_to_delete])
+            if success:
+                safe_print(f"SUCCESS: Updated output.xlsx (deleted {deleted_count} rows for year {year_to_delete})")
+                refresh_gcg_trend_year(year_to_delete, filtered_df)
             else:
-                # If no data remains, create an empty file with just headers
-                empty_df = pd.DataFrame(columns=['Level', 'Type', 'Section', 'No', 'Deskripsi', 
-                                               'Bobot', 'Skor', 'Capaian', 'Penjelasan', 'Tahun', 'Penilai', 
-                                               'Jenis_Asesmen', 'Export_Date'])
-                success = storage_service.write_excel(empty_df, 'web-output/output.xlsx')
-                if success:
-                    safe_print(f"SUCCESS: Created empty output.xlsx file (all data deleted)")
-                else:
-                    safe_print(f"ERROR: Failed to create empty output.xlsx file")
+                safe_print(f"ERROR: Failed to update output.xlsx after deletion")
             
         except Exception as e:
             safe_print(f"ERROR: Could not process XLSX file: {e}")
@@ -949,8 +999,8 @@ def load_assessment_by_year(year):
     Load assessment data for a specific year from output.xlsx
     """
     try:
-        # Read XLSX data
-        df = storage_service.read_excel('web-output/output.xlsx')
+        # Read only the requested year's partition
+        df = storage_service.read_excel('web-output/output.xlsx', years=[year])
         
         if df is None:
             return jsonify({
@@ -1212,9 +1262,8 @@ def _cleanup_orphaned_data_internal():
     
     # Get years that exist in output.xlsx
     xlsx_years = set()
-    df = storage_service.read_excel('web-output/output.xlsx')
-    if df is not None:
-        xlsx_years = set(df['Tahun'].unique())
+    if storage_service.file_exists('web-output/output.xlsx'):
+        xlsx_years = set(storage_service.list_partitions('web-output/output.xlsx'))
     
     # Clean up assessments.json
     orphaned_count = 0
@@ -1371,48 +1420,139 @@ def get_gcg_chart_data():
         }), 500
 
 
+@app.route('/api/changes', methods=['GET'])
+def get_changes():
+    """
+    Get entities inserted, updated or deleted since a change-log sequence number.
+    Query: since (seq, default 0), limit, entity (repeatable filter).
+    Clients keep `next` as their cursor; reset=true means the cursor is too old
+    and collections must be reloaded.
+    """
+    try:
+        since = request.args.get('since', 0, type=int)
+        limit = request.args.get('limit', change_log.CHANGES_PAGE_LIMIT, type=int)
+        entities = request.args.getlist('entity') or None
+        return jsonify({'success': True, **change_log.get_changes(since, limit, entities)})
+    except Exception as e:
+        safe_print(f"ERROR: Error loading changes: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/search', methods=['GET'])
+def search_documents():
+    """
+    Ranked full-text search over checklist deskripsi, uploaded file names/catatan
+    and AOI recommendations.
+    Query: q, year, aspek, type (repeatable: checklist, uploaded-files, aoi-recommendations), limit.
+    """
+    try:
+        query = request.args.get('q', '').strip()
+        limit = min(max(request.args.get('limit', search_index.SEARCH_LIMIT, type=int), 1),
+                    search_index.MAX_SEARCH_LIMIT)
+        results = search_index.search(
+            query,
+            year=request.args.get('year', type=int),
+            aspek=request.args.get('aspek') or None,
+            entities=request.args.getlist('type') or None,
+            limit=limit
+        )
+        return jsonify({'success': True, 'query': query, 'results': results, 'total': len(results)})
+    except Exception as e:
+        safe_print(f"ERROR: Error searching documents: {str(e)}")
+        return jsonify({'success': False, 'error': str(e), 'results': []}), 500
+
+
+@app.route('/api/search/documents', methods=['GET'])
+def search_document_contents():
+    """
+    Search inside stored documents (PDF text, xlsx cells, txt/md) with highlighted snippets.
+    Query: q, year, limit.
+    """
+    try:
+        query = request.args.get('q', '').strip()
+        results = content_indexer.search(
+            query,
+            year=request.args.get('year', type=int),
+            limit=request.args.get('limit', search_index.SEARCH_LIMIT, type=int)
+        )
+        return jsonify({'success': True, 'query': query, 'results': results, 'total': len(results)})
+    except Exception as e:
+        safe_print(f"ERROR: Error searching document contents: {str(e)}")
+        return jsonify({'success': False, 'error': str(e), 'results': []}), 500
+
+
+@app.route('/api/content-index/status', methods=['GET'])
+def get_content_index_status():
+    """Document text extraction progress and per-status document counts"""
+    try:
+        return jsonify({'success': True, **content_indexer.get_status()})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/content-index/rescan', methods=['POST'])
+def rescan_content_index():
+    """Queue new/changed stored documents for extraction (runs in the background)"""
+    content_indexer.scan_in_background()
+    return jsonify({'success': True, 'message': 'Content index scan started'}), 202
+
+
+@app.route('/api/gcg-trends', methods=['GET'])
+@conditional_get(entity_version(gcg_trends.TRENDS_ENTITY), cache_control='no-cache')
+def get_gcg_trends():
+    """
+    Get the compact multi-year GCG trend (per-year totals, per-aspect skor/capaian,
+    year-over-year deltas, best/worst) from the materialized aggregates.
+    Query: from, to (years), aspects=0 to omit per-aspect rows.
+    """
+    try:
+        trends = gcg_trends.get_trends(
+            request.args.get('from', type=int),
+            request.args.get('to', type=int),
+            include_aspects=request.args.get('aspects', '1') != '0'
+        )
+        return jsonify({'success': True, **trends})
+
+    except Exception as e:
+        safe_print(f"ERROR: Error loading GCG trends: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'years': []
+        }), 500
+
+
 @app.route('/api/gcg-mapping', methods=['GET'])
+@conditional_get(file_version(GCG_MAPPING_PATH), cache_control='public, no-cache')
 def get_gcg_mapping():
     """
     Get GCG mapping data for autocomplete suggestions
+    Optional ?section= and/or ?no= return only the matching items from the index
     """
     try:
-        # Path to GCG mapping CSV file
-        gcg_mapping_path = Path(__file__).parent.parent / 'GCG_MAPPING.csv'
-        
-        if not gcg_mapping_path.exists():
-            safe_print(f"WARNING: GCG_MAPPING.csv not found at: {gcg_mapping_path}")
+        section = request.args.get('section')
+        no = request.args.get('no')
+        if section or no:
+            items = gcg_catalogue.find(section, no)
+        else:
+            # Whole catalogue: serve the prebuilt payload as-is
+            payload = gcg_catalogue.get_payload()
+            if payload is not None:
+                return app.response_class(payload, mimetype='application/json')
+            items = None
+
+        if items is None:
+            safe_print(f"WARNING: GCG_MAPPING.csv not found at: {GCG_MAPPING_PATH}")
             return jsonify({
                 'success': False,
                 'error': 'GCG mapping file not found',
                 'data': []
             }), 404
-        
-        # Read GCG mapping CSV
-        df = pd.read_csv(gcg_mapping_path)
-        
-        # Convert to list of dictionaries for JSON response
-        gcg_data = []
-        for _, row in df.iterrows():
-            gcg_item = {
-                'level': str(row.get('Level', '')),
-                'type': str(row.get('Type', '')),
-                'section': str(row.get('Section', '')),
-                'no': str(row.get('No', '')),
-                'deskripsi': str(row.get('Deskripsi', '')),
-                'jumlah_parameter': str(row.get('Jumlah_Parameter', '')),
-                'bobot': str(row.get('Bobot', ''))
-            }
-            gcg_data.append(gcg_item)
-        
-        # Return all items for flexible filtering on frontend
+
         return jsonify({
             'success': True,
-            'data': gcg_data,
-            'total_items': len(gcg_data),
-            'headers': len([item for item in gcg_data if item['type'] == 'header']),
-            'indicators': len([item for item in gcg_data if item['type'] == 'indicator']),
-            'message': f'Loaded {len(gcg_data)} GCG items for autocomplete'
+            'data': items,
+            'total_items': len(items)
         })
         
     except Exception as e:
@@ -1423,6 +1563,38 @@ def get_gcg_mapping():
             'data': []
         }), 500
 
+
+@app.route('/api/gcg-mapping/search', methods=['GET'])
+@conditional_get(file_version(GCG_MAPPING_PATH), cache_control='public, no-cache')
+def search_gcg_mapping():
+    """
+    Server-side autocomplete over the GCG catalogue token index
+    Query: q (every word is matched as a prefix), type (header/indicator/all), section, limit
+    """
+    try:
+        limit = min(max(request.args.get('limit', SEARCH_LIMIT, type=int), 1), MAX_SEARCH_LIMIT)
+        results = gcg_catalogue.search(
+            request.args.get('q', ''),
+            item_type=request.args.get('type'),
+            section=request.args.get('section'),
+            limit=limit
+        )
+        if results is None:
+            return jsonify({
+                'success': False,
+                'error': 'GCG mapping file not found',
+                'data': []
+            }), 404
+        return jsonify({'success': True, 'data': results, 'total_items': len(results)})
+
+    except Exception as e:
+        safe_print(f"ERROR: Error searching GCG mapping: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'data': []
+        }), 500
+
 @app.route('/api/cleanup-orphaned-data', methods=['POST'])
 def cleanup_orphaned_data():
     """
@@ -1433,9 +1605,8 @@ def cleanup_orphaned_data():
         
         # Get years that exist in output.xlsx
         xlsx_years = set()
-        df = storage_service.read_excel('web-output/output.xlsx')
-        if df is not None:
-            xlsx_years = set(df['Tahun'].unique())
+        if storage_service.file_exists('web-output/output.xlsx'):
+            xlsx_years = set(storage_service.list_partitions('web-output/output.xlsx'))
             safe_print(f"INFO: Found years in output.xlsx: {sorted(xlsx_years)}")
         else:
             safe_print("WARNING: output.xlsx not found - will clean all assessments.json entries")
@@ -1486,39 +1657,63 @@ def cleanup_orphaned_data():
         }), 500
 
 
+UPLOADED_FILES_SORT = ['uploadDate', 'id']
+UPLOADED_FILES_FILTERS = ['checklistId', 'aspect', 'subdirektorat', 'status', 'userSubdirektorat']
+
+
 @app.route('/api/uploaded-files', methods=['GET'])
 def get_uploaded_files():
-    """Get all uploaded files from storage."""
+    """Get uploaded files, filtered by year/column and paginated (?limit=&cursor=&fields=)."""
     try:
         # Get year filter from query parameters
         year = request.args.get('year')
-        
-        # Read uploaded files data from storage
-        files_data = storage_service.read_excel('uploaded-files.xlsx')
-        
-        if files_data is None:
-            # Return empty list if no files exist yet
-            return jsonify({'files': []}), 200
-        
-        # Convert DataFrame to list of dictionaries, replacing NaN with None
-        files_data = files_data.fillna('')  # Replace NaN with empty strings
-        files_list = files_data.to_dict('records')
-        
-        # Filter by year if provided
+        year_int = None
         if year:
             try:
                 year_int = int(year)
-                files_list = [f for f in files_list if f.get('year') == year_int]
             except ValueError:
                 return jsonify({'error': 'Invalid year parameter'}), 400
         
-        return jsonify({'files': files_list}), 200
+        # Read uploaded files data from storage (just the requested year's partition)
+        files_data = storage_service.read_excel('uploaded-files.xlsx',
+                                                years=[year_int] if year_int is not None else None)
+        
+        if files_data is None:
+            # Return empty list if no files exist yet
+            return jsonify({'files': [], 'nextCursor': None}), 200
+
+        try:
+            page = parse_page_args(request.args, list(files_data.columns))
+        except PaginationError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # Filter as boolean masks on the frame, before any row is converted to a dict
+        if year_int is not None and 'year' in files_data.columns:
+            files_data = files_data[pd.to_numeric(files_data['year'], errors='coerce') == year_int]
+        for column in UPLOADED_FILES_FILTERS:
+            value = request.args.get(column)
+            if value and column in files_data.columns:
+                files_data = files_data[files_data[column].astype(str) == value]
+
+        files_data = files_data.fillna('')  # Replace NaN with empty strings
+        for column in UPLOADED_FILES_SORT:
+            files_data[column] = files_data[column].astype(str) if column in files_data.columns else ''
+        files_data = files_data.sort_values(UPLOADED_FILES_SORT, kind='stable')
+        if page.key is not None:
+            files_data = frame_after(files_data, UPLOADED_FILES_SORT, page.key)
+
+        files_list = page.head(files_data).to_dict('records')
+        files_list, next_cursor = finish_page(files_list, page, lambda f: [f['uploadDate'], f['id']])
+        
+        response = jsonify({'files': files_list, 'nextCursor': next_cursor})
+        return with_cursor_header(response, next_cursor), 200
         
     except Exception as e:
         safe_print(f"Error getting uploaded files: {e}")
         return jsonify({'error': f'Failed to get uploaded files: {str(e)}'}), 500
 
 @app.route('/api/uploaded-files', methods=['POST'])
+@storage_service.transaction('uploaded-files.xlsx')
 def create_uploaded_file():
     """Add a new uploaded file record to storage."""
     try:
@@ -1530,9 +1725,9 @@ def create_uploaded_file():
             if field not in data:
                 return jsonify({'error': f'Missing required field: {field}'}), 400
         
-        # Read existing files data
+        # Read existing files data of the record's year
         try:
-            files_data = storage_service.read_excel('uploaded-files.xlsx')
+            files_data = storage_service.read_excel('uploaded-files.xlsx', years=[data['year']])
             if files_data is None:
                 # Create new DataFrame if no data exists
                 files_data = pd.DataFrame()
@@ -1568,9 +1763,10 @@ def create_uploaded_file():
         files_data = pd.concat([files_data, new_row], ignore_index=True)
         
         # Save to storage
-        success = storage_service.write_excel(files_data, 'uploaded-files.xlsx')
+        success = storage_service.write_excel(files_data, 'uploaded-files.xlsx', years=[data['year']])
         
         if success:
+            change_log.record_change('uploaded-files', new_id, 'insert', new_file)
             return jsonify({'success': True, 'file': new_file}), 201
         else:
             return jsonify({'error': 'Failed to save file to storage'}), 500
@@ -1580,6 +1776,7 @@ def create_uploaded_file():
         return jsonify({'error': f'Failed to create uploaded file: {str(e)}'}), 500
 
 @app.route('/api/fix-uploaded-files-schema', methods=['POST'])
+@storage_service.transaction('uploaded-files.xlsx')
 def fix_uploaded_files_schema():
     """Add missing user information columns to uploaded-files.xlsx"""
     try:
@@ -1636,6 +1833,7 @@ def fix_uploaded_files_schema():
 
 @app.route('/api/uploaded-files/<file_id>', methods=['DELETE'])
 @app.route('/api/delete-file/<file_id>', methods=['DELETE'])
+@storage_service.transaction('uploaded-files.xlsx')
 def delete_uploaded_file(file_id):
     """Delete an uploaded file record and actual file from local storage."""
     try:
@@ -1951,67 +2149,77 @@ def download_file_by_id(file_id):
         return jsonify({'error': f'Failed to download file: {str(e)}'}), 500
 
 # AOI TABLES ENDPOINTS
-@app.route('/api/aoiTables', methods=['GET'])
-def get_aoi_tables():
-    """Get all AOI tables (filtered by user structure if applicable)"""
-    try:
-        # Get filter parameters from query string
+def resolve_aoi_request_scope(year=None):
+    """Resolved user scope for AOI filtering, or None for super-admins / unscoped requests"""
+    # Filter by the session token's claims when present, else the query string
+    if g.session:
+        user_role = 'super-admin' if g.session['role'] == 'superadmin' else g.session['role']
+        user_direktorat = g.session['direktorat']
+        user_subdirektorat = g.session['subdirektorat']
+        user_divisi = g.session['divisi']
+    else:
         user_role = request.args.get('userRole', '')
+        user_direktorat = request.args.get('userDirektorat', '')
         user_subdirektorat = request.args.get('userSubdirektorat', '')
         user_divisi = request.args.get('userDivisi', '')
-        year = request.args.get('year', '')
 
-        aoi_data = storage_service.read_csv('config/aoi-tables.csv')
-        if aoi_data is not None:
-            # Replace NaN values with empty strings before converting to dict
-            aoi_data = aoi_data.fillna('')
+    if user_role == 'super-admin' or not user_subdirektorat:
+        return None
+    # Resolve the user's divisi → subdirektorat → direktorat once, then match in SQL
+    return aoi_store.resolve_user_scope(user_divisi, user_subdirektorat, user_direktorat, year)
 
-            # Filter by year if provided
-            if year:
-                aoi_data = aoi_data[aoi_data['tahun'] == int(year)]
-
-            # Filter by user structure (unless super-admin)
-            if user_role != 'super-admin' and user_subdirektorat:
-                # Filter logic: match by divisi (most specific), subdirektorat, or direktorat
-                filtered_tables = []
-                for _, table in aoi_data.iterrows():
-                    # Match by divisi (most specific)
-                    if table.get('targetDivisi') and table['targetDivisi'] != 'Tidak ada':
-                        if table['targetDivisi'] == user_divisi:
-                            filtered_tables.append(table)
-                    # Match by subdirektorat
-                    elif table.get('targetSubdirektorat') and table['targetSubdirektorat'] != 'Tidak ada':
-                        if table['targetSubdirektorat'] == user_subdirektorat:
-                            filtered_tables.append(table)
-                    # Match by direktorat - would need struktur data to check
-                    # For now, we rely on frontend filtering for direktorat level
-                    elif table.get('targetDirektorat') and table['targetDirektorat'] != 'Tidak ada':
-                        # Include direktorat-level tables for now
-                        filtered_tables.append(table)
-
-                if filtered_tables:
-                    aoi_data = pd.DataFrame(filtered_tables)
-                else:
-                    return jsonify([]), 200
+@app.route('/api/aoiTables', methods=['GET'])
+@require_session(optional=True)
+def get_aoi_tables():
+    """Get all AOI tables (filtered by user structure if applicable)"""
+    try:
+        year = request.args.get('year', type=int)
+        scope = resolve_aoi_request_scope(year)
+        if scope:
+            aoi_tables = aoi_store.list_tables_for_scope(scope, year)
+        else:
+            aoi_tables = aoi_store.list_tables(year)
 
-            aoi_tables = aoi_data.to_dict(orient='records')
-            return jsonify(aoi_tables), 200
-        return jsonify([]), 200
+        return jsonify(aoi_tables), 200
     except Exception as e:
         safe_print(f"Error getting AOI tables: {e}")
         return jsonify([]), 200
 
+def aoi_tree_version():
+    """Data version of the AOI tree plus the session's scope claims
+
+    The tree is filtered by the user's structure, so the ETag must differ per
+    scope; query-string scopes are already part of the URL.
+    """
+    claims = [g.session[key] for key in ('role', 'direktorat', 'subdirektorat', 'divisi')] if g.session else None
+    version = change_log.get_entity_version(['aoi-tables', 'aoi-recommendations', 'aoi-documents',
+                                             'direktorat', 'subdirektorat', 'divisi'])
+    return f"{version}|{claims}"
+
+@app.route('/api/aoiTree', methods=['GET'])
+@require_session(optional=True)
+@conditional_get(aoi_tree_version)
+def get_aoi_tree():
+    """Get AOI tables with nested recommendations and documents in one response
+
+    Accepts the same year/user filters as /api/aoiTables. An unchanged tree is
+    answered with 304 Not Modified before any query runs.
+    """
+    try:
+        year = request.args.get('year', type=int)
+        tree = aoi_store.get_tree(year, resolve_aoi_request_scope(year))
+        return jsonify(tree), 200
+    except Exception as e:
+        safe_print(f"Error getting AOI tree: {e}")
+        return jsonify({'error': f'Failed to get AOI tree: {str(e)}'}), 500
+
 @app.route('/api/aoiTables/<int:table_id>', methods=['GET'])
 def get_aoi_table_by_id(table_id):
     """Get AOI table by ID"""
     try:
-        aoi_data = storage_service.read_csv('config/aoi-tables.csv')
-        if aoi_data is not None:
-            aoi_data = aoi_data.fillna('')
-            table_row = aoi_data[aoi_data['id'] == table_id]
-            if not table_row.empty:
-                table = safe_serialize_dict(table_row.iloc[0].to_dict())
-                return jsonify(table), 200
+        table = aoi_store.get_table(table_id)
+        if table:
+            return jsonify(table), 200
         return jsonify({'error': 'AOI table not found'}), 404
     except Exception as e:
         safe_print(f"Error getting AOI table {table_id}: {e}")
@@ -2026,37 +2234,8 @@ def create_aoi_table():
         # Generate unique ID
         table_id = generate_unique_id()
         
-        # Create AOI table object
-        aoi_table_data = {
-            'id': table_id,
-            'nama': data.get('nama', ''),
-            'tahun': data.get('tahun'),
-            'targetType': data.get('targetType', ''),
-            'targetDirektorat': data.get('targetDirektorat', ''),
-            'targetSubdirektorat': data.get('targetSubdirektorat', ''),
-            'targetDivisi': data.get('targetDivisi', ''),
-            'createdAt': data.get('createdAt', datetime.now().isoformat()),
-            'status': data.get('status', 'active')
-        }
-        
-        # Read existing AOI tables
-        existing_data = storage_service.read_csv('config/aoi-tables.csv')
-        if existing_data is not None:
-            aoi_df = existing_data
-        else:
-            aoi_df = pd.DataFrame()
-        
-        # Add new AOI table
-        new_aoi_df = pd.DataFrame([aoi_table_data])
-        updated_df = pd.concat([aoi_df, new_aoi_df], ignore_index=True)
-        
-        # Save to storage
-        success = storage_service.write_csv(updated_df, 'config/aoi-tables.csv')
-        
-        if success:
-            return jsonify(aoi_table_data), 201
-        else:
-            return jsonify({'error': 'Failed to save AOI table'}), 500
+        aoi_table_data = aoi_store.create_table(table_id, data)
+        return jsonify(aoi_table_data), 201
             
     except Exception as e:
         safe_print(f"Error creating AOI table: {e}")
@@ -2068,33 +2247,10 @@ def update_aoi_table(table_id):
     try:
         data = request.get_json()
         
-        # Read existing AOI tables
-        aoi_data = storage_service.read_csv('config/aoi-tables.csv')
-        if aoi_data is None:
-            return jsonify({'error': 'No AOI tables found'}), 404
-        
-        # Update the AOI table
-        aoi_data.loc[aoi_data['id'] == table_id, 'nama'] = data.get('nama', '')
-        aoi_data.loc[aoi_data['id'] == table_id, 'tahun'] = data.get('tahun')
-        aoi_data.loc[aoi_data['id'] == table_id, 'targetType'] = data.get('targetType', '')
-        aoi_data.loc[aoi_data['id'] == table_id, 'targetDirektorat'] = data.get('targetDirektorat', '')
-        aoi_data.loc[aoi_data['id'] == table_id, 'targetSubdirektorat'] = data.get('targetSubdirektorat', '')
-        aoi_data.loc[aoi_data['id'] == table_id, 'targetDivisi'] = data.get('targetDivisi', '')
-        aoi_data.loc[aoi_data['id'] == table_id, 'status'] = data.get('status', 'active')
-        
-        # Save to storage
-        success = storage_service.write_csv(aoi_data, 'config/aoi-tables.csv')
-        
-        if success:
-            # Return updated table
-            updated_row = aoi_data[aoi_data['id'] == table_id]
-            if not updated_row.empty:
-                updated_table = safe_serialize_dict(updated_row.iloc[0].to_dict())
-                return jsonify(updated_table), 200
-            else:
-                return jsonify({'error': 'AOI table not found after update'}), 404
-        else:
-            return jsonify({'error': 'Failed to update AOI table'}), 500
+        updated_table = aoi_store.update_table(table_id, data)
+        if updated_table is None:
+            return jsonify({'error': 'AOI table not found'}), 404
+        return jsonify(updated_table), 200
             
     except Exception as e:
         safe_print(f"Error updating AOI table {table_id}: {e}")
@@ -2104,21 +2260,8 @@ def update_aoi_table(table_id):
 def delete_aoi_table(table_id):
     """Delete an AOI table"""
     try:
-        # Read existing AOI tables
-        aoi_data = storage_service.read_csv('config/aoi-tables.csv')
-        if aoi_data is None:
-            return jsonify({'error': 'No AOI tables found'}), 404
-        
-        # Remove the AOI table
-        aoi_data = aoi_data[aoi_data['id'] != table_id]
-        
-        # Save to storage
-        success = storage_service.write_csv(aoi_data, 'config/aoi-tables.csv')
-        
-        if success:
-            return jsonify({'message': f'AOI table {table_id} deleted successfully'}), 200
-        else:
-            return jsonify({'error': 'Failed to delete AOI table'}), 500
+        aoi_store.delete_table(table_id)
+        return jsonify({'message': f'AOI table {table_id} deleted successfully'}), 200
             
     except Exception as e:
         safe_print(f"Error deleting AOI table {table_id}: {e}")
@@ -2130,18 +2273,7 @@ def get_aoi_recommendations():
     """Get AOI recommendations, optionally filtered by aoiTableId"""
     try:
         aoi_table_id = request.args.get('aoiTableId', type=int)
-        
-        recommendations_data = storage_service.read_csv('config/aoi-recommendations.csv')
-        if recommendations_data is not None:
-            recommendations_data = recommendations_data.fillna('')
-            
-            # Filter by aoiTableId if provided
-            if aoi_table_id:
-                recommendations_data = recommendations_data[recommendations_data['aoiTableId'] == aoi_table_id]
-            
-            recommendations = recommendations_data.to_dict(orient='records')
-            return jsonify(recommendations), 200
-        return jsonify([]), 200
+        return jsonify(aoi_store.list_recommendations(aoi_table_id)), 200
     except Exception as e:
         safe_print(f"Error getting AOI recommendations: {e}")
         return jsonify([]), 200
@@ -2150,13 +2282,9 @@ def get_aoi_recommendations():
 def get_aoi_recommendation_by_id(recommendation_id):
     """Get AOI recommendation by ID"""
     try:
-        recommendations_data = storage_service.read_csv('config/aoi-recommendations.csv')
-        if recommendations_data is not None:
-            recommendations_data = recommendations_data.fillna('')
-            recommendation_row = recommendations_data[recommendations_data['id'] == recommendation_id]
-            if not recommendation_row.empty:
-                recommendation = safe_serialize_dict(recommendation_row.iloc[0].to_dict())
-                return jsonify(recommendation), 200
+        recommendation = aoi_store.get_recommendation(recommendation_id)
+        if recommendation:
+            return jsonify(recommendation), 200
         return jsonify({'error': 'AOI recommendation not found'}), 404
     except Exception as e:
         safe_print(f"Error getting AOI recommendation {recommendation_id}: {e}")
@@ -2171,52 +2299,10 @@ def create_aoi_recommendation():
         # Generate unique ID
         recommendation_id = generate_unique_id()
         
-        # Read existing AOI recommendations
-        existing_data = storage_service.read_csv('config/aoi-recommendations.csv')
-        if existing_data is not None:
-            recommendations_df = existing_data
-        else:
-            recommendations_df = pd.DataFrame()
-        
-        # Calculate correct row number for this table
-        table_id = data.get('aoiTableId')
-        if table_id and not recommendations_df.empty:
-            # Get existing recommendations for this table
-            table_recs = recommendations_df[recommendations_df['aoiTableId'] == table_id]
-            if not table_recs.empty:
-                # Since we're using sequential numbering (no gaps), just count existing + 1
-                next_no = len(table_recs) + 1
-            else:
-                next_no = 1
-        else:
-            next_no = 1
-        
-        # Create AOI recommendation object
-        aoi_recommendation_data = {
-            'id': recommendation_id,
-            'aoiTableId': table_id,
-            'jenis': data.get('jenis', 'REKOMENDASI'),
-            'no': next_no,  # Use calculated number instead of frontend value
-            'isi': data.get('isi', ''),
-            'tingkatUrgensi': data.get('tingkatUrgensi', 'SEDANG'),
-            'aspekAOI': data.get('aspekAOI', ''),
-            'pihakTerkait': data.get('pihakTerkait', ''),
-            'organPerusahaan': data.get('organPerusahaan', ''),
-            'createdAt': data.get('createdAt', datetime.now().isoformat()),
-            'status': data.get('status', 'active')
-        }
-        
-        # Add new AOI recommendation
-        new_recommendation_df = pd.DataFrame([aoi_recommendation_data])
-        updated_df = pd.concat([recommendations_df, new_recommendation_df], ignore_index=True)
-        
-        # Save to storage
-        success = storage_service.write_csv(updated_df, 'config/aoi-recommendations.csv')
-        
-        if success:
-            return jsonify(aoi_recommendation_data), 201
-        else:
-            return jsonify({'error': 'Failed to save AOI recommendation'}), 500
+        # Row number is calculated from the table's existing recommendations,
+        # not taken from the frontend value
+        aoi_recommendation_data = aoi_store.create_recommendation(recommendation_id, data)
+        return jsonify(aoi_recommendation_data), 201
             
     except Exception as e:
         safe_print(f"Error creating AOI recommendation: {e}")
@@ -2228,35 +2314,10 @@ def update_aoi_recommendation(recommendation_id):
     try:
         data = request.get_json()
         
-        # Read existing AOI recommendations
-        recommendations_data = storage_service.read_csv('config/aoi-recommendations.csv')
-        if recommendations_data is None:
-            return jsonify({'error': 'No AOI recommendations found'}), 404
-        
-        # Update the AOI recommendation
-        recommendations_data.loc[recommendations_data['id'] == recommendation_id, 'aoiTableId'] = data.get('aoiTableId')
-        recommendations_data.loc[recommendations_data['id'] == recommendation_id, 'jenis'] = data.get('jenis', 'REKOMENDASI')
-        recommendations_data.loc[recommendations_data['id'] == recommendation_id, 'no'] = data.get('no', 1)
-        recommendations_data.loc[recommendations_data['id'] == recommendation_id, 'isi'] = data.get('isi', '')
-        recommendations_data.loc[recommendations_data['id'] == recommendation_id, 'tingkatUrgensi'] = data.get('tingkatUrgensi', 'SEDANG')
-        recommendations_data.loc[recommendations_data['id'] == recommendation_id, 'aspekAOI'] = data.get('aspekAOI', '')
-        recommendations_data.loc[recommendations_data['id'] == recommendation_id, 'pihakTerkait'] = data.get('pihakTerkait', '')
-        recommendations_data.loc[recommendations_data['id'] == recommendation_id, 'organPerusahaan'] = data.get('organPerusahaan', '')
-        recommendations_data.loc[recommendations_data['id'] == recommendation_id, 'status'] = data.get('status', 'active')
-        
-        # Save to storage
-        success = storage_service.write_csv(recommendations_data, 'config/aoi-recommendations.csv')
-        
-        if success:
-            # Return updated recommendation
-            updated_row = recommendations_data[recommendations_data['id'] == recommendation_id]
-            if not updated_row.empty:
-                updated_recommendation = safe_serialize_dict(updated_row.iloc[0].to_dict())
-                return jsonify(updated_recommendation), 200
-            else:
-                return jsonify({'error': 'AOI recommendation not found after update'}), 404
-        else:
-            return jsonify({'error': 'Failed to update AOI recommendation'}), 500
+        updated_recommendation = aoi_store.update_recommendation(recommendation_id, data)
+        if updated_recommendation is None:
+            return jsonify({'error': 'AOI recommendation not found'}), 404
+        return jsonify(updated_recommendation), 200
             
     except Exception as e:
         safe_print(f"Error updating AOI recommendation {recommendation_id}: {e}")
@@ -2266,46 +2327,14 @@ def update_aoi_recommendation(recommendation_id):
 def delete_aoi_recommendation(recommendation_id):
     """Delete an AOI recommendation and renumber remaining recommendations"""
     try:
-        # Read existing AOI recommendations
-        recommendations_data = storage_service.read_csv('config/aoi-recommendations.csv')
-        if recommendations_data is None:
-            return jsonify({'error': 'No AOI recommendations found'}), 404
-        
-        # Find the recommendation to be deleted to get its table ID and current number
-        target_rec = recommendations_data[recommendations_data['id'] == recommendation_id]
-        if target_rec.empty:
+        target_table_id = aoi_store.delete_recommendation(recommendation_id)
+        if target_table_id is None:
             return jsonify({'error': 'AOI recommendation not found'}), 404
         
-        target_table_id = target_rec.iloc[0]['aoiTableId']
-        target_no = int(target_rec.iloc[0]['no'])
-        
-        # Remove the target recommendation
-        recommendations_data = recommendations_data[recommendations_data['id'] != recommendation_id]
-        
-        # Get all recommendations for the same table, sorted by 'no'
-        table_recs = recommendations_data[recommendations_data['aoiTableId'] == target_table_id].copy()
-        
-        if not table_recs.empty:
-            # Renumber all recommendations with 'no' greater than the deleted one
-            # Sort by 'no' to ensure proper order
-            table_recs_sorted = table_recs.sort_values('no')
-            
-            # Update the row numbers: shift down all numbers greater than target_no
-            for idx, row in table_recs_sorted.iterrows():
-                current_no = int(row['no'])
-                if current_no > target_no:
-                    recommendations_data.loc[idx, 'no'] = current_no - 1
-        
-        # Save to storage
-        success = storage_service.write_csv(recommendations_data, 'config/aoi-recommendations.csv')
-        
-        if success:
-            return jsonify({
-                'message': f'AOI recommendation {recommendation_id} deleted successfully',
-                'renumbered': f'Renumbered recommendations for table {target_table_id}'
-            }), 200
-        else:
-            return jsonify({'error': 'Failed to delete AOI recommendation'}), 500
+        return jsonify({
+            'message': f'AOI recommendation {recommendation_id} deleted successfully',
+            'renumbered': f'Renumbered recommendations for table {target_table_id}'
+        }), 200
             
     except Exception as e:
         safe_print(f"Error deleting AOI recommendation {recommendation_id}: {e}")
@@ -2314,26 +2343,23 @@ def delete_aoi_recommendation(recommendation_id):
 # AOI DOCUMENTS ENDPOINTS
 @app.route('/api/aoiDocuments', methods=['GET'])
 def get_aoi_documents():
-    """Get AOI documents, optionally filtered by recommendation ID or year"""
+    """Get AOI documents, optionally filtered by recommendation ID, year or status (paginated)"""
     try:
         aoi_recommendation_id = request.args.get('aoiRecommendationId', type=int)
         tahun = request.args.get('tahun', type=int)
-        
-        documents_data = storage_service.read_csv('config/aoi-documents.csv')
-        if documents_data is not None:
-            documents_data = documents_data.fillna('')
-            
-            # Filter by aoiRecommendationId if provided
-            if aoi_recommendation_id:
-                documents_data = documents_data[documents_data['aoiRecommendationId'] == aoi_recommendation_id]
-            
-            # Filter by tahun if provided
-            if tahun:
-                documents_data = documents_data[documents_data['tahun'] == tahun]
-            
-            documents = documents_data.to_dict(orient='records')
-            return jsonify(documents), 200
-        return jsonify([]), 200
+        try:
+            page = parse_page_args(request.args, [key for key, _, _ in aoi_store.DOCUMENT_FIELDS])
+        except PaginationError as e:
+            return jsonify({'error': str(e)}), 400
+        after_rowid = int(page.key[0]) if page.key else None
+        rows = aoi_store.page_documents(aoi_recommendation_id, tahun, request.args.get('status'),
+                                        after_rowid=after_rowid, limit=page.fetch_limit)
+        documents, next_cursor = finish_page([{'_rowid': rowid, **doc} for rowid, doc in rows],
+                                             page, lambda d: [d['_rowid']])
+        if not page.fields:
+            for doc in documents:
+                doc.pop('_rowid', None)
+        return with_cursor_header(jsonify(documents), next_cursor), 200
     except Exception as e:
         safe_print(f"Error getting AOI documents: {e}")
         return jsonify([]), 200
@@ -2342,13 +2368,9 @@ def get_aoi_documents():
 def get_aoi_document_by_id(document_id):
     """Get AOI document by ID"""
     try:
-        documents_data = storage_service.read_csv('config/aoi-documents.csv')
-        if documents_data is not None:
-            documents_data = documents_data.fillna('')
-            document_row = documents_data[documents_data['id'] == document_id]
-            if not document_row.empty:
-                document = safe_serialize_dict(document_row.iloc[0].to_dict())
-                return jsonify(document), 200
+        document = aoi_store.get_document(document_id)
+        if document:
+            return jsonify(document), 200
         return jsonify({'error': 'AOI document not found'}), 404
     except Exception as e:
         safe_print(f"Error getting AOI document {document_id}: {e}")
@@ -2363,42 +2385,8 @@ def create_aoi_document():
         # Generate unique ID (using string for AOI documents)
         document_id = f"aoi_{generate_unique_id()}"
         
-        # Create AOI document object
-        aoi_document_data = {
-            'id': document_id,
-            'fileName': data.get('fileName', ''),
-            'fileSize': data.get('fileSize', 0),
-            'uploadDate': data.get('uploadDate', datetime.now().isoformat()),
-            'aoiRecommendationId': data.get('aoiRecommendationId'),
-            'aoiJenis': data.get('aoiJenis', 'REKOMENDASI'),
-            'aoiUrutan': data.get('aoiUrutan', 1),
-            'userId': data.get('userId', ''),
-            'userDirektorat': data.get('userDirektorat', ''),
-            'userSubdirektorat': data.get('userSubdirektorat', ''),
-            'userDivisi': data.get('userDivisi', ''),
-            'fileType': data.get('fileType', ''),
-            'status': data.get('status', 'active'),
-            'tahun': data.get('tahun')
-        }
-        
-        # Read existing AOI documents
-        existing_data = storage_service.read_csv('config/aoi-documents.csv')
-        if existing_data is not None:
-            documents_df = existing_data
-        else:
-            documents_df = pd.DataFrame()
-        
-        # Add new AOI document
-        new_document_df = pd.DataFrame([aoi_document_data])
-        updated_df = pd.concat([documents_df, new_document_df], ignore_index=True)
-        
-        # Save to storage
-        success = storage_service.write_csv(updated_df, 'config/aoi-documents.csv')
-        
-        if success:
-            return jsonify(aoi_document_data), 201
-        else:
-            return jsonify({'error': 'Failed to save AOI document'}), 500
+        aoi_document_data = aoi_store.create_document(document_id, data)
+        return jsonify(aoi_document_data), 201
             
     except Exception as e:
         safe_print(f"Error creating AOI document: {e}")
@@ -2410,38 +2398,10 @@ def update_aoi_document(document_id):
     try:
         data = request.get_json()
         
-        # Read existing AOI documents
-        documents_data = storage_service.read_csv('config/aoi-documents.csv')
-        if documents_data is None:
-            return jsonify({'error': 'No AOI documents found'}), 404
-        
-        # Update the AOI document
-        documents_data.loc[documents_data['id'] == document_id, 'fileName'] = data.get('fileName', '')
-        documents_data.loc[documents_data['id'] == document_id, 'fileSize'] = data.get('fileSize', 0)
-        documents_data.loc[documents_data['id'] == document_id, 'aoiRecommendationId'] = data.get('aoiRecommendationId')
-        documents_data.loc[documents_data['id'] == document_id, 'aoiJenis'] = data.get('aoiJenis', 'REKOMENDASI')
-        documents_data.loc[documents_data['id'] == document_id, 'aoiUrutan'] = data.get('aoiUrutan', 1)
-        documents_data.loc[documents_data['id'] == document_id, 'userId'] = data.get('userId', '')
-        documents_data.loc[documents_data['id'] == document_id, 'userDirektorat'] = data.get('userDirektorat', '')
-        documents_data.loc[documents_data['id'] == document_id, 'userSubdirektorat'] = data.get('userSubdirektorat', '')
-        documents_data.loc[documents_data['id'] == document_id, 'userDivisi'] = data.get('userDivisi', '')
-        documents_data.loc[documents_data['id'] == document_id, 'fileType'] = data.get('fileType', '')
-        documents_data.loc[documents_data['id'] == document_id, 'status'] = data.get('status', 'active')
-        documents_data.loc[documents_data['id'] == document_id, 'tahun'] = data.get('tahun')
-        
-        # Save to storage
-        success = storage_service.write_csv(documents_data, 'config/aoi-documents.csv')
-        
-        if success:
-            # Return updated document
-            updated_row = documents_data[documents_data['id'] == document_id]
-            if not updated_row.empty:
-                updated_document = safe_serialize_dict(updated_row.iloc[0].to_dict())
-                return jsonify(updated_document), 200
-            else:
-                return jsonify({'error': 'AOI document not found after update'}), 404
-        else:
-            return jsonify({'error': 'Failed to update AOI document'}), 500
+        updated_document = aoi_store.update_document(document_id, data)
+        if updated_document is None:
+            return jsonify({'error': 'AOI document not found'}), 404
+        return jsonify(updated_document), 200
             
     except Exception as e:
         safe_print(f"Error updating AOI document {document_id}: {e}")
@@ -2451,21 +2411,8 @@ def update_aoi_document(document_id):
 def delete_aoi_document(document_id):
     """Delete an AOI document"""
     try:
-        # Read existing AOI documents
-        documents_data = storage_service.read_csv('config/aoi-documents.csv')
-        if documents_data is None:
-            return jsonify({'error': 'No AOI documents found'}), 404
-        
-        # Remove the AOI document
-        documents_data = documents_data[documents_data['id'] != document_id]
-        
-        # Save to storage
-        success = storage_service.write_csv(documents_data, 'config/aoi-documents.csv')
-        
-        if success:
-            return jsonify({'message': f'AOI document {document_id} deleted successfully'}), 200
-        else:
-            return jsonify({'error': 'Failed to delete AOI document'}), 500
+        aoi_store.delete_document(document_id)
+        return jsonify({'message': f'AOI document {document_id} deleted successfully'}), 200
             
     except Exception as e:
         safe_print(f"Error deleting AOI document {document_id}: {e}")
@@ -2550,6 +2497,7 @@ def upload_aoi_file():
             f.write(file_content)
 
         safe_print(f"🔧 DEBUG: File uploaded successfully to: {file_path}")
+        content_indexer.submit(file_path)  # Text extraction runs in the background
         
         # Create AOI document record
         document_id = f"aoi_{generate_unique_id()}"
@@ -2571,32 +2519,16 @@ def upload_aoi_file():
             'filePath': file_path
         }
         
-        # Read existing AOI documents
-        existing_data = storage_service.read_csv('config/aoi-documents.csv')
-        if existing_data is not None:
-            # Remove existing documents for the same recommendation
-            existing_data = existing_data[existing_data['aoiRecommendationId'] != recommendation_id_int]
-            documents_df = existing_data
-        else:
-            documents_df = pd.DataFrame()
-        
-        # Add new AOI document
-        new_document_df = pd.DataFrame([aoi_document_data])
-        updated_df = pd.concat([documents_df, new_document_df], ignore_index=True)
-        
-        # Save to storage
-        success = storage_service.write_csv(updated_df, 'config/aoi-documents.csv')
+        # Replace existing documents for the same recommendation in one transaction
+        aoi_store.create_document(document_id, aoi_document_data, replace_for_recommendation=True)
         
-        if success:
-            safe_print(f"🔧 DEBUG: AOI document record saved successfully")
-            return jsonify({
-                'message': 'AOI file uploaded successfully',
-                'documentId': document_id,
-                'filePath': file_path,
-                'document': aoi_document_data
-            }), 201
-        else:
-            return jsonify({'error': 'Failed to save AOI document record'}), 500
+        safe_print(f"🔧 DEBUG: AOI document record saved successfully")
+        return jsonify({
+            'message': 'AOI file uploaded successfully',
+            'documentId': document_id,
+            'filePath': file_path,
+            'document': aoi_document_data
+        }), 201
             
     except Exception as e:
         safe_print(f"🔧 DEBUG: Exception in upload_aoi_file: {e}")
@@ -2604,6 +2536,9 @@ def upload_aoi_file():
         safe_print(f"🔧 DEBUG: Full traceback: {traceback.format_exc()}")
         return jsonify({'error': f'Failed to upload AOI file: {str(e)}'}), 500
 
+# Keyset columns added to the users frame: numeric id, then raw id + email as tiebreaker
+USERS_SORT = ['_id', '_tie']
+
 @app.route('/api/users', methods=['GET'])
 def get_users():
     """Get all users from storage, optionally filtered by year"""
@@ -2613,8 +2548,8 @@ def get_users():
 
         csv_data = storage_service.read_csv('config/users.csv')
         if csv_data is not None:
-            # Replace NaN values with a safe placeholder to prevent empty password login
-            csv_data = csv_data.fillna({'password': '[NO_PASSWORD_SET]'}).fillna('')
+            # Password hashes never leave the server
+            csv_data = csv_data.drop(columns=['password'], errors='ignore').fillna('')
 
             # Filter by year if provided
             if year is not None and 'tahun' in csv_data.columns:
@@ -2627,12 +2562,36 @@ def get_users():
                 ]
                 safe_print(f"📋 GET /api/users?year={year} - Filtered to {len(csv_data)} users")
 
+            for column in ('role', 'direktorat', 'subdirektorat', 'divisi', 'status'):
+                value = request.args.get(column)
+                if value and column in csv_data.columns:
+                    csv_data = csv_data[csv_data[column].astype(str) == value]
+
+            try:
+                page = parse_page_args(request.args, list(csv_data.columns))
+            except PaginationError as e:
+                return jsonify({'error': str(e)}), 400
+
+            # Keyset on the numeric id (ids are creation timestamps); raw id + email breaks ties
+            # between rows sharing a key, e.g. non-numeric ids that all coerce to 0
+            csv_data = csv_data.assign(_id=pd.to_numeric(csv_data['id'], errors='coerce').fillna(0),
+                                       _tie=csv_data['id'].astype(str) + ' ' + csv_data['email'].astype(str))
+            csv_data = csv_data.sort_values(USERS_SORT, kind='stable')
+            if page.key is not None:
+                csv_data = frame_after(csv_data, USERS_SORT, page.key)
+            csv_data = page.head(csv_data)
+
             # Ensure WhatsApp field is treated as string, not float
             if 'whatsapp' in csv_data.columns:
                 csv_data['whatsapp'] = csv_data['whatsapp'].astype(str).replace('nan', '').str.replace(r'\.0$', '', regex=True)
 
             users = csv_data.to_dict(orient='records')
-            return jsonify(users), 200
+            users, next_cursor = finish_page(users, page, lambda u: [u[column] for column in USERS_SORT])
+            if not page.fields:
+                for user in users:
+                    for column in USERS_SORT:
+                        user.pop(column, None)
+            return with_cursor_header(jsonify(users), next_cursor), 200
         return jsonify([]), 200
     except Exception as e:
         safe_print(f"Error getting users: {e}")
@@ -2649,23 +2608,24 @@ def login_user():
         if not email or not password:
             return jsonify({'error': 'Email and password are required'}), 400
 
-        # Read users from CSV
-        csv_data = storage_service.read_csv('config/users.csv')
-        if csv_data is None or csv_data.empty:
-            return jsonify({'error': 'No users found'}), 404
-
-        # Find user by email and password
-        user_match = csv_data[
-            (csv_data['email'].str.lower() == email.lower()) &
-            (csv_data['password'] == password) &
-            (csv_data['status'] == 'active')
-        ]
+        # Find active CSV user by email (indexed lookup) and password
+        user_match = None
+        for candidate in user_directory.find(email):
+            if candidate['source'] != 'csv' or not candidate['is_active']:
+                continue
+            password_valid, needs_rehash = password_hasher.verify(password, candidate['password'])
+            if password_valid:
+                if needs_rehash:
+                    password_hasher.rehash_in_background(
+                        password, lambda new_hash, c=candidate: user_directory.update_password(c, new_hash))
+                user_match = candidate
+                break
 
-        if user_match.empty:
+        if user_match is None:
             return jsonify({'error': 'Invalid email or password'}), 401
 
         # Get user data
-        user_data = user_match.iloc[0].to_dict()
+        user_data = dict(user_match['record'])
 
         # Remove password from response
         if 'password' in user_data:
@@ -2684,6 +2644,10 @@ def login_user():
 
         return jsonify(user_data), 200
 
+    except HashPoolBusy:
+        response = jsonify({'error': 'Server is busy, please try again'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
     except Exception as e:
         safe_print(f"Error during login: {e}")
         return jsonify({'error': f'Login failed: {str(e)}'}), 500
@@ -2691,8 +2655,7 @@ def login_user():
 @app.route('/api/login-db', methods=['POST'])
 def login_user_db():
     """Authenticate user with email and password from CSV file (primary) or SQLite database"""
-    from database import get_db_connection
-    import bcrypt
+    from user_directory import safe_str
     try:
         data = request.get_json()
         email = data.get('email', '').strip()
@@ -2704,102 +2667,86 @@ def login_user_db():
             safe_print(f"❌ DEBUG: Missing credentials - email: {bool(email)}, password: {bool(password)}")
             return jsonify({'error': 'Email and password are required'}), 400
 
-        # 1. Try CSV file first (primary storage)
-        csv_data = storage_service.read_csv('config/users.csv')
-        safe_print(f"📋 DEBUG: CSV loaded - rows: {len(csv_data) if csv_data is not None else 'None'}")
-        if csv_data is not None and not csv_data.empty:
-            # Find user by email in CSV
-            user_row = csv_data[csv_data['email'] == email]
-            safe_print(f"🔍 DEBUG: User search result - found: {not user_row.empty}")
-
-            if not user_row.empty:
-                user = user_row.iloc[0]
-                stored_password = str(user.get('password', ''))
-                safe_print(f"🔑 DEBUG: Stored password type: {'bcrypt' if stored_password.startswith('$2') else 'plain'}, length: {len(stored_password)}")
-
-                # Check if password is bcrypt hashed or plain text
-                password_valid = False
-                if stored_password.startswith('$2b$') or stored_password.startswith('$2a$'):
-                    # Bcrypt hashed password
-                    try:
-                        password_valid = bcrypt.checkpw(password.encode('utf-8'), stored_password.encode('utf-8'))
-                        safe_print(f"✓ DEBUG: Bcrypt validation result: {password_valid}")
-                    except Exception as bcrypt_err:
-                        password_valid = False
-                        safe_print(f"❌ DEBUG: Bcrypt error: {bcrypt_err}")
-                else:
-                    # Plain text password (for backward compatibility)
-                    password_valid = (password == stored_password)
-                    safe_print(f"✓ DEBUG: Plain text validation result: {password_valid}")
-
-                if password_valid:
-                    # Prepare user data response (handle NaN values)
-                    import math
-                    def safe_str(val):
-                        if pd.isna(val) or (isinstance(val, float) and math.isnan(val)):
-                            return ''
-                        return str(val)
-
-                    user_data = {
-                        'id': safe_str(user.get('id', '')),
-                        'email': safe_str(user.get('email', '')),
-                        'role': safe_str(user.get('role', 'user')),
-                        'name': safe_str(user.get('name', '')),
-                        'direktorat': safe_str(user.get('direktorat', '')),
-                        'subdirektorat': safe_str(user.get('subdirektorat', '')),
-                        'divisi': safe_str(user.get('divisi', '')),
-                        'is_active': True,
-                        'createdAt': safe_str(user.get('created_at', ''))
-                    }
-                    safe_print(f"✅ User logged in from CSV: {email} (Role: {user_data['role']})")
-                    return jsonify(user_data), 200
-
-        # 2. If not found in CSV, try SQLite database (fallback)
-        try:
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-
-                # Find user by email
-                cursor.execute("""
-                    SELECT id, email, password_hash, role, name, direktorat, subdirektorat, divisi, is_active
-                    FROM users
-                    WHERE email = ? AND is_active = 1
-                """, (email,))
-
-                user = cursor.fetchone()
-
-                if user:
-                    user_id, user_email, password_hash, role, name, direktorat, subdirektorat, divisi, is_active = user
-
-                    # Verify password with bcrypt
-                    if bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8')):
-                        # Prepare user data response
-                        user_data = {
-                            'id': str(user_id),
-                            'email': user_email,
-                            'role': role,
-                            'name': name or '',
-                            'direktorat': direktorat or '',
-                            'subdirektorat': subdirektorat or '',
-                            'divisi': divisi or '',
-                            'is_active': bool(is_active),
-                            'createdAt': ''
-                        }
-                        safe_print(f"✅ User logged in from SQLite: {user_email} (Role: {role})")
-                        return jsonify(user_data), 200
-        except Exception as db_error:
-            safe_print(f"⚠️ SQLite login failed: {db_error}")
+        # CSV accounts (primary storage) come first, then SQLite (fallback)
+        candidates = user_directory.find(email)
+        safe_print(f"🔍 DEBUG: User search result - found: {len(candidates)} account(s)")
+        for candidate in candidates:
+            stored_password = candidate['password']
+            user = candidate['record']
+            safe_print(f"🔑 DEBUG: Stored password type: {'bcrypt' if is_bcrypt_hash(stored_password) else 'plain'}, length: {len(stored_password)}")
+
+            # bcrypt runs on the bounded hash pool; plain text is kept for backward compatibility
+            password_valid, needs_rehash = password_hasher.verify(password, stored_password)
+            safe_print(f"✓ DEBUG: Password validation result: {password_valid}")
+            if not password_valid:
+                continue
+
+            # Upgrade plain text / low-cost hashes without delaying the response
+            if needs_rehash:
+                password_hasher.rehash_in_background(
+                    password, lambda new_hash, c=candidate: user_directory.update_password(c, new_hash))
+
+            if candidate['source'] == 'csv':
+                # Prepare user data response (handle NaN values)
+                user_data = {
+                    'id': safe_str(user.get('id', '')),
+                    'email': safe_str(user.get('email', '')),
+                    'role': safe_str(user.get('role', 'user')),
+                    'name': safe_str(user.get('name', '')),
+                    'direktorat': safe_str(user.get('direktorat', '')),
+                    'subdirektorat': safe_str(user.get('subdirektorat', '')),
+                    'divisi': safe_str(user.get('divisi', '')),
+                    'is_active': True,
+                    'createdAt': safe_str(user.get('created_at', ''))
+                }
+            else:
+                user_data = {
+                    'id': str(user['id']),
+                    'email': user['email'],
+                    'role': user['role'],
+                    'name': user['name'] or '',
+                    'direktorat': user['direktorat'] or '',
+                    'subdirektorat': user['subdirektorat'] or '',
+                    'divisi': user['divisi'] or '',
+                    'is_active': bool(user['is_active']),
+                    'createdAt': ''
+                }
+            user_data.update(issue_token(user_data))
+            safe_print(f"✅ User logged in from {candidate['source'].upper()}: {email} (Role: {user_data['role']})")
+            return jsonify(user_data), 200
 
         # 3. User not found or password invalid
         safe_print(f"❌ Login failed for: {email}")
         return jsonify({'error': 'Invalid email or password'}), 401
 
+    except HashPoolBusy as e:
+        safe_print(f"⚠️ Login deferred, {e}")
+        response = jsonify({'error': 'Server is busy, please try again'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
     except Exception as e:
         safe_print(f"❌ Error during login: {e}")
         import traceback
         traceback.print_exc()
         return jsonify({'error': f'Login failed: {str(e)}'}), 500
 
+@app.route('/api/session', methods=['GET'])
+@require_session()
+def get_session():
+    """Return the claims of the caller's session token"""
+    return jsonify(g.session), 200
+
+@app.route('/api/metrics/password-hashing', methods=['GET'])
+def get_password_hashing_metrics():
+    """Latency and queue metrics of the bcrypt worker pool"""
+    return jsonify(password_hasher.get_metrics()), 200
+
+@app.route('/api/logout', methods=['POST'])
+def logout_user():
+    """Revoke the caller's session token"""
+    revoked = revoke_token(get_request_token())
+    return jsonify({'success': True, 'revoked': revoked}), 200
+
 @app.route('/api/users/<string:user_id>', methods=['GET'])
 def get_user_by_id(user_id):
     """Get a specific user by ID from storage"""
@@ -2823,6 +2770,7 @@ def get_user_by_id(user_id):
         return jsonify({'error': f'Failed to get user: {str(e)}'}), 500
 
 @app.route('/api/users', methods=['POST'])
+@storage_service.transaction('config/users.csv')
 def create_user():
     """Create a new user and save to CSV file (primary storage)"""
     try:
@@ -2881,11 +2829,13 @@ def create_user():
         success = storage_service.write_csv(csv_data, 'config/users.csv')
 
         if success:
+            user_directory.invalidate()
             safe_print(f"✅ Created user in CSV: {new_user['email']} (ID: {user_id}, Year: {year or 'N/A'})")
 
             # Return user data without password
             response_data = new_user.copy()
             response_data.pop('password', None)
+            change_log.record_change('users', user_id, 'insert', response_data)
             return jsonify(response_data), 201
         else:
             return jsonify({'error': 'Failed to save user'}), 500
@@ -2897,6 +2847,7 @@ def create_user():
         return jsonify({'error': f'Failed to create user: {str(e)}'}), 500
 
 @app.route('/api/users/<int:user_id>', methods=['DELETE'])
+@storage_service.transaction('config/users.csv')
 def delete_user(user_id):
     """Delete a user from CSV file and SQLite database"""
     from database import get_db_connection
@@ -2929,6 +2880,8 @@ def delete_user(user_id):
         except Exception as db_error:
             safe_print(f"Warning: Could not delete from SQLite: {db_error}")
 
+        user_directory.invalidate()
+        change_log.record_change('users', user_id, 'delete')
         return jsonify({'message': 'User deleted successfully'}), 200
 
     except Exception as e:
@@ -2938,6 +2891,7 @@ def delete_user(user_id):
         return jsonify({'error': f'Failed to delete user: {str(e)}'}), 500
 
 @app.route('/api/users/<int:user_id>', methods=['PUT'])
+@storage_service.transaction('config/users.csv')
 def update_user(user_id):
     """Update user in CSV file and SQLite database"""
     from database import get_db_connection
@@ -2961,14 +2915,14 @@ def update_user(user_id):
             csv_data.at[user_index, 'name'] = data['name']
         if 'email' in data:
             csv_data.at[user_index, 'email'] = data['email']
-        if 'password' in data:
-            # Hash password for CSV storage
-            try:
-                import bcrypt
-                password_hash = bcrypt.hashpw(data['password'].encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-                csv_data.at[user_index, 'password'] = password_hash
-            except:
-                csv_data.at[user_index, 'password'] = data['password']
+        password_hash = None
+        new_password = data.get('password')
+        stored_password = csv_data.at[user_index, 'password'] if 'password' in csv_data.columns else None
+        # Blank, unchanged or already hashed values (a form echoing the stored hash) keep the password
+        if new_password and new_password != stored_password and not is_bcrypt_hash(new_password):
+            # Hash password for CSV storage (same hash is reused for SQLite below)
+            password_hash = password_hasher.hash(new_password)
+            csv_data.at[user_index, 'password'] = password_hash
         if 'role' in data:
             csv_data.at[user_index, 'role'] = data['role']
         if 'direktorat' in data:
@@ -3020,10 +2974,7 @@ def update_user(user_id):
                     if 'email' in data:
                         update_fields.append('email = ?')
                         update_values.append(data['email'])
-                    if 'password' in data:
-                        # Hash password for SQLite
-                        import bcrypt
-                        password_hash = bcrypt.hashpw(data['password'].encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+                    if password_hash:
                         update_fields.append('password_hash = ?')
                         update_values.append(password_hash)
                     if 'role' in data:
@@ -3056,8 +3007,15 @@ def update_user(user_id):
         except Exception as db_error:
             safe_print(f"⚠️ Warning: Could not update in SQLite (user may not exist in DB): {db_error}")
 
+        user_directory.invalidate()
+        change_log.record_change('users', user_id, 'update', updated_user)
         return jsonify(updated_user), 200
 
+    except HashPoolBusy as e:
+        safe_print(f"⚠️ User update deferred, {e}")
+        response = jsonify({'error': 'Server is busy, please try again'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
     except Exception as e:
         safe_print(f"❌ Error updating user: {e}")
         import traceback
@@ -3167,6 +3125,7 @@ def upload_gcg_file():
                 f.write(file_data)
 
             safe_print(f"🔧 DEBUG: File saved successfully to local storage: {local_file_path}")
+            content_indexer.submit(file_path)  # Text extraction runs in the background
 
         except Exception as upload_error:
             safe_print(f"🔧 DEBUG: Local upload exception: {upload_error}")
@@ -3223,8 +3182,8 @@ def upload_gcg_file():
                 cursor.execute("""
                     INSERT INTO uploaded_files (
                         id, file_name, file_size, upload_date, year,
-                        checklist_id, checklist_description, aspect, status, file_path
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        checklist_id, checklist_description, aspect, status, file_path, catatan
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """, (
                     file_id,
                     file.filename,
@@ -3235,7 +3194,8 @@ def upload_gcg_file():
                     checklist_description,
                     aspect,
                     'uploaded',
-                    file_path
+                    file_path,
+                    catatan
                 ))
 
                 conn.commit()
@@ -3249,18 +3209,23 @@ def upload_gcg_file():
 
         # Also save to Excel file for backward compatibility (legacy support)
         try:
-            files_data = storage_service.read_excel('uploaded-files.xlsx')
-            if files_data is None:
-                files_data = pd.DataFrame()
-
-            # Remove existing record
-            if not files_data.empty:
-                files_data = files_data[~((files_data['checklistId'] == checklist_id_int) & (files_data['year'] == year_int))]
-
-            new_row = pd.DataFrame([file_record])
-            files_data = pd.concat([files_data, new_row], ignore_index=True)
-            storage_service.write_excel(files_data, 'uploaded-files.xlsx')
+            # Lock only the read-modify-write, not the body parsing and file save above
+            with storage_service.transaction('uploaded-files.xlsx'):
+                files_data = storage_service.read_excel('uploaded-files.xlsx', years=[year_int])
+                if files_data is None:
+                    files_data = pd.DataFrame()
+
+                # Remove existing record
+                if not files_data.empty:
+                    files_data = files_data[~((files_data['checklistId'] == checklist_id_int) & (files_data['year'] == year_int))]
+
+                new_row = pd.DataFrame([file_record])
+                files_data = pd.concat([files_data, new_row], ignore_index=True)
+                storage_service.write_excel(files_data, 'uploaded-files.xlsx', years=[year_int])
             safe_print(f"🔧 DEBUG: Also saved to Excel for backward compatibility")
+        except StorageLockTimeout:
+            # /api/uploaded-files reads this file, so a record that could not be written is not "uploaded"
+            raise
         except Exception as excel_error:
             # Non-critical - Excel is just backup
             safe_print(f"🔧 WARNING: Could not save to Excel (non-critical): {excel_error}")
@@ -3271,6 +3236,9 @@ def upload_gcg_file():
             'message': 'File uploaded successfully to local storage'
         }), 201
         
+    except StorageLockTimeout:
+        # Handled by the 503 error handler
+        raise
     except Exception as e:
         safe_print(f"🔧 DEBUG: Exception in upload_gcg_file: {e}")
         import traceback
@@ -3370,6 +3338,7 @@ def upload_random_document():
                 f.write(file_data)
 
             safe_print(f"✅ DEBUG: File saved successfully: {local_file_path}")
+            content_indexer.submit(file_path)  # Text extraction runs in the background
 
         except Exception as upload_error:
             safe_print(f"❌ DEBUG: Upload error: {upload_error}")
@@ -3393,20 +3362,21 @@ def upload_random_document():
             'catatan': f'Uploaded to Dokumen Lainnya folder on {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}'
         }
 
-        # Add to uploaded files database
+        # Add to uploaded files database; lock only the read-modify-write, not the upload itself
         try:
-            files_data = storage_service.read_excel('uploaded-files.xlsx')
-            if files_data is None:
-                files_data = pd.DataFrame()
-        except Exception:
-            files_data = pd.DataFrame()
+            with storage_service.transaction('uploaded-files.xlsx'):
+                try:
+                    files_data = storage_service.read_excel('uploaded-files.xlsx', years=[year_int])
+                    if files_data is None:
+                        files_data = pd.DataFrame()
+                except Exception:
+                    files_data = pd.DataFrame()
 
-        new_row = pd.DataFrame([file_record])
-        files_data = pd.concat([files_data, new_row], ignore_index=True)
+                new_row = pd.DataFrame([file_record])
+                files_data = pd.concat([files_data, new_row], ignore_index=True)
 
-        # Save to storage
-        try:
-            success = storage_service.write_excel(files_data, 'uploaded-files.xlsx')
+                # Save to storage
+                success = storage_service.write_excel(files_data, 'uploaded-files.xlsx', years=[year_int])
 
             if success:
                 return jsonify({
@@ -3416,10 +3386,15 @@ def upload_random_document():
                 }), 201
             else:
                 return jsonify({'error': 'File uploaded but failed to save record'}), 500
+        except StorageLockTimeout:
+            raise
         except Exception as save_error:
             safe_print(f"❌ DEBUG: Save error: {save_error}")
             return jsonify({'error': f'Failed to save record: {str(save_error)}'}), 500
 
+    except StorageLockTimeout:
+        # Handled by the 503 error handler
+        raise
     except Exception as e:
         safe_print(f"❌ DEBUG: Exception in upload_random_document: {e}")
         import traceback
@@ -3434,7 +3409,7 @@ def get_random_documents(year):
 
         # Load uploaded files data
         try:
-            files_data = storage_service.read_excel('uploaded-files.xlsx')
+            files_data = storage_service.read_excel('uploaded-files.xlsx', years=[year])
             if files_data is None or files_data.empty:
                 safe_print(f"⚠️ DEBUG: No uploaded files found")
                 return jsonify({'documents': []}), 200
@@ -3529,7 +3504,8 @@ def check_gcg_files():
                     uf.status,
                     u.name as uploaded_by,
                     u.subdirektorat,
-                    uf.file_path
+                    uf.file_path,
+                    uf.catatan
                 FROM uploaded_files uf
                 LEFT JOIN users u ON uf.id LIKE '%' || u.email || '%'
                 WHERE uf.year = ?
@@ -3557,6 +3533,7 @@ def check_gcg_files():
                     'uploadedBy': row[8] or 'Unknown',
                     'subdirektorat': row[9] or '',
                     'filePath': row[10] or '',  # Actual stored file path
+                    'catatan': row[11] or '',
                 }
 
             # Build response for each checklist_id
@@ -3600,7 +3577,7 @@ def check_gcg_files():
                         'aspect': file_info['aspect'],
                         'checklistDescription': file_info['checklistDescription'],
                         'checklistId': checklist_id,
-                        'catatan': '',  # TODO: Add catatan field to uploaded_files table
+                        'catatan': file_info['catatan'],
                         'id': file_info['id'],
                         'verified': verify_files  # Flag to show if filesystem was checked
                     }
@@ -3715,6 +3692,7 @@ def download_gcg_file():
 # ========================
 
 @app.route('/api/config/aspects', methods=['GET'])
+@conditional_get(entity_version('aspects'))
 def get_aspects():
     """Get all aspects, optionally filtered by year"""
     try:
@@ -3751,6 +3729,7 @@ def get_aspects():
         return jsonify({'aspects': []}), 200
 
 @app.route('/api/config/aspects', methods=['POST'])
+@storage_service.transaction('config/aspects.csv')
 def add_aspect():
     """Add a new aspect for a specific year"""
     try:
@@ -3759,9 +3738,9 @@ def add_aspect():
         if not data.get('nama') or not data.get('tahun'):
             return jsonify({'error': 'Name and year are required'}), 400
             
-        # Read existing aspects
+        # Read existing aspects of that year (only its partition is rewritten)
         try:
-            aspects_data = storage_service.read_csv('config/aspects.csv')
+            aspects_data = storage_service.read_csv('config/aspects.csv', years=[int(data['tahun'])])
             if aspects_data is None:
                 aspects_data = pd.DataFrame()
         except:
@@ -3780,7 +3759,7 @@ def add_aspect():
         aspects_data = pd.concat([aspects_data, new_row], ignore_index=True)
         
         # Save to storage (CSV for easier reading)
-        success = storage_service.write_csv(aspects_data, 'config/aspects.csv')
+        success = storage_service.write_csv(aspects_data, 'config/aspects.csv', years=[new_aspect['tahun']])
         
         if success:
             return jsonify({'success': True, 'aspect': new_aspect}), 201
@@ -3792,6 +3771,7 @@ def add_aspect():
         return jsonify({'error': f'Failed to add aspect: {str(e)}'}), 500
 
 @app.route('/api/config/aspects/<int:aspect_id>', methods=['PUT'])
+@storage_service.transaction('config/aspects.csv')
 def update_aspect(aspect_id):
     """Update an existing aspect"""
     try:
@@ -3830,6 +3810,7 @@ def update_aspect(aspect_id):
         return jsonify({'error': f'Failed to update aspect: {str(e)}'}), 500
 
 @app.route('/api/config/aspects/<int:aspect_id>', methods=['DELETE'])
+@storage_service.transaction('config/aspects.csv')
 def delete_aspect(aspect_id):
     """Delete an aspect"""
     try:
@@ -3854,57 +3835,70 @@ def delete_aspect(aspect_id):
         return jsonify({'error': f'Failed to delete aspect: {str(e)}'}), 500
 
 # CHECKLIST ENDPOINTS
+CHECKLIST_FIELDS = ['id', 'aspek', 'deskripsi', 'tahun', 'created_at', 'is_active', 'rowNumber', 'pic']
+
+
 @app.route('/api/config/checklist', methods=['GET'])
+@conditional_get(entity_version('checklist', change_log.ASSIGNMENTS_ENTITY))
 def get_checklist():
-    """Get all checklist items with PIC assignments, optionally filtered by year"""
+    """Get checklist items with PIC assignments, optionally filtered by year/aspek/pic (paginated)"""
     from database import get_db_connection
     try:
+        try:
+            page = parse_page_args(request.args, CHECKLIST_FIELDS)
+        except PaginationError as e:
+            return jsonify({'error': str(e)}), 400
+
+        conditions, params = ['c.is_active = 1'], []
+
+        # Filter by year if provided
+        year = request.args.get('year')
+        if year:
+            try:
+                year_int = int(year)
+            except ValueError:
+                safe_print(f"WARNING: Invalid year parameter: {year}")
+                return jsonify({'checklist': [], 'nextCursor': None}), 200
+            conditions.append('c.tahun = ?')
+            params.append(year_int)
+            safe_print(f"DEBUG: Fetching checklist for year {year_int}")
+        aspek = request.args.get('aspek')
+        if aspek:
+            conditions.append('c.aspek = ?')
+            params.append(aspek)
+        pic = request.args.get('pic')
+        if pic:
+            conditions.append('a.subdirektorat = ?')
+            params.append(pic)
+
+        # All years: newest year first; a single year is just ordered by id
+        if page.key is not None:
+            keyset, keyset_params = keyset_condition(['c.tahun', 'c.id'], page.key, descending=['c.tahun'])
+            conditions.append(keyset)
+            params.extend(keyset_params)
+
         with get_db_connection() as conn:
             cursor = conn.cursor()
-
-            # Filter by year if provided
-            year = request.args.get('year')
-            if year:
-                try:
-                    year_int = int(year)
-                    cursor.execute("""
-                        SELECT
-                            c.id,
-                            c.aspek,
-                            c.deskripsi,
-                            c.tahun,
-                            c.created_at,
-                            c.is_active,
-                            a.subdirektorat
-                        FROM checklist_gcg c
-                        LEFT JOIN checklist_assignments a ON c.id = a.checklist_id AND c.tahun = a.tahun
-                        WHERE c.tahun = ? AND c.is_active = 1
-                        ORDER BY c.id
-                    """, (year_int,))
-                    safe_print(f"DEBUG: Fetching checklist for year {year_int}")
-                except ValueError:
-                    safe_print(f"WARNING: Invalid year parameter: {year}")
-                    return jsonify({'checklist': []}), 200
-            else:
-                # Return all checklist items if no year specified
-                cursor.execute("""
-                    SELECT
-                        c.id,
-                        c.aspek,
-                        c.deskripsi,
-                        c.tahun,
-                        c.created_at,
-                        c.is_active,
-                        a.subdirektorat
-                    FROM checklist_gcg c
-                    LEFT JOIN checklist_assignments a ON c.id = a.checklist_id AND c.tahun = a.tahun
-                    WHERE c.is_active = 1
-                    ORDER BY c.tahun DESC, c.id
-                """)
+            cursor.execute(f"""
+                SELECT
+                    c.id,
+                    c.aspek,
+                    c.deskripsi,
+                    c.tahun,
+                    c.created_at,
+                    c.is_active,
+                    a.subdirektorat,
+                    c.row_number
+                FROM checklist_gcg c
+                LEFT JOIN checklist_assignments a ON c.id = a.checklist_id AND c.tahun = a.tahun
+                WHERE {' AND '.join(conditions)}
+                ORDER BY c.tahun DESC, c.id
+                LIMIT ?
+            """, params + [page.fetch_limit])
 
             rows = cursor.fetchall()
             checklist_items = []
-            for idx, row in enumerate(rows, 1):
+            for idx, row in enumerate(rows, page.offset + 1):
                 checklist_items.append({
                     'id': row[0],
                     'aspek': row[1] or '',
@@ -3912,12 +3906,15 @@ def get_checklist():
                     'tahun': row[3],
                     'created_at': row[4],
                     'is_active': row[5],
-                    'rowNumber': idx,
+                    'rowNumber': row[7] or idx,
                     'pic': row[6] or ''  # PIC from checklist_assignments table
                 })
 
+            checklist_items, next_cursor = finish_page(checklist_items, page,
+                                                       lambda item: [item['tahun'], item['id']])
             safe_print(f"DEBUG: Returning {len(checklist_items)} checklist items with PIC assignments")
-            return jsonify({'checklist': checklist_items}), 200
+            response = jsonify({'checklist': checklist_items, 'nextCursor': next_cursor})
+            return with_cursor_header(response, next_cursor), 200
 
     except Exception as e:
         safe_print(f"Error getting checklist: {e}")
@@ -3978,6 +3975,7 @@ def add_checklist():
         return jsonify({'error': f'Failed to add checklist: {str(e)}'}), 500
 
 @app.route('/api/config/checklist/<int:checklist_id>', methods=['PUT'])
+@storage_service.transaction('uploaded-files.xlsx')
 def update_checklist(checklist_id):
     """Update an existing checklist item in SQLite and transfer files if PIC changes"""
     from database import get_db_connection
@@ -4188,6 +4186,7 @@ def update_checklist(checklist_id):
         return jsonify({'error': f'Failed to update checklist: {str(e)}'}), 500
 
 @app.route('/api/config/checklist/<int:checklist_id>', methods=['DELETE'])
+@storage_service.transaction('config/checklist.csv')
 def delete_checklist(checklist_id):
     """Delete a checklist item"""
     try:
@@ -4258,6 +4257,7 @@ def check_files_exist(checklist_id):
         return jsonify({'hasFiles': False}), 200
 
 @app.route('/api/config/checklist/clear', methods=['DELETE'])
+@storage_service.transaction('config/checklist.csv')
 def clear_checklist():
     """Clear all checklist data"""
     try:
@@ -4275,6 +4275,7 @@ def clear_checklist():
         return jsonify({'error': f'Failed to clear checklist: {str(e)}'}), 500
 
 @app.route('/api/config/checklist/fix-ids', methods=['POST'])
+@storage_service.transaction('config/checklist.csv')
 def fix_checklist_ids():
     """Temporary endpoint to fix checklist IDs to proper year+row format"""
     try:
@@ -4309,9 +4310,108 @@ def fix_checklist_ids():
         safe_print(f"Error fixing checklist IDs: {e}")
         return jsonify({'error': f'Failed to fix checklist IDs: {str(e)}'}), 500
 
+# Columns written by batch checklist imports; re-importing a (tahun, row_number) updates that item in place
+CHECKLIST_BATCH_COLUMNS = ['aspek', 'deskripsi', 'tahun', 'row_number', 'is_active', 'created_at']
+CHECKLIST_BATCH_UPSERT = ("ON CONFLICT(tahun, row_number) DO UPDATE SET aspek = excluded.aspek, "
+                          "deskripsi = excluded.deskripsi, is_active = 1")
+
+
+def _validate_checklist_batch(cursor, items):
+    """Check batch items against the database in one pass
+
+    Returns (accepted, report): accepted pairs each valid item's report entry
+    with its row, report has one {index, id, status} entry per item, where
+    status is 'inserted', 'updated' or 'error' (with an 'error' message).
+    Items are keyed on (tahun, rowNumber); the id is filled in by the save.
+    Call inside the write transaction so nothing changes before the upsert.
+    """
+    known_years = {row[0] for row in cursor.execute("SELECT year FROM years")}
+    now = datetime.now().isoformat()
+
+    accepted, report, seen = [], [], {}
+    for index, item in enumerate(items):
+        entry = {'index': index, 'id': None, 'status': 'error'}
+        report.append(entry)
+        try:
+            year = int(item.get('tahun'))
+            row_number = int(item.get('rowNumber'))
+        except (TypeError, ValueError):
+            entry['error'] = 'tahun and rowNumber must be integers'
+            continue
+        if row_number < 1:
+            entry['error'] = 'rowNumber must be 1 or more'
+            continue
+        deskripsi = str(item.get('deskripsi') or '').strip()
+        if not deskripsi:
+            entry['error'] = 'deskripsi is required'
+            continue
+        if year not in known_years:
+            entry['error'] = f'Year {year} is not registered'
+            continue
+        if (year, row_number) in seen:
+            entry['error'] = f'Duplicate of item {seen[(year, row_number)]} in this batch'
+            continue
+        seen[(year, row_number)] = index
+        accepted.append((entry, {
+            'id': None,
+            'aspek': str(item.get('aspek') or ''),
+            'deskripsi': deskripsi,
+            'pic': str(item.get('pic') or ''),
+            'tahun': year,
+            'rowNumber': row_number,
+            'created_at': now
+        }))
+
+    # One lookup for the batch's years, instead of one per row
+    existing = _checklist_ids_by_row(cursor, {row['tahun'] for _, row in accepted})
+    for entry, row in accepted:
+        entry['status'] = 'updated' if (row['tahun'], row['rowNumber']) in existing else 'inserted'
+    return accepted, report
+
+
+def _checklist_ids_by_row(cursor, years):
+    """(tahun, row_number) -> id for the given years"""
+    return {(row[1], row[2]): row[0] for row in cursor.execute(
+        "SELECT id, tahun, row_number FROM checklist_gcg WHERE tahun IN (SELECT value FROM json_each(?))",
+        (json.dumps(sorted(years)),)
+    )}
+
+
+def _save_checklist_batch(cursor, accepted) -> bool:
+    """Upsert validated rows with one executemany, then rewrite their years' CSV partitions once"""
+    from database import bulk_insert
+    rows = [row for _, row in accepted]
+    bulk_insert(cursor, 'checklist_gcg', CHECKLIST_BATCH_COLUMNS,
+                [(row['aspek'], row['deskripsi'], row['tahun'], row['rowNumber'], 1, row['created_at'])
+                 for row in rows],
+                upsert=CHECKLIST_BATCH_UPSERT)
+
+    years = sorted({row['tahun'] for row in rows})
+    ids = _checklist_ids_by_row(cursor, years)
+    for entry, row in accepted:
+        entry['id'] = row['id'] = ids[(row['tahun'], row['rowNumber'])]
+
+    batch_df = pd.DataFrame(rows)
+    existing_df = storage_service.read_csv('config/checklist.csv', years=years)
+    if existing_df is not None and not existing_df.empty:
+        # Same natural key as the upsert: an imported row replaces the mirror row it updated
+        existing_keys = pd.MultiIndex.from_arrays([
+            pd.to_numeric(existing_df['tahun'], errors='coerce'),
+            pd.to_numeric(existing_df.get('rowNumber'), errors='coerce')
+        ])
+        replaced = existing_keys.isin(list(zip(batch_df['tahun'], batch_df['rowNumber'])))
+        batch_df = pd.concat([existing_df[~replaced], batch_df], ignore_index=True)
+    return storage_service.write_csv(batch_df, 'config/checklist.csv', years=years)
+
+
 @app.route('/api/config/checklist/batch', methods=['POST'])
+@storage_service.transaction('config/checklist.csv')
 def add_checklist_batch():
-    """Add multiple checklist items in batch to both CSV and SQLite database"""
+    """Add or update checklist items in one SQLite transaction, mirrored to CSV
+
+    Every item gets an entry in the response's report; invalid items are
+    reported and skipped while the rest are saved.
+    """
     from database import get_db_connection
     try:
         data = request.get_json()
@@ -4322,66 +4422,32 @@ def add_checklist_batch():
 
         safe_print(f"📦 Batch adding {len(items)} checklist items")
 
-        # Read existing checklist from CSV
-        existing_data = storage_service.read_csv('config/checklist.csv')
-        if existing_data is not None:
-            checklist_df = existing_data
-        else:
-            checklist_df = pd.DataFrame()
-
-        # Process each item in the batch
-        batch_data = []
-        for item in items:
-            checklist_data = {
-                'id': generate_checklist_id(item.get('tahun'), item.get('rowNumber')),
-                'aspek': str(item.get('aspek', '')),
-                'deskripsi': str(item.get('deskripsi', '')),
-                'pic': str(item.get('pic', '')),
-                'tahun': item.get('tahun'),
-                'rowNumber': item.get('rowNumber'),
-                'created_at': datetime.now().isoformat()
-            }
-            batch_data.append(checklist_data)
-
-        # 1. Save to CSV file
-        new_batch_df = pd.DataFrame(batch_data)
-        updated_df = pd.concat([checklist_df, new_batch_df], ignore_index=True)
-        csv_success = storage_service.write_csv(updated_df, 'config/checklist.csv')
-
-        if not csv_success:
-            return jsonify({'error': 'Failed to save checklist batch to CSV'}), 500
-
-        # 2. Also save to SQLite database
-        try:
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-                db_saved_count = 0
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            # Take the write lock first so validation and upsert see the same data
+            cursor.execute("BEGIN IMMEDIATE")
+            accepted, report = _validate_checklist_batch(cursor, items)
+            rows = [row for _, row in accepted]
+            failed = len(items) - len(rows)
+            if not rows:
+                return jsonify({
+                    'error': 'No valid checklist items in batch',
+                    'failed': failed,
+                    'report': report
+                }), 400
 
-                for item_data in batch_data:
-                    try:
-                        # Insert into checklist_gcg table
-                        cursor.execute("""
-                            INSERT INTO checklist_gcg (aspek, deskripsi, tahun, is_active, created_at)
-                            VALUES (?, ?, ?, ?, ?)
-                        """, (
-                            item_data['aspek'],
-                            item_data['deskripsi'],
-                            item_data['tahun'],
-                            1,  # is_active = True
-                            item_data['created_at']
-                        ))
-                        db_saved_count += 1
-                    except Exception as item_error:
-                        safe_print(f"⚠️ Error saving item to SQLite: {item_error}")
-
-                safe_print(f"✅ Saved {db_saved_count}/{len(batch_data)} items to SQLite database")
-        except Exception as db_error:
-            safe_print(f"⚠️ SQLite batch save error (CSV saved successfully): {db_error}")
+            # A failed CSV write raises out of the block and rolls the SQLite upsert back
+            if not _save_checklist_batch(cursor, accepted):
+                raise RuntimeError('Failed to save checklist batch to CSV')
 
+        safe_print(f"✅ Saved {len(rows)}/{len(items)} checklist items ({failed} rejected)")
         return jsonify({
             'success': True,
-            'message': f'Successfully added {len(batch_data)} checklist items',
-            'items': batch_data
+            'message': f'Successfully saved {len(rows)} checklist items',
+            'saved': len(rows),
+            'failed': failed,
+            'items': rows,
+            'report': report
         }), 201
 
     except Exception as e:
@@ -4391,8 +4457,10 @@ def add_checklist_batch():
         return jsonify({'error': f'Failed to add checklist batch: {str(e)}'}), 500
 
 @app.route('/api/config/checklist/migrate-year', methods=['POST'])
+@storage_service.transaction('config/checklist.csv')
 def migrate_checklist_year():
     """Emergency endpoint to migrate checklist data from one year to another"""
+    from database import get_db_connection
     try:
         data = request.get_json()
         from_year = data.get('from_year')
@@ -4401,8 +4469,8 @@ def migrate_checklist_year():
         if not from_year or not to_year:
             return jsonify({'error': 'Both from_year and to_year are required'}), 400
         
-        # Read existing checklist
-        csv_data = storage_service.read_csv('config/checklist.csv')
+        # Read the source and target years' partitions only
+        csv_data = storage_service.read_csv('config/checklist.csv', years=[from_year, to_year])
         if csv_data is None:
             return jsonify({'error': 'No checklist data found'}), 404
         
@@ -4419,40 +4487,31 @@ def migrate_checklist_year():
                 'existing_items': len(target_items)
             }), 409
         
-        # Create migrated data with new year and IDs
-        migrated_items = []
-        for index, item in source_items.iterrows():
-            # Generate new ID for target year
-            new_id = generate_checklist_id(to_year, item.get('rowNumber'))
-            
-            migrated_item = {
-                'id': new_id,
-                'aspek': item.get('aspek', ''),
-                'deskripsi': item.get('deskripsi', ''),
-                'tahun': to_year,
-                'rowNumber': item.get('rowNumber'),
-                'pic': item.get('pic', ''),
-                'created_at': datetime.now().isoformat()
-            }
-            migrated_items.append(migrated_item)
-        
-        # Add migrated items to existing data
-        migrated_df = pd.DataFrame(migrated_items)
-        updated_df = pd.concat([csv_data, migrated_df], ignore_index=True)
+        # Same items (and row numbers) under the target year
+        migrated_df = source_items.reindex(columns=['aspek', 'deskripsi', 'pic', 'rowNumber']).assign(tahun=to_year)
+        migrated_items = migrated_df.astype(object).where(migrated_df.notna(), None).to_dict('records')
         
-        # Save to storage
-        success = storage_service.write_csv(updated_df, 'config/checklist.csv')
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            accepted, report = _validate_checklist_batch(cursor, migrated_items)
+            if len(accepted) < len(migrated_items):
+                return jsonify({
+                    'error': 'Migration aborted: some items cannot be migrated',
+                    'report': [entry for entry in report if entry['status'] == 'error']
+                }), 400
+            
+            # Save to SQLite and the target year's partition together
+            if not _save_checklist_batch(cursor, accepted):
+                raise RuntimeError('Failed to save migrated data to storage')
         
-        if success:
-            return jsonify({
-                'success': True,
-                'message': f'Successfully migrated {len(migrated_items)} items from year {from_year} to {to_year}',
-                'migrated_count': len(migrated_items),
-                'from_year': from_year,
-                'to_year': to_year
-            }), 200
-        else:
-            return jsonify({'error': 'Failed to save migrated data to storage'}), 500
+        return jsonify({
+            'success': True,
+            'message': f'Successfully migrated {len(accepted)} items from year {from_year} to {to_year}',
+            'migrated_count': len(accepted),
+            'from_year': from_year,
+            'to_year': to_year
+        }), 200
             
     except Exception as e:
         safe_print(f"Error migrating checklist year: {e}")
@@ -4471,77 +4530,125 @@ except ImportError as e:
 
 
 # EXCEL EXPORT ENDPOINTS
+# Exports run as background jobs; an export whose data is unchanged is served from the cached file
 from excel_exporter import ExcelExporter
+from csv_export import stream_export
 exporter = ExcelExporter()
 
-@app.route('/api/export/users', methods=['GET'])
-def export_users_route():
-    """Export users to Excel"""
+def _export_job_payload(job):
+    """Public fields of an export job"""
+    return {key: job[key] for key in ('id', 'export_type', 'year', 'status', 'cached', 'file_name',
+                                      'error', 'created_at', 'finished_at')}
+
+def _export_file_response(job):
+    """Send a finished export job's file, or its error"""
+    if job['status'] != 'done':
+        if job['not_found']:
+            # Handle data not found errors with 404
+            safe_print(f"Data not found: {job['error']}")
+            return jsonify({'error': job['error']}), 404
+        return jsonify({'error': f"Failed to export: {job['error']}"}), 500
+    return send_file(job['file_path'], as_attachment=True, download_name=job['file_name'])
+
+def _send_export(export_type, label):
+    """Run (or reuse) an export and wait (bounded) for its file
+
+    An export still running after EXPORT_WAIT_SECONDS is answered with 202 and
+    the job to poll at /api/export/jobs/<id>.
+
+    format=csv (one sheet, picked with sheet=) or format=zip (every sheet as CSV)
+    streams the rows straight from SQLite instead of building a workbook.
+    """
     try:
-        filepath = exporter.export_users()
-        return send_file(filepath, as_attachment=True, download_name=os.path.basename(filepath))
+        year = request.args.get('year', type=int)
+        export_format = request.args.get('format', 'xlsx').lower()
+        if export_format != 'xlsx':
+            if export_type == 'users':
+                year = None
+            elif not year and export_type in export_jobs.CURRENT_YEAR_TYPES:
+                year = datetime.now().year
+            filename_base = export_type if not year else f"{export_type}_{year}"
+            try:
+                return stream_export(exporter.export_queries(export_type, year), filename_base,
+                                     export_format, request.args.get('sheet'))
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        job = export_queue.submit(export_type, year=year)
+        job = export_queue.wait(job['id'], timeout=export_jobs.EXPORT_WAIT_SECONDS)
+        if job['status'] in ('queued', 'running'):
+            return jsonify({'success': True, 'job': _export_job_payload(job)}), 202
+        return _export_file_response(job)
     except Exception as e:
-        safe_print(f"Error exporting users: {e}")
+        safe_print(f"Error exporting {label}: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/export/users', methods=['GET'])
+def export_users_route():
+    """Export users to Excel"""
+    return _send_export('users', 'users')
+
 @app.route('/api/export/checklist', methods=['GET'])
 def export_checklist_route():
     """Export GCG checklist to Excel"""
-    try:
-        year = request.args.get('year', type=int)
-        filepath = exporter.export_checklist_gcg(year=year)
-        return send_file(filepath, as_attachment=True, download_name=os.path.basename(filepath))
-    except Exception as e:
-        safe_print(f"Error exporting checklist: {e}")
-        return jsonify({'error': str(e)}), 500
+    return _send_export('checklist', 'checklist')
 
 @app.route('/api/export/documents', methods=['GET'])
 def export_documents_route():
     """Export documents to Excel"""
-    try:
-        year = request.args.get('year', type=int)
-        filepath = exporter.export_documents(year=year)
-        return send_file(filepath, as_attachment=True, download_name=os.path.basename(filepath))
-    except Exception as e:
-        safe_print(f"Error exporting documents: {e}")
-        return jsonify({'error': str(e)}), 500
+    return _send_export('documents', 'documents')
 
 @app.route('/api/export/org-structure', methods=['GET'])
 def export_org_structure_route():
     """Export organizational structure to Excel"""
-    try:
-        year = request.args.get('year', type=int)
-        filepath = exporter.export_organizational_structure(year=year)
-        return send_file(filepath, as_attachment=True, download_name=os.path.basename(filepath))
-    except ValueError as e:
-        # Handle data not found errors with 404
-        safe_print(f"Data not found: {e}")
-        return jsonify({'error': str(e)}), 404
-    except Exception as e:
-        safe_print(f"Error exporting org structure: {e}")
-        return jsonify({'error': f'Failed to export: {str(e)}'}), 500
+    return _send_export('org_structure', 'org structure')
 
 @app.route('/api/export/gcg-assessment', methods=['GET'])
 def export_gcg_assessment_route():
     """Export GCG assessment to Excel"""
-    try:
-        year = request.args.get('year', type=int)
-        filepath = exporter.export_gcg_assessment(year=year)
-        return send_file(filepath, as_attachment=True, download_name=os.path.basename(filepath))
-    except Exception as e:
-        safe_print(f"Error exporting GCG assessment: {e}")
-        return jsonify({'error': str(e)}), 500
+    return _send_export('gcg_assessment', 'GCG assessment')
 
 @app.route('/api/export/all', methods=['GET'])
 def export_all_route():
     """Export all data to Excel"""
+    return _send_export('all', 'all data')
+
+@app.route('/api/export/jobs', methods=['POST'])
+def create_export_job():
+    """
+    Start an export in the background.
+    Body (or query): type (users, checklist, documents, org-structure, gcg-assessment, all), year.
+    Returns 202 with the job to poll, or 200 when an unchanged export is already available.
+    """
+    data = request.get_json(silent=True) or {}
+    export_type = data.get('type') or request.args.get('type') or ''
+    year = data.get('year', request.args.get('year'))
     try:
-        year = request.args.get('year', type=int)
-        filepath = exporter.export_all_data(year=year)
-        return send_file(filepath, as_attachment=True, download_name=os.path.basename(filepath))
+        year = int(year) if year not in (None, '') else None
+        job = export_queue.submit(export_type, year=year)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
-        safe_print(f"Error exporting all data: {e}")
-        return jsonify({'error': str(e)}), 500
+        safe_print(f"Error starting export job: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+    return jsonify({'success': True, 'job': _export_job_payload(job)}), 200 if job['status'] == 'done' else 202
+
+@app.route('/api/export/jobs/<job_id>', methods=['GET'])
+def get_export_job(job_id):
+    """Status of an export job"""
+    job = export_queue.get(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Export job not found'}), 404
+    return jsonify({'success': True, 'job': _export_job_payload(job)}), 200
+
+@app.route('/api/export/jobs/<job_id>/download', methods=['GET'])
+def download_export_job(job_id):
+    """File of a finished export job (409 while it is still running)"""
+    job = export_queue.get(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Export job not found'}), 404
+    if job['status'] in ('queued', 'running'):
+        return jsonify({'success': False, 'job': _export_job_payload(job)}), 409
+    return _export_file_response(job)
 
 @app.route('/api/export/history', methods=['GET'])
 def export_history_route():
@@ -4613,6 +4720,8 @@ if __name__ == '__main__':
 # The blueprint has proper cleanup logic for year reactivation
 
 @app.route('/api/config/tahun-buku/<int:tahun_id>', methods=['DELETE'])
+@storage_service.transaction(*YEAR_SCOPED_FILES)
+@storage_service.write_behind()
 def delete_tahun_buku(tahun_id):
     """Delete a tahun buku by ID"""
     try:
@@ -4657,20 +4766,20 @@ def delete_tahun_buku(tahun_id):
 
             try:
                 # 1. Clean up checklist data
-                checklist_data = storage_service.read_csv('config/checklist.csv')
+                checklist_data = storage_service.read_csv('config/checklist.csv', years=[year_to_delete])
                 if checklist_data is not None and not checklist_data.empty:
                     original_count = len(checklist_data)
                     checklist_data = checklist_data[checklist_data['tahun'] != year_to_delete]
-                    storage_service.write_csv(checklist_data, 'config/checklist.csv')
+                    storage_service.write_csv(checklist_data, 'config/checklist.csv', years=[year_to_delete])
                     cleanup_stats['checklist'] = original_count - len(checklist_data)
                     safe_print(f"  ✅ Cleaned {cleanup_stats['checklist']} checklist items")
 
                 # 2. Clean up aspects data
-                aspects_data = storage_service.read_csv('config/aspects.csv')
+                aspects_data = storage_service.read_csv('config/aspects.csv', years=[year_to_delete])
                 if aspects_data is not None and not aspects_data.empty:
                     original_count = len(aspects_data)
                     aspects_data = aspects_data[aspects_data['tahun'] != year_to_delete]
-                    storage_service.write_csv(aspects_data, 'config/aspects.csv')
+                    storage_service.write_csv(aspects_data, 'config/aspects.csv', years=[year_to_delete])
                     cleanup_stats['aspects'] = original_count - len(aspects_data)
                     safe_print(f"  ✅ Cleaned {cleanup_stats['aspects']} aspects")
 
@@ -4683,43 +4792,29 @@ def delete_tahun_buku(tahun_id):
                     cleanup_stats['struktur'] = original_count - len(struktur_data)
                     safe_print(f"  ✅ Cleaned {cleanup_stats['struktur']} struktur organisasi items")
 
-                # 4. Clean up AOI tables
-                aoi_tables_data = storage_service.read_csv('config/aoi-tables.csv')
-                if aoi_tables_data is not None and not aoi_tables_data.empty:
-                    original_count = len(aoi_tables_data)
-                    aoi_tables_data = aoi_tables_data[aoi_tables_data['tahun'] != year_to_delete]
-                    storage_service.write_csv(aoi_tables_data, 'config/aoi-tables.csv')
-                    cleanup_stats['aoi_tables'] = original_count - len(aoi_tables_data)
-                    safe_print(f"  ✅ Cleaned {cleanup_stats['aoi_tables']} AOI tables")
-
-                # 5. Clean up AOI recommendations (if they have year field)
-                try:
-                    aoi_recs_data = storage_service.read_csv('config/aoi-recommendations.csv')
-                    if aoi_recs_data is not None and not aoi_recs_data.empty and 'tahun' in aoi_recs_data.columns:
-                        original_count = len(aoi_recs_data)
-                        aoi_recs_data = aoi_recs_data[aoi_recs_data['tahun'] != year_to_delete]
-                        storage_service.write_csv(aoi_recs_data, 'config/aoi-recommendations.csv')
-                        cleanup_stats['aoi_recommendations'] = original_count - len(aoi_recs_data)
-                        safe_print(f"  ✅ Cleaned {cleanup_stats['aoi_recommendations']} AOI recommendations")
-                except Exception as e:
-                    safe_print(f"  ⚠️ AOI recommendations cleanup skipped: {e}")
+                # 4-5. Clean up AOI tables, their recommendations and the year's AOI documents
+                aoi_stats = aoi_store.delete_year(year_to_delete)
+                cleanup_stats.update(aoi_stats)
+                safe_print(f"  ✅ Cleaned {aoi_stats['aoi_tables']} AOI tables, "
+                           f"{aoi_stats['aoi_recommendations']} AOI recommendations, "
+                           f"{aoi_stats['aoi_documents']} AOI document records")
 
                 # 6. Clean up uploaded files tracking
-                uploaded_files_data = storage_service.read_excel('uploaded-files.xlsx')
+                uploaded_files_data = storage_service.read_excel('uploaded-files.xlsx', years=[year_to_delete])
                 if uploaded_files_data is not None and not uploaded_files_data.empty:
                     original_count = len(uploaded_files_data)
                     uploaded_files_data = uploaded_files_data[uploaded_files_data['year'] != year_to_delete]
-                    storage_service.write_excel(uploaded_files_data, 'uploaded-files.xlsx')
+                    storage_service.write_excel(uploaded_files_data, 'uploaded-files.xlsx', years=[year_to_delete])
                     cleanup_stats['uploaded_files'] = original_count - len(uploaded_files_data)
                     safe_print(f"  ✅ Cleaned {cleanup_stats['uploaded_files']} uploaded file records")
 
                 # 7. Clean up checklist assignments
                 try:
-                    assignments_data = storage_service.read_csv('config/checklist-assignments.csv')
+                    assignments_data = storage_service.read_csv('config/checklist-assignments.csv', years=[year_to_delete])
                     if assignments_data is not None and not assignments_data.empty and 'year' in assignments_data.columns:
                         original_count = len(assignments_data)
                         assignments_data = assignments_data[assignments_data['year'] != year_to_delete]
-                        storage_service.write_csv(assignments_data, 'config/checklist-assignments.csv')
+                        storage_service.write_csv(assignments_data, 'config/checklist-assignments.csv', years=[year_to_delete])
                         cleanup_stats['assignments'] = original_count - len(assignments_data)
                         safe_print(f"  ✅ Cleaned {cleanup_stats['assignments']} checklist assignments")
                 except Exception as e:
@@ -4734,18 +4829,6 @@ def delete_tahun_buku(tahun_id):
                     cleanup_stats['users'] = original_count - len(users_data)
                     safe_print(f"  ✅ Cleaned {cleanup_stats['users']} year-specific users")
 
-                # 9. Clean up AOI documents tracking
-                try:
-                    aoi_docs_data = storage_service.read_csv('aoi-documents.csv')
-                    if aoi_docs_data is not None and not aoi_docs_data.empty and 'year' in aoi_docs_data.columns:
-                        original_count = len(aoi_docs_data)
-                        aoi_docs_data = aoi_docs_data[aoi_docs_data['year'] != year_to_delete]
-                        storage_service.write_csv(aoi_docs_data, 'aoi-documents.csv')
-                        cleanup_stats['aoi_documents'] = original_count - len(aoi_docs_data)
-                        safe_print(f"  ✅ Cleaned {cleanup_stats['aoi_documents']} AOI document records")
-                except Exception as e:
-                    safe_print(f"  ⚠️ AOI documents cleanup skipped: {e}")
-
                 # 10. Clean up SQLite database tables
                 safe_print(f"🗄️ Cleaning up SQLite database tables for year {year_to_delete}")
                 try:
@@ -4816,6 +4899,7 @@ def delete_tahun_buku(tahun_id):
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/config/struktur-organisasi', methods=['GET'])
+@conditional_get(entity_version('direktorat', 'subdirektorat', 'divisi', 'anak-perusahaan'))
 def get_struktur_organisasi():
     """Get all struktur organisasi data from SQLite, optionally filtered by year"""
     from database import get_db_connection
@@ -5172,6 +5256,7 @@ def get_assignments():
         return jsonify({'assignments': []}), 200
 
 @app.route('/api/config/assignments', methods=['POST'])
+@storage_service.transaction('config/checklist-assignments.csv')
 def add_assignment():
     """Add or update checklist assignment"""
     try:
@@ -5203,6 +5288,7 @@ def add_assignment():
         success = storage_service.write_csv(updated_df, 'config/checklist-assignments.csv')
         
         if success:
+            change_log.record_change(change_log.ASSIGNMENTS_ENTITY, assignment_data['checklistId'], 'update', assignment_data)
             return jsonify(assignment_data), 201
         else:
             return jsonify({'error': 'Failed to save assignment'}), 500
@@ -5212,6 +5298,7 @@ def add_assignment():
         return jsonify({'error': f'Failed to add assignment: {str(e)}'}), 500
 
 @app.route('/api/config/assignments/<int:checklist_id>', methods=['DELETE'])
+@storage_service.transaction('config/checklist-assignments.csv')
 def delete_assignment(checklist_id):
     """Delete assignment for a checklist item"""
     try:
@@ -5226,6 +5313,7 @@ def delete_assignment(checklist_id):
         success = storage_service.write_csv(assignments_data, 'config/checklist-assignments.csv')
         
         if success:
+            change_log.record_change(change_log.ASSIGNMENTS_ENTITY, checklist_id, 'delete')
             return jsonify({'success': True}), 200
         else:
             return jsonify({'error': 'Failed to delete assignment'}), 500
@@ -5382,6 +5470,8 @@ def preview_bulk_delete(year):
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/bulk-delete/<int:year>', methods=['DELETE'])
+@storage_service.transaction(*YEAR_SCOPED_FILES)
+@storage_service.write_behind()
 def bulk_delete_year_data(year):
     """Delete all data for a specific year"""
     try:
@@ -5403,7 +5493,7 @@ def bulk_delete_year_data(year):
         
         # 1. Delete checklist items for the year
         try:
-            checklist_data = storage_service.read_csv('config/checklist.csv')
+            checklist_data = storage_service.read_csv('config/checklist.csv', years=[year])
             if checklist_data is not None:
                 original_count = len(checklist_data)
                 year_checklist = checklist_data[checklist_data['tahun'] == year]
@@ -5411,7 +5501,7 @@ def bulk_delete_year_data(year):
                 
                 # Keep only items not from this year
                 remaining_checklist = checklist_data[checklist_data['tahun'] != year]
-                success = storage_service.write_csv(remaining_checklist, 'config/checklist.csv')
+                success = storage_service.write_csv(remaining_checklist, 'config/checklist.csv', years=[year])
                 if success:
                     safe_print(f"✅ Deleted {deleted_summary['checklist_items']} checklist items for year {year}")
                 else:
@@ -5421,14 +5511,14 @@ def bulk_delete_year_data(year):
         
         # 2. Delete aspects for the year
         try:
-            aspects_data = storage_service.read_csv('config/aspects.csv')
+            aspects_data = storage_service.read_csv('config/aspects.csv', years=[year])
             if aspects_data is not None:
                 year_aspects = aspects_data[aspects_data['tahun'] == year]
                 deleted_summary['aspects'] = len(year_aspects)
                 
                 # Keep only aspects not from this year
                 remaining_aspects = aspects_data[aspects_data['tahun'] != year]
-                success = storage_service.write_csv(remaining_aspects, 'config/aspects.csv')
+                success = storage_service.write_csv(remaining_aspects, 'config/aspects.csv', years=[year])
                 if success:
                     safe_print(f"✅ Deleted {deleted_summary['aspects']} aspects for year {year}")
         except Exception as e:
@@ -5469,14 +5559,14 @@ def bulk_delete_year_data(year):
         
         # 5. Delete assignments for the year
         try:
-            assignments_data = storage_service.read_csv('config/checklist-assignments.csv')
+            assignments_data = storage_service.read_csv('config/checklist-assignments.csv', years=[year])
             if assignments_data is not None:
                 year_assignments = assignments_data[assignments_data['tahun'] == year]
                 deleted_summary['assignments'] = len(year_assignments)
                 
                 # Keep only assignments not from this year
                 remaining_assignments = assignments_data[assignments_data['tahun'] != year]
-                success = storage_service.write_csv(remaining_assignments, 'config/checklist-assignments.csv')
+                success = storage_service.write_csv(remaining_assignments, 'config/checklist-assignments.csv', years=[year])
                 if success:
                     safe_print(f"✅ Deleted {deleted_summary['assignments']} assignments for year {year}")
         except Exception as e:
@@ -5643,7 +5733,7 @@ def bulk_download_all_documents():
                 safe_print(f"📂 Processing Random documents (DOKUMEN_LAINNYA)...")
 
                 # Load uploaded files to find random documents
-                files_data = storage_service.read_excel('uploaded-files.xlsx')
+                files_data = storage_service.read_excel('uploaded-files.xlsx', years=[year])
                 if files_data is not None and not files_data.empty:
                     # Filter for random documents (checklistId is null/empty AND year matches)
                     random_docs = files_data[
@@ -5714,10 +5804,11 @@ def bulk_download_all_documents():
         return jsonify({'error': f'Failed to create bulk download: {str(e)}'}), 500
 
 @app.route('/api/refresh-tracking-tables', methods=['POST'])
+@storage_service.transaction('uploaded-files.xlsx')
 def refresh_tracking_tables():
     """
     Validate tracking files against actual storage and clean up orphaned records.
-    Checks both uploaded-files.xlsx (GCG) and aoi-documents.csv (AOI) against actual files in storage.
+    Checks both uploaded-files.xlsx (GCG) and the aoi_documents table (AOI) against actual files in storage.
     """
     try:
         data = request.get_json()
@@ -5810,81 +5901,54 @@ def refresh_tracking_tables():
         except Exception as e:
             safe_print(f"❌ Error cleaning GCG tracking: {e}")
 
-        # 2. Clean AOI documents tracking (aoi-documents.csv)
+        # 2. Clean AOI documents tracking (aoi_documents table)
         try:
             safe_print(f"📋 Checking AOI documents tracking...")
 
-            # Read aoi-documents.csv
-            aoi_docs_data = storage_service.read_csv('config/aoi-documents.csv')
-            if aoi_docs_data is not None and not aoi_docs_data.empty:
-                initial_count = len(aoi_docs_data)
-
-                # Filter for the specified year
-                year_docs = aoi_docs_data[aoi_docs_data['tahun'] == year].copy()
-                other_years = aoi_docs_data[aoi_docs_data['tahun'] != year].copy()
-
-                if not year_docs.empty:
-                    valid_records = []
-
-                    for index, row in year_docs.iterrows():
-                        try:
-                            # Extract file information
-                            subdirektorat = str(row.get('subdirektorat', ''))
-                            recommendation_id = row.get('aoiRecommendationId', '')
-                            year_val = row.get('tahun', year)
-
-                            if not subdirektorat or not recommendation_id:
-                                safe_print(f"⚠️ Skipping invalid AOI record: missing subdirektorat or recommendation ID")
-                                continue
-
-                            # Clean subdirektorat name for path
-                            from werkzeug.utils import secure_filename
-                            subdirektorat_clean = secure_filename(subdirektorat.replace(' ', '_'))
-
-                            # Check if directory exists in local storage
-                            directory_path = f"aoi-documents/{year_val}/{subdirektorat_clean}/{recommendation_id}"
-                            local_dir = Path(__file__).parent.parent / 'data' / directory_path
+            year_docs = aoi_store.list_documents(tahun=year)
+            orphaned_ids = []
 
-                            try:
-                                # Check if directory has actual files (not just placeholders)
-                                has_real_files = False
-                                if local_dir.exists() and local_dir.is_dir():
-                                    for file_item in local_dir.iterdir():
-                                        if (file_item.is_file() and
-                                            file_item.name != '.emptyFolderPlaceholder' and
-                                            not file_item.name.startswith('.')):
-                                            has_real_files = True
-                                            break
-
-                                if has_real_files:
-                                    valid_records.append(row)
-                                    safe_print(f"✅ Valid AOI record: {directory_path}")
-                                else:
-                                    safe_print(f"❌ Orphaned AOI record (no files): {directory_path}")
-                                    aoi_cleaned += 1
-
-                            except Exception as e:
-                                safe_print(f"❌ Error checking AOI directory {directory_path}: {e}")
-                                aoi_cleaned += 1
-
-                        except Exception as e:
-                            safe_print(f"❌ Error processing AOI record: {e}")
-                            aoi_cleaned += 1
-
-                    # Rebuild the dataframe with valid records + other years
-                    if valid_records:
-                        valid_year_df = pd.DataFrame(valid_records)
-                        updated_df = pd.concat([other_years, valid_year_df], ignore_index=True)
+            for row in year_docs:
+                try:
+                    # Prefer the stored upload path; older records only carry the structure fields
+                    if row['filePath']:
+                        directory_path = str(Path(row['filePath']).parent)
                     else:
-                        updated_df = other_years
+                        subdirektorat = str(row['userDivisi'] or row['userSubdirektorat'] or row['userDirektorat'])
+                        recommendation_id = row['aoiRecommendationId']
+                        if not subdirektorat or not recommendation_id:
+                            safe_print(f"⚠️ Invalid AOI record: missing subdirektorat or recommendation ID")
+                            orphaned_ids.append(row['id'])
+                            continue
+                        subdirektorat_clean = secure_filename(subdirektorat.replace(' ', '_'))
+                        directory_path = f"aoi-documents/{row['tahun']}/{subdirektorat_clean}/{recommendation_id}"
+
+                    local_dir = Path(__file__).parent.parent / 'data' / directory_path
+
+                    # Check if directory has actual files (not just placeholders)
+                    has_real_files = False
+                    if local_dir.exists() and local_dir.is_dir():
+                        for file_item in local_dir.iterdir():
+                            if (file_item.is_file() and
+                                file_item.name != '.emptyFolderPlaceholder' and
+                                not file_item.name.startswith('.')):
+                                has_real_files = True
+                                break
+
+                    if has_real_files:
+                        safe_print(f"✅ Valid AOI record: {directory_path}")
+                    else:
+                        safe_print(f"❌ Orphaned AOI record (no files): {directory_path}")
+                        orphaned_ids.append(row['id'])
 
-                    # Save cleaned data
-                    if len(updated_df) != initial_count:
-                        success = storage_service.write_csv(updated_df, 'config/aoi-documents.csv')
-                        if success:
-                            safe_print(f"✅ Cleaned {aoi_cleaned} orphaned AOI records")
-                        else:
-                            safe_print(f"❌ Failed to save cleaned AOI data")
+                except Exception as e:
+                    safe_print(f"❌ Error processing AOI record: {e}")
+                    orphaned_ids.append(row['id'])
+
+            if orphaned_ids:
+                aoi_store.delete_documents(orphaned_ids)
+                aoi_cleaned = len(orphaned_ids)
+                safe_print(f"✅ Cleaned {aoi_cleaned} orphaned AOI records")
 
         except Exception as e:
             safe_print(f"❌ Error cleaning AOI tracking: {e}")
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Benchmark for initialising a fresh SQLite database (schema + seed data)
+Usage: python benchmark_seed.py [runs]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import database
+from windows_utils import safe_print, set_console_encoding
+
+# Set console encoding for Windows compatibility
+set_console_encoding()
+
+TARGET_SECONDS = 1.0
+
+
+def time_fresh_init() -> float:
+    """Initialise a brand-new database in a temp dir and return elapsed seconds"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        original_db_path = database.DB_PATH
+        database.DB_PATH = os.path.join(tmp_dir, 'benchmark.db')
+        try:
+            start = time.perf_counter()
+            database.bootstrap_database()
+            return time.perf_counter() - start
+        finally:
+            database.DB_PATH = original_db_path
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    timings = [time_fresh_init() for _ in range(runs)]
+
+    safe_print(f"\n📊 Fresh database initialisation ({runs} runs):")
+    for i, elapsed in enumerate(timings, 1):
+        safe_print(f"   Run {i}: {elapsed * 1000:.1f} ms")
+    best = min(timings)
+    safe_print(f"   Best: {best * 1000:.1f} ms (target < {TARGET_SECONDS * 1000:.0f} ms)")
+
+    if best >= TARGET_SECONDS:
+        safe_print("❌ Fresh database initialisation is slower than target")
+        sys.exit(1)
+    safe_print("✅ Fresh database initialisation is within target")
+
+
+if __name__ == "__main__":
+    main()
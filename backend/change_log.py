@@ -0,0 +1,156 @@
+"""
+Change Log - monotonically increasing log of entity changes in SQLite
+SQLite-backed tables are logged by triggers; CSV-backed writes call record_change()
+Clients poll GET /api/changes?since=<seq> to refresh local caches incrementally
+"""
+
+import json
+from typing import Optional, List, Dict, Any, Sequence
+
+import aoi_store
+from database import get_db_connection
+
+# Rows kept in the log; clients whose cursor falls behind the oldest kept row
+# get reset=True and must reload their collections
+CHANGE_LOG_RETENTION = 100000
+CHANGES_PAGE_LIMIT = 500
+# Entity name of checklist assignments, for both the SQLite trigger and the CSV-backed endpoints
+ASSIGNMENTS_ENTITY = 'checklist-assignments'
+
+# SQLite table -> (entity name, key column, columns returned for inserts/updates)
+TRACKED_TABLES = {
+    'checklist_gcg': ('checklist', 'id', 'id, aspek, deskripsi, tahun, created_at, is_active'),
+    'checklist_assignments': (ASSIGNMENTS_ENTITY, 'id', 'id, checklist_id, subdirektorat, aspek, tahun, assigned_date'),
+    'uploaded_files': ('uploaded-files', 'id', '*'),
+    'aspek_master': ('aspects', 'id', 'id, nama, deskripsi, tahun, urutan, is_active, created_at'),
+    'years': ('tahun-buku', 'year', 'year, is_active, created_at'),
+    'direktorat': ('direktorat', 'id', '*'),
+    'subdirektorat': ('subdirektorat', 'id', '*'),
+    'divisi': ('divisi', 'id', '*'),
+    'anak_perusahaan': ('anak-perusahaan', 'id', '*'),
+    'aoi_tables': ('aoi-tables', 'id', aoi_store.api_select_list('aoi_tables')),
+    'aoi_recommendations': ('aoi-recommendations', 'id', aoi_store.api_select_list('aoi_recommendations')),
+    'aoi_documents': ('aoi-documents', 'id', aoi_store.api_select_list('aoi_documents')),
+    # Mirror of config/users.csv (same ids); never return password_hash
+    'users': ('users', 'id', 'id, email, role, name, direktorat, subdirektorat, divisi, created_at, updated_at, is_active'),
+    'document_metadata': ('document-metadata', 'id', '*'),
+    'gcg_assessments': ('gcg-assessments', 'id', '*'),
+    'gcg_aspects_config': ('gcg-aspects-config', 'id', '*'),
+    'gcg_assessment_summary': ('gcg-assessment-summary', 'id', '*'),
+}
+
+
+def install_triggers():
+    """Create the change-log triggers for every tracked table and prune old entries"""
+    statements = []
+    for table, (entity, key, _) in TRACKED_TABLES.items():
+        for op, row in (('insert', 'NEW'), ('update', 'NEW'), ('delete', 'OLD')):
+            statements.append(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_change_log_{table}_{op}
+                AFTER {op.upper()} ON {table}
+                BEGIN
+                    INSERT INTO change_log (entity, entity_id, op) VALUES ('{entity}', {row}.{key}, '{op}');
+                END;
+            """)
+
+    with get_db_connection() as conn:
+        conn.executescript('\n'.join(statements))
+        conn.execute("""
+            DELETE FROM change_log WHERE seq <= (SELECT MAX(seq) FROM change_log) - ?
+        """, (CHANGE_LOG_RETENTION,))
+
+
+def record_change(entity: str, entity_id, op: str, data: Optional[Dict[str, Any]] = None, cursor=None):
+    """Log a change made outside SQLite (CSV/XLSX-backed collections)
+
+    data is the entity as the client should cache it (omit for deletes).
+    Pass the caller's cursor to log inside its transaction.
+    """
+    params = (entity, str(entity_id), op, json.dumps(data, default=str) if data is not None else None)
+    query = "INSERT INTO change_log (entity, entity_id, op, data) VALUES (?, ?, ?, ?)"
+    if cursor is not None:
+        cursor.execute(query, params)
+        return
+    with get_db_connection() as conn:
+        conn.execute(query, params)
+
+
+def get_current_seq() -> int:
+    with get_db_connection() as conn:
+        return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log").fetchone()[0]
+
+
+def get_entity_version(entities: Sequence[str]) -> int:
+    """Data version of the given entities: the seq of their latest logged change
+
+    Monotonic per entity; falls back to the oldest retained seq once pruning has
+    removed an entity's entries, so a version never goes backwards.
+    """
+    latest = ' UNION ALL '.join('SELECT MAX(seq) AS seq FROM change_log WHERE entity = ?' for _ in entities)
+    with get_db_connection() as conn:
+        row = conn.execute(f"""
+            SELECT COALESCE((SELECT MAX(seq) FROM ({latest})), (SELECT MIN(seq) FROM change_log), 0)
+        """, list(entities)).fetchone()
+    return row[0]
+
+
+def get_changes(since: int, limit: int = CHANGES_PAGE_LIMIT, entities: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Changes after seq `since`, collapsed to the latest op per entity
+
+    Inserted/updated SQLite entities are returned with their current row;
+    CSV-backed entities with the data recorded at write time.
+    """
+    limit = max(1, min(limit, CHANGES_PAGE_LIMIT))
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COALESCE(MIN(seq), 0), COALESCE(MAX(seq), 0) FROM change_log")
+        oldest, latest = cursor.fetchone()
+        if since < oldest - 1:
+            return {'since': since, 'next': latest, 'reset': True, 'has_more': False, 'changes': []}
+
+        query = "SELECT seq, entity, entity_id, op, data FROM change_log WHERE seq > ?"
+        params: List[Any] = [since]
+        if entities:
+            query += f" AND entity IN ({', '.join('?' for _ in entities)})"
+            params += entities
+        cursor.execute(query + " ORDER BY seq LIMIT ?", params + [limit + 1])
+        rows = cursor.fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        # Latest entry per entity wins
+        latest_entries: Dict[tuple, Dict[str, Any]] = {}
+        for row in rows:
+            key = (row['entity'], row['entity_id'])
+            latest_entries.pop(key, None)
+            latest_entries[key] = {
+                'seq': row['seq'], 'entity': row['entity'], 'id': row['entity_id'], 'op': row['op'],
+                'data': json.loads(row['data']) if row['data'] else None,
+            }
+
+        # Hydrate SQLite-backed upserts with one query per table
+        for table, (entity, key, columns) in TRACKED_TABLES.items():
+            pending = [change for change in latest_entries.values()
+                       if change['entity'] == entity and change['op'] != 'delete' and change['data'] is None]
+            ids = [change['id'] for change in pending]
+            if not ids:
+                continue
+            cursor.execute(
+                f"SELECT {columns} FROM {table} WHERE {key} IN ({', '.join('?' for _ in ids)})",
+                [int(i) if i.lstrip('-').isdigit() else i for i in ids]
+            )
+            current = {str(row[key]): dict(row) for row in cursor.fetchall()}
+            for change in pending:
+                change['data'] = current.get(change['id'])
+                if change['data'] is None:
+                    # Removed again by a later change not yet in this page
+                    change['op'] = 'delete'
+
+    next_seq = rows[-1]['seq'] if rows else max(since, latest)
+    return {
+        'since': since,
+        'next': next_seq,
+        'reset': False,
+        'has_more': has_more,
+        'changes': sorted(latest_entries.values(), key=lambda change: change['seq']),
+    }
@@ -0,0 +1,335 @@
+"""
+Content Index - Background text extraction of stored documents into an FTS5 index
+Extracts the PDF text layer, xlsx cell text and txt/md files under data/gcg-documents
+and data/aoi-documents on a bounded worker pool; files are only re-extracted when
+their content hash changes
+"""
+
+import hashlib
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple
+
+from database import get_db_connection
+from search_index import build_match_query, indonesian_roots, SEARCH_LIMIT, MAX_SEARCH_LIMIT
+from windows_utils import safe_print
+
+DATA_ROOT = Path(__file__).parent.parent / 'data'
+DOCUMENT_ROOTS = ('gcg-documents', 'aoi-documents')
+# Extraction workers and how many more files may wait; beyond that, submit() drops
+# the file and the next scan picks it up
+CONTENT_INDEX_WORKERS = int(os.environ.get('CONTENT_INDEX_WORKERS', 2))
+CONTENT_INDEX_QUEUE_DEPTH = int(os.environ.get('CONTENT_INDEX_QUEUE_DEPTH', 64))
+# Cap on extracted text per document (very large spreadsheets/PDFs)
+MAX_EXTRACT_CHARS = 2_000_000
+TEXT_EXTENSIONS = {'.txt', '.md', '.markdown', '.csv'}
+XLSX_EXTENSIONS = {'.xlsx', '.xlsm'}
+_WORD_PATTERN = re.compile(r'\w+', re.UNICODE)
+# Failed extractions (and PDFs seen before pypdf was installed) are retried on the next scan
+MISSING_EXTRACTOR = 'Extractor not installed'
+RETRY_CONDITION = f"(status = 'error' OR error LIKE '{MISSING_EXTRACTOR}%')"
+
+
+def _extract_pdf(path: Path) -> Tuple[str, str]:
+    try:
+        from pypdf import PdfReader
+        extractor = 'pypdf'
+    except ImportError:
+        from PyPDF2 import PdfReader  # Older installs
+        extractor = 'PyPDF2'
+    reader = PdfReader(str(path))
+    parts, size = [], 0
+    for page in reader.pages:
+        text = page.extract_text() or ''
+        parts.append(text)
+        size += len(text)
+        if size >= MAX_EXTRACT_CHARS:
+            break
+    return '\n'.join(parts), extractor
+
+
+def _extract_xlsx(path: Path) -> Tuple[str, str]:
+    from openpyxl import load_workbook
+    workbook = load_workbook(str(path), read_only=True, data_only=True)
+    parts, size = [], 0
+    try:
+        for sheet in workbook.worksheets:
+            parts.append(sheet.title)
+            for row in sheet.iter_rows(values_only=True):
+                cells = [str(value) for value in row if value is not None and str(value).strip()]
+                if cells:
+                    line = ' '.join(cells)
+                    parts.append(line)
+                    size += len(line)
+                if size >= MAX_EXTRACT_CHARS:
+                    break
+    finally:
+        workbook.close()
+    return '\n'.join(parts), 'openpyxl'
+
+
+def _extract_text(path: Path) -> Tuple[str, str]:
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return f.read(MAX_EXTRACT_CHARS), 'text'
+
+
+def extract_text(path: Path) -> Tuple[Optional[str], str]:
+    """Return (text, extractor); text is None for unsupported file types"""
+    suffix = path.suffix.lower()
+    if suffix == '.pdf':
+        return _extract_pdf(path)
+    if suffix in XLSX_EXTENSIONS:
+        return _extract_xlsx(path)
+    if suffix in TEXT_EXTENSIONS:
+        return _extract_text(path)
+    return None, ''
+
+
+def _root_terms(text: str) -> str:
+    """Indonesian root forms of the document's words, so "mengukur" finds "pengukuran"
+
+    Word tokens only match roots as prefixes, so the affix-stripped roots of every
+    distinct word are indexed in their own (low-weight) column.
+    """
+    roots = set()
+    for word in set(_WORD_PATTERN.findall(text.lower())):
+        if len(word) >= 5 and not word.isdigit():
+            roots.update(indonesian_roots(word)[1:])
+    return ' '.join(sorted(roots))
+
+
+def _file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _year_of(relative_path: str) -> Optional[int]:
+    """<root>/<year>/... -> year"""
+    parts = relative_path.split('/')
+    if len(parts) > 1 and parts[1].isdigit():
+        return int(parts[1])
+    return None
+
+
+class ContentIndexer:
+    """Bounded background pool feeding the document_text FTS index"""
+
+    def __init__(self, workers: int = CONTENT_INDEX_WORKERS, queue_depth: int = CONTENT_INDEX_QUEUE_DEPTH):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='content-index')
+        self._slots = threading.BoundedSemaphore(workers + queue_depth)
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._available = None
+        self._counters = {'indexed': 0, 'unchanged': 0, 'skipped': 0, 'dropped': 0, 'errors': 0}
+
+    def install(self) -> bool:
+        """Create the FTS table; False when this SQLite build has no FTS5"""
+        try:
+            with get_db_connection() as conn:
+                conn.execute("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS document_text USING fts5(
+                        file_name, content, roots, file_path UNINDEXED, tahun UNINDEXED,
+                        tokenize = 'unicode61 remove_diacritics 2', prefix = '3 4'
+                    )
+                """)
+            self._available = True
+        except Exception as e:
+            safe_print(f"⚠️ Document content search unavailable (SQLite FTS5): {e}")
+            self._available = False
+        return self._available
+
+    def submit(self, relative_path: str, block: bool = False) -> bool:
+        """Queue one stored file (path relative to data/); never blocks unless block=True"""
+        if not self._available:
+            return False
+        relative_path = relative_path.replace('\\', '/').lstrip('/')
+        if not self._slots.acquire(blocking=block):
+            self._count('dropped')
+            return False
+        with self._lock:
+            if relative_path in self._pending:
+                self._slots.release()
+                return True
+            self._pending.add(relative_path)
+
+        def task():
+            try:
+                self._index_file(relative_path)
+            except Exception as e:
+                with self._lock:
+                    self._counters['errors'] += 1
+                safe_print(f"⚠️ Content indexing failed for {relative_path}: {e}")
+            finally:
+                with self._lock:
+                    self._pending.discard(relative_path)
+                self._slots.release()
+
+        self._executor.submit(task)
+        return True
+
+    def _index_file(self, relative_path: str):
+        path = DATA_ROOT / relative_path
+        if not path.is_file():
+            self.remove(relative_path)
+            return
+        stat = path.stat()
+
+        with get_db_connection() as conn:
+            existing = conn.execute(f"""
+                SELECT id, content_hash, file_size, file_mtime_ns, {RETRY_CONDITION} AS retry
+                FROM document_contents WHERE file_path = ?
+            """, (relative_path,)).fetchone()
+        if existing and existing['retry']:
+            existing = None
+        if existing and existing['file_size'] == stat.st_size and existing['file_mtime_ns'] == stat.st_mtime_ns:
+            self._count('unchanged')
+            return
+
+        content_hash = _file_hash(path)
+        if existing and existing['content_hash'] == content_hash:
+            # Touched but identical: only remember the new signature
+            with get_db_connection() as conn:
+                conn.execute("UPDATE document_contents SET file_size = ?, file_mtime_ns = ? WHERE id = ?",
+                             (stat.st_size, stat.st_mtime_ns, existing['id']))
+            self._count('unchanged')
+            return
+
+        text, extractor, status, error = None, '', 'indexed', None
+        try:
+            text, extractor = extract_text(path)
+            if text is None:
+                status = 'unsupported'
+            elif not text.strip():
+                status = 'empty'
+        except ImportError as e:
+            status, error = 'unsupported', f"{MISSING_EXTRACTOR}: {e}"
+        except Exception as e:
+            status, error = 'error', str(e)
+
+        text = (text or '')[:MAX_EXTRACT_CHARS]
+        with get_db_connection() as conn:
+            conn.execute("""
+                INSERT INTO document_contents
+                    (file_path, tahun, content_hash, file_size, file_mtime_ns, extractor, status, error, char_count, indexed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(file_path) DO UPDATE SET
+                    tahun = excluded.tahun, content_hash = excluded.content_hash,
+                    file_size = excluded.file_size, file_mtime_ns = excluded.file_mtime_ns,
+                    extractor = excluded.extractor, status = excluded.status, error = excluded.error,
+                    char_count = excluded.char_count, indexed_at = excluded.indexed_at
+            """, (relative_path, _year_of(relative_path), content_hash, stat.st_size, stat.st_mtime_ns,
+                  extractor, status, error, len(text)))
+            row_id = conn.execute("SELECT id FROM document_contents WHERE file_path = ?", (relative_path,)).fetchone()[0]
+            conn.execute("DELETE FROM document_text WHERE rowid = ?", (row_id,))
+            if status == 'indexed':
+                conn.execute("""
+                    INSERT INTO document_text (rowid, file_name, content, roots, file_path, tahun) VALUES (?, ?, ?, ?, ?, ?)
+                """, (row_id, path.name, text, _root_terms(text), relative_path, _year_of(relative_path)))
+
+        self._count('indexed' if status == 'indexed' else 'skipped')
+
+    def _count(self, key: str):
+        with self._lock:
+            self._counters[key] += 1
+
+    def remove(self, relative_path: str):
+        """Drop a deleted file from the index"""
+        with get_db_connection() as conn:
+            row = conn.execute("SELECT id FROM document_contents WHERE file_path = ?", (relative_path,)).fetchone()
+            if row:
+                conn.execute("DELETE FROM document_text WHERE rowid = ?", (row['id'],))
+                conn.execute("DELETE FROM document_contents WHERE id = ?", (row['id'],))
+
+    def scan(self) -> Dict[str, int]:
+        """Queue new/changed files and drop index entries for files that are gone"""
+        if not self._available:
+            return {'queued': 0, 'removed': 0}
+        with get_db_connection() as conn:
+            known = {row['file_path']: (None, None) if row['retry'] else (row['file_size'], row['file_mtime_ns'])
+                     for row in conn.execute(f"""
+                         SELECT file_path, file_size, file_mtime_ns, {RETRY_CONDITION} AS retry FROM document_contents
+                     """)}
+
+        queued, seen = 0, set()
+        for root in DOCUMENT_ROOTS:
+            base = DATA_ROOT / root
+            if not base.exists():
+                continue
+            for dirpath, _, filenames in os.walk(base):
+                for filename in filenames:
+                    full_path = Path(dirpath) / filename
+                    relative_path = full_path.relative_to(DATA_ROOT).as_posix()
+                    seen.add(relative_path)
+                    stat = full_path.stat()
+                    if known.get(relative_path) == (stat.st_size, stat.st_mtime_ns):
+                        continue
+                    # Blocks only this scan thread while the pool is saturated
+                    if self.submit(relative_path, block=True):
+                        queued += 1
+
+        removed = [path for path in known if path not in seen]
+        for relative_path in removed:
+            self.remove(relative_path)
+        return {'queued': queued, 'removed': len(removed)}
+
+    def scan_in_background(self):
+        if not self._available:
+            return
+
+        def run():
+            try:
+                result = self.scan()
+                if result['queued'] or result['removed']:
+                    safe_print(f"📄 Content index scan: {result['queued']} queued, {result['removed']} removed")
+            except Exception as e:
+                safe_print(f"⚠️ Content index scan failed: {e}")
+        threading.Thread(target=run, name='content-index-scan', daemon=True).start()
+
+    def search(self, query: str, year: Optional[int] = None, limit: int = SEARCH_LIMIT) -> List[Dict[str, Any]]:
+        """Ranked document search with highlighted content snippets"""
+        match = build_match_query(query, prefix=True)
+        if not match or not self._available:
+            return []
+        conditions, params = ['document_text MATCH ?'], [match]
+        if year:
+            conditions.append('tahun = ?')
+            params.append(year)
+        with get_db_connection() as conn:
+            rows = conn.execute(f"""
+                SELECT file_path, file_name, tahun,
+                       snippet(document_text, 1, '<mark>', '</mark>', '…', 24) AS snippet,
+                       bm25(document_text, 5.0, 1.0, 0.5) AS score
+                FROM document_text
+                WHERE {' AND '.join(conditions)}
+                ORDER BY score
+                LIMIT ?
+            """, params + [min(max(limit, 1), MAX_SEARCH_LIMIT)]).fetchall()
+        return [{
+            'filePath': row['file_path'],
+            'fileName': row['file_name'],
+            'tahun': row['tahun'],
+            'snippet': row['snippet'] or '',
+            'score': round(-row['score'], 4),
+        } for row in rows]
+
+    def get_status(self) -> Dict[str, Any]:
+        with get_db_connection() as conn:
+            by_status = {row['status']: row['count'] for row in conn.execute(
+                "SELECT status, COUNT(*) AS count FROM document_contents GROUP BY status")}
+        with self._lock:
+            return {
+                'available': bool(self._available),
+                'pending': len(self._pending),
+                'counters': dict(self._counters),
+                'documents': by_status
+            }
+
+
+# Global content indexer instance
+content_indexer = ContentIndexer()
@@ -0,0 +1,126 @@
+"""
+CSV Export - Streamed CSV and multi-CSV ZIP exports for machine consumers (BI pipelines)
+Rows are read from a SQLite cursor with fetchmany and written to the response as they
+arrive, so memory stays constant and no workbook is ever built
+"""
+
+import csv
+import io
+import re
+import sqlite3
+import zipfile
+from contextlib import ExitStack
+from typing import Iterator, List, Optional, Tuple
+
+from flask import Response
+
+from database import get_db_connection
+
+# Rows fetched from the cursor (and sent as one response chunk) at a time
+CSV_FETCH_ROWS = 1000
+EXPORT_FORMATS = ('xlsx', 'csv', 'zip')
+
+_SLUG_PATTERN = re.compile(r'[^a-z0-9]+')
+
+
+def sheet_slug(sheet_name: str) -> str:
+    """File-name form of a sheet name ('Checklist GCG' -> 'checklist_gcg')"""
+    return _SLUG_PATTERN.sub('_', sheet_name.lower()).strip('_')
+
+
+def iter_csv(cursor: sqlite3.Cursor) -> Iterator[bytes]:
+    """UTF-8 CSV of an executed query (header row first), one piece per fetchmany batch"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow([column[0] for column in cursor.description])
+    while True:
+        rows = cursor.fetchmany(CSV_FETCH_ROWS)
+        if not rows:
+            break
+        writer.writerows(rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Header of an empty result
+        yield buffer.getvalue().encode('utf-8')
+
+
+class _ZipStream(io.RawIOBase):
+    """Write-only, unseekable sink for ZipFile; drain() hands back what was written"""
+
+    def __init__(self):
+        super().__init__()
+        self._pieces: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._pieces.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b''.join(self._pieces)
+        self._pieces.clear()
+        return data
+
+
+def iter_zip(cursors: List[Tuple[str, sqlite3.Cursor]]) -> Iterator[bytes]:
+    """ZIP with one <sheet>.csv per (sheet name, executed query), streamed as it is compressed"""
+    sink = _ZipStream()
+    # An unseekable sink makes ZipFile write sizes in data descriptors after each member
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for sheet_name, cursor in cursors:
+            with archive.open(f"{sheet_slug(sheet_name)}.csv", 'w') as member:
+                for piece in iter_csv(cursor):
+                    member.write(piece)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            yield sink.drain()
+    yield sink.drain()
+
+
+def _execute(sheets: List[Tuple[str, str, tuple]]) -> Tuple[ExitStack, List[Tuple[str, sqlite3.Cursor]]]:
+    """Run the sheet queries up front, so SQL errors fail the request before anything is sent
+
+    Returns the open connection (close it when the response is done) and one cursor per sheet.
+    The statements stay open while the rows are streamed, so each sheet is one consistent read.
+    """
+    with ExitStack() as stack:
+        conn = stack.enter_context(get_db_connection())
+        cursors = [(sheet_name, conn.execute(query, tuple(params))) for sheet_name, query, params in sheets]
+        return stack.pop_all(), cursors
+
+
+def stream_export(sheets: List[Tuple[str, str, tuple]], filename_base: str, export_format: str,
+                  sheet: Optional[str] = None) -> Response:
+    """Chunked (no Content-Length) CSV or ZIP response for an export's sheet queries
+
+    format=csv sends one sheet: the one named by `sheet` (its slug), else the first.
+    Raises ValueError for an unknown format or sheet.
+    """
+    if export_format == 'zip':
+        connection, cursors = _execute(sheets)
+        response = Response(iter_zip(cursors), mimetype='application/zip', headers={
+            'Content-Disposition': f'attachment; filename="{filename_base}.zip"'})
+        response.call_on_close(connection.close)
+        return response
+    if export_format != 'csv':
+        raise ValueError(f"Unknown export format: {export_format} (expected one of {', '.join(EXPORT_FORMATS)})")
+
+    if sheet:
+        matches = [entry for entry in sheets if sheet_slug(entry[0]) == sheet_slug(sheet)]
+        if not matches:
+            raise ValueError(f"Unknown sheet: {sheet} (expected one of "
+                             f"{', '.join(sheet_slug(name) for name, _, _ in sheets)})")
+        selected = matches[0]
+    else:
+        selected = sheets[0]
+    filename = filename_base if len(sheets) == 1 else f"{filename_base}_{sheet_slug(selected[0])}"
+    connection, ((_, cursor),) = _execute([selected])
+    response = Response(iter_csv(cursor), mimetype='text/csv', headers={
+        'Content-Disposition': f'attachment; filename="{filename}.csv"'})
+    response.call_on_close(connection.close)
+    return response
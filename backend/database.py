@@ -6,16 +6,37 @@ Includes Excel export functionality for stakeholders
 
 import sqlite3
 import os
+import re
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Optional, List, Dict, Any
-import bcrypt
 from contextlib import contextmanager
+from password_hasher import password_hasher
 
 # Database file path
 DB_PATH = os.path.join(os.path.dirname(__file__), 'gcg_database.db')
 SCHEMA_PATH = os.path.join(os.path.dirname(__file__), 'database_schema.sql')
 
+# Seed data sources
+SEED_START_YEAR = 2014
+SEED_CHECKLIST_PATH = os.path.join(os.path.dirname(__file__), '..', 'src', 'lib', 'seed', 'seedChecklistGCG.ts')
+# Parsed seed checklist (.~ files are local, git-ignored artifacts)
+SEED_CACHE_PATH = os.path.join(os.path.dirname(__file__), '.~seed_checklist_gcg.json')
+
+# Columns added to existing tables after their CREATE TABLE shipped;
+# CREATE TABLE IF NOT EXISTS cannot add them to an older database
+ADDED_COLUMNS = {
+    'uploaded_files': [('file_path', 'TEXT'), ('catatan', 'TEXT')],
+    'excel_exports': [('data_version', 'TEXT')],
+    'checklist_gcg': [('row_number', 'INTEGER')],
+}
+
+_INDEX_STATEMENT_PATTERN = re.compile(r'^\s*CREATE\s+(?:UNIQUE\s+)?INDEX\b[^;]*;', re.IGNORECASE | re.MULTILINE)
+_TRIGGER_STATEMENT_PATTERN = re.compile(r'^\s*CREATE\s+TRIGGER\b.*?^END;', re.IGNORECASE | re.MULTILINE | re.DOTALL)
+_SEED_CHECKLIST_PATTERN = re.compile(r'\{\s*id:\s*(\d+),\s*aspek:\s*"([^"]+)",\s*deskripsi:\s*"([^"]+)"\s*\}')
+_seed_checklist_memo: Dict[str, Any] = {}
+
 
 @contextmanager
 def get_db_connection():
@@ -33,14 +54,35 @@ def get_db_connection():
         conn.close()
 
 
-def init_database():
-    """Initialize database with schema"""
+def _split_schema(schema_sql: str):
+    """Split schema SQL into (tables/views script, list of deferred statements)
+
+    Deferred statements are the CREATE INDEX and CREATE TRIGGER statements,
+    which a bulk load should not pay for row by row.
+    """
+    deferred = [m.group(0) for m in _INDEX_STATEMENT_PATTERN.finditer(schema_sql)]
+    table_sql = _INDEX_STATEMENT_PATTERN.sub('', schema_sql)
+    deferred += [m.group(0) for m in _TRIGGER_STATEMENT_PATTERN.finditer(table_sql)]
+    table_sql = _TRIGGER_STATEMENT_PATTERN.sub('', table_sql)
+    return table_sql, deferred
+
+
+def init_database(defer_indexes: bool = False):
+    """Initialize database with schema
+
+    With defer_indexes=True the CREATE INDEX and CREATE TRIGGER statements are
+    skipped so a bulk load runs against bare tables; call create_indexes() once
+    loading is done.
+    """
     print("Initializing database...")
 
     # Read schema file
     with open(SCHEMA_PATH, 'r') as f:
         schema_sql = f.read()
 
+    if defer_indexes:
+        schema_sql, _ = _split_schema(schema_sql)
+
     # Execute schema
     with get_db_connection() as conn:
         conn.executescript(schema_sql)
@@ -49,102 +91,241 @@ def init_database():
     return True
 
 
+def ensure_schema():
+    """Bring an existing database up to the current schema
+
+    Every statement in the schema is idempotent, so re-running it only adds
+    tables, indexes and views introduced since the database was created.
+    A missing database is created and seeded instead.
+    """
+    if not os.path.exists(DB_PATH):
+        bootstrap_database()
+        return
+
+    with open(SCHEMA_PATH, 'r') as f:
+        schema_sql = f.read()
+
+    # Indexes and triggers run last: they may cover columns _add_missing_columns only now adds
+    table_sql, deferred_statements = _split_schema(schema_sql)
+    with get_db_connection() as conn:
+        conn.executescript(table_sql)
+        _add_missing_columns(conn)
+        backfill_checklist_row_numbers(conn)
+        conn.executescript('\n'.join(deferred_statements))
+        counters_missing = conn.execute("SELECT NOT EXISTS (SELECT 1 FROM checklist_completion)").fetchone()[0]
+
+    # Backfill the completion counters once for databases created before they existed
+    if counters_missing:
+        rebuild_checklist_completion()
+
+
+def _add_missing_columns(conn):
+    for table, columns in ADDED_COLUMNS.items():
+        existing = {row['name'] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+        for column, column_type in columns:
+            if column not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+
+def create_indexes():
+    """Create the schema's indexes and triggers (used after a deferred-index bulk load)"""
+    with open(SCHEMA_PATH, 'r') as f:
+        _, deferred_statements = _split_schema(f.read())
+
+    with get_db_connection() as conn:
+        backfill_checklist_row_numbers(conn)
+        conn.executescript('\n'.join(deferred_statements))
+
+    print(f"  ✓ Created {len(deferred_statements)} indexes and triggers")
+    rebuild_checklist_completion()
+    return len(deferred_statements)
+
+
+def backfill_checklist_row_numbers(conn) -> int:
+    """Number checklist items that have no row_number, after the numbered ones of their year in id order
+
+    Needed once for databases from before the column, and after bulk loads
+    that bypass trg_checklist_row_number. Returns the number of rows numbered.
+    """
+    cursor = conn.execute("""
+        WITH numbered AS (
+            SELECT id,
+                   ROW_NUMBER() OVER (PARTITION BY tahun ORDER BY id)
+                   + COALESCE((SELECT MAX(row_number) FROM checklist_gcg n WHERE n.tahun = c.tahun), 0) AS row_number
+            FROM checklist_gcg c
+            WHERE row_number IS NULL
+        )
+        UPDATE checklist_gcg
+        SET row_number = (SELECT numbered.row_number FROM numbered WHERE numbered.id = checklist_gcg.id)
+        WHERE row_number IS NULL
+    """)
+    return cursor.rowcount
+
+
+def rebuild_checklist_completion(year: Optional[int] = None) -> int:
+    """Recompute the checklist completion counters from scratch
+
+    The triggers keep the counters current incrementally; this is only needed
+    after loads that bypass them (deferred-trigger bootstrap, old databases).
+    Returns the number of counter rows written.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        if year:
+            cursor.execute("DELETE FROM checklist_completion WHERE tahun = ?", (year,))
+            cursor.execute("""
+                INSERT INTO checklist_completion (tahun, aspek, subdirektorat, total_required, total_uploaded)
+                SELECT tahun, aspek, subdirektorat, total_required, total_uploaded
+                FROM v_checklist_completion_source WHERE tahun = ?
+            """, (year,))
+        else:
+            cursor.execute("DELETE FROM checklist_completion")
+            cursor.execute("""
+                INSERT INTO checklist_completion (tahun, aspek, subdirektorat, total_required, total_uploaded)
+                SELECT tahun, aspek, subdirektorat, total_required, total_uploaded
+                FROM v_checklist_completion_source
+            """)
+        return cursor.rowcount
+
+
+def get_checklist_completion(year: int, subdirektorat: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Completion per aspek for a year (optionally one subdirektorat) from the counters"""
+    query = """
+        SELECT tahun, aspek,
+               SUM(total_required) as total_required,
+               SUM(total_uploaded) as total_uploaded,
+               ROUND(CAST(SUM(total_uploaded) AS REAL) / SUM(total_required) * 100, 2) as completion_percentage
+        FROM checklist_completion
+        WHERE tahun = ?
+    """
+    params: List[Any] = [year]
+    if subdirektorat is not None:
+        query += " AND subdirektorat = ?"
+        params.append(subdirektorat)
+    query += " GROUP BY tahun, aspek ORDER BY aspek"
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        return [dict(row) for row in cursor.fetchall()]
+
+
+def bootstrap_database():
+    """Create and seed a fresh database, building indexes after the bulk load"""
+    init_database(defer_indexes=True)
+    seed_database()
+    create_indexes()
+
+
+def bulk_insert(cursor, table: str, columns: List[str], rows: List[tuple],
+                conflict: str = '', upsert: str = '') -> int:
+    """Insert many rows with a single executemany call
+
+    conflict is an optional conflict clause such as 'OR IGNORE'; upsert an
+    optional trailing clause such as 'ON CONFLICT(id) DO UPDATE SET ...'.
+    Returns the number of rows inserted (or updated by the upsert).
+    """
+    if not rows:
+        return 0
+    placeholders = ', '.join('?' for _ in columns)
+    cursor.executemany(
+        f"INSERT {conflict} INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) {upsert}",
+        rows
+    )
+    return cursor.rowcount
+
+
 def seed_database():
-    """Seed database with initial data from seed files"""
+    """Seed database with initial data from seed files
+
+    All inserts go through executemany inside the single transaction held by
+    get_db_connection(), so a fresh database is seeded in one commit.
+    """
     print("Seeding database with initial data...")
 
+    current_year = datetime.now().year
+    years = list(range(SEED_START_YEAR, current_year + 1))
+
+    # Seed users are hashed before the write transaction opens (inserted in step 2)
+    seed_users = [
+        {
+            "email": "arsippostgcg@gmail.com",
+            "password": "postarsipGCG.",
+            "role": "superadmin",
+            "name": "Super Admin",
+            "direktorat": "Direktorat Keuangan",
+            "subdirektorat": "Sub Direktorat Financial Policy and Asset Management",
+            "divisi": "Divisi Kebijakan Keuangan"
+        },
+        {
+            "email": "admin@posindonesia.co.id",
+            "password": "admin123",
+            "role": "admin",
+            "name": "Administrator",
+            "direktorat": "Direktorat Operasional",
+            "subdirektorat": "Sub Direktorat Courier and Logistic Operation",
+            "divisi": "Divisi Operasional Logistik"
+        },
+        {
+            "email": "user@posindonesia.co.id",
+            "password": "user123",
+            "role": "user",
+            "name": "User",
+            "direktorat": "Direktorat Pemasaran",
+            "subdirektorat": "Sub Direktorat Retail Business",
+            "divisi": "Divisi Ritel"
+        }
+    ]
+
+    # Same work factor as every other account; bcrypt releases the GIL, so the
+    # seed accounts are hashed in parallel on the shared hasher pool
+    with ThreadPoolExecutor(max_workers=len(seed_users)) as pool:
+        password_hashes = list(pool.map(password_hasher.hash, [u['password'] for u in seed_users]))
+
     with get_db_connection() as conn:
         cursor = conn.cursor()
 
         # 1. Seed Years (2014 to current)
-        current_year = datetime.now().year
-        for year in range(2014, current_year + 1):
-            cursor.execute(
-                "INSERT OR IGNORE INTO years (year, is_active) VALUES (?, ?)",
-                (year, 1)
-            )
-        print(f"  ✓ Seeded {current_year - 2014 + 1} years")
+        bulk_insert(cursor, 'years', ['year', 'is_active'],
+                    [(year, 1) for year in years], conflict='OR IGNORE')
+        print(f"  ✓ Seeded {len(years)} years")
 
         # 2. Seed Users (with hashed passwords)
-        seed_users = [
-            {
-                "email": "arsippostgcg@gmail.com",
-                "password": "postarsipGCG.",
-                "role": "superadmin",
-                "name": "Super Admin",
-                "direktorat": "Direktorat Keuangan",
-                "subdirektorat": "Sub Direktorat Financial Policy and Asset Management",
-                "divisi": "Divisi Kebijakan Keuangan"
-            },
-            {
-                "email": "admin@posindonesia.co.id",
-                "password": "admin123",
-                "role": "admin",
-                "name": "Administrator",
-                "direktorat": "Direktorat Operasional",
-                "subdirektorat": "Sub Direktorat Courier and Logistic Operation",
-                "divisi": "Divisi Operasional Logistik"
-            },
-            {
-                "email": "user@posindonesia.co.id",
-                "password": "user123",
-                "role": "user",
-                "name": "User",
-                "direktorat": "Direktorat Pemasaran",
-                "subdirektorat": "Sub Direktorat Retail Business",
-                "divisi": "Divisi Ritel"
-            }
-        ]
-
-        for user in seed_users:
-            # Hash password
-            password_hash = bcrypt.hashpw(user['password'].encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-            cursor.execute("""
-                INSERT OR IGNORE INTO users (email, password_hash, role, name, direktorat, subdirektorat, divisi)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (user['email'], password_hash, user['role'], user['name'],
-                  user['direktorat'], user['subdirektorat'], user['divisi']))
+        bulk_insert(cursor, 'users',
+                    ['email', 'password_hash', 'role', 'name', 'direktorat', 'subdirektorat', 'divisi'],
+                    [(user['email'], password_hash, user['role'], user['name'],
+                      user['direktorat'], user['subdirektorat'], user['divisi'])
+                     for user, password_hash in zip(seed_users, password_hashes)],
+                    conflict='OR IGNORE')
         print(f"  ✓ Seeded {len(seed_users)} users")
 
         # 3. Seed GCG Checklist (268 items per year)
         seed_checklist = get_seed_checklist_gcg()
-        for year in range(2014, current_year + 1):
-            for item in seed_checklist:
-                cursor.execute("""
-                    INSERT INTO checklist_gcg (aspek, deskripsi, tahun)
-                    VALUES (?, ?, ?)
-                """, (item['aspek'], item['deskripsi'], year))
-        total_checklist = len(seed_checklist) * (current_year - 2014 + 1)
+        bulk_insert(cursor, 'checklist_gcg', ['aspek', 'deskripsi', 'tahun'],
+                    [(item['aspek'], item['deskripsi'], year)
+                     for year in years for item in seed_checklist])
+        total_checklist = len(seed_checklist) * len(years)
         print(f"  ✓ Seeded {total_checklist} checklist items ({len(seed_checklist)} per year)")
 
         # 4. Seed Direktorat
         seed_direktorat = get_seed_direktorat()
-        for year in range(2014, current_year + 1):
-            for item in seed_direktorat:
-                cursor.execute("""
-                    INSERT INTO direktorat (nama, deskripsi, tahun)
-                    VALUES (?, ?, ?)
-                """, (item['nama'], item.get('deskripsi', ''), year))
+        bulk_insert(cursor, 'direktorat', ['nama', 'deskripsi', 'tahun'],
+                    [(item['nama'], item.get('deskripsi', ''), year)
+                     for year in years for item in seed_direktorat])
         print(f"  ✓ Seeded {len(seed_direktorat)} direktorat per year")
 
         # 5. Seed Subdirektorat
         seed_subdirektorat = get_seed_subdirektorat()
-        for year in range(2014, current_year + 1):
-            for item in seed_subdirektorat:
-                cursor.execute("""
-                    INSERT INTO subdirektorat (nama, deskripsi, tahun)
-                    VALUES (?, ?, ?)
-                """, (item['nama'], item.get('deskripsi', ''), year))
+        bulk_insert(cursor, 'subdirektorat', ['nama', 'deskripsi', 'tahun'],
+                    [(item['nama'], item.get('deskripsi', ''), year)
+                     for year in years for item in seed_subdirektorat])
         print(f"  ✓ Seeded {len(seed_subdirektorat)} subdirektorat per year")
 
         # 6. Seed Anak Perusahaan
         seed_anak_perusahaan = get_seed_anak_perusahaan()
-        for year in range(2014, current_year + 1):
-            for item in seed_anak_perusahaan:
-                cursor.execute("""
-                    INSERT INTO anak_perusahaan (nama, kategori, deskripsi, tahun)
-                    VALUES (?, ?, ?, ?)
-                """, (item['nama'], item['kategori'], item['deskripsi'], year))
+        bulk_insert(cursor, 'anak_perusahaan', ['nama', 'kategori', 'deskripsi', 'tahun'],
+                    [(item['nama'], item['kategori'], item['deskripsi'], year)
+                     for year in years for item in seed_anak_perusahaan])
         print(f"  ✓ Seeded {len(seed_anak_perusahaan)} anak perusahaan per year")
 
         # 7. Load GCG Mapping Config from CSV
@@ -153,32 +334,47 @@ def seed_database():
         if os.path.exists(gcg_mapping_path):
             with open(gcg_mapping_path, 'r', encoding='utf-8') as csvfile:
                 reader = csv.DictReader(csvfile)
-                for row in reader:
-                    cursor.execute("""
-                        INSERT INTO gcg_aspects_config
-                        (level, type, section, no, deskripsi, jumlah_parameter, bobot)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        row.get('Level'),
-                        row.get('Type'),
-                        row.get('Section'),
-                        row.get('No'),
-                        row.get('Deskripsi'),
-                        row.get('Jumlah_Parameter'),
-                        row.get('Bobot')
-                    ))
+                bulk_insert(cursor, 'gcg_aspects_config',
+                            ['level', 'type', 'section', 'no', 'deskripsi', 'jumlah_parameter', 'bobot'],
+                            [(row.get('Level'), row.get('Type'), row.get('Section'), row.get('No'),
+                              row.get('Deskripsi'), row.get('Jumlah_Parameter'), row.get('Bobot'))
+                             for row in reader])
             print(f"  ✓ Loaded GCG config from GCG_MAPPING.csv")
 
     print("Database seeding completed!")
 
 
+def _read_seed_cache(cache_key: list) -> Optional[List[Dict[str, str]]]:
+    """Return the cached parsed checklist if it was built from the same seed file"""
+    try:
+        with open(SEED_CACHE_PATH, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cached.get('key') != cache_key:
+        return None
+    return cached.get('checklist')
+
+
+def _write_seed_cache(cache_key: list, checklist: List[Dict[str, str]]):
+    """Store the parsed checklist so later runs skip the TypeScript parse"""
+    try:
+        os.makedirs(os.path.dirname(SEED_CACHE_PATH), exist_ok=True)
+        tmp_path = f"{SEED_CACHE_PATH}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'key': cache_key, 'checklist': checklist}, f, ensure_ascii=False)
+        os.replace(tmp_path, SEED_CACHE_PATH)
+    except OSError as e:
+        print(f"  ! Could not write seed cache: {e}")
+
+
 def get_seed_checklist_gcg():
-    """Get checklist GCG seed data (268 items)"""
-    # Load from the TypeScript seed file
-    import os
-    import re
+    """Get checklist GCG seed data (268 items)
 
-    seed_file = os.path.join(os.path.dirname(__file__), '..', 'src', 'lib', 'seed', 'seedChecklistGCG.ts')
+    The TypeScript seed file is parsed once; the result is cached in memory and
+    in SEED_CACHE_PATH, keyed by the seed file's mtime and size.
+    """
+    seed_file = SEED_CHECKLIST_PATH
 
     if not os.path.exists(seed_file):
         # Fallback to minimal data
@@ -188,24 +384,32 @@ def get_seed_checklist_gcg():
             {"aspek": "ASPEK VI. Lainnya", "deskripsi": "Penghargaan-penghargaan lainnya"},
         ]
 
-    # Parse the TypeScript file
-    checklist = []
-    with open(seed_file, 'r', encoding='utf-8') as f:
-        content = f.read()
+    stat = os.stat(seed_file)
+    cache_key = [stat.st_mtime_ns, stat.st_size]
+    if _seed_checklist_memo.get('key') == cache_key:
+        return _seed_checklist_memo['checklist']
+
+    checklist = _read_seed_cache(cache_key)
+    if checklist is None:
+        # Parse the TypeScript file
+        with open(seed_file, 'r', encoding='utf-8') as f:
+            content = f.read()
 
         # Extract all objects with id, aspek, deskripsi
-        pattern = r'\{\s*id:\s*(\d+),\s*aspek:\s*"([^"]+)",\s*deskripsi:\s*"([^"]+)"\s*\}'
-        matches = re.findall(pattern, content)
+        checklist = [
+            {"aspek": match[1], "deskripsi": match[2]}
+            for match in _SEED_CHECKLIST_PATTERN.findall(content)
+        ]
+        if checklist:
+            _write_seed_cache(cache_key, checklist)
 
-        for match in matches:
-            checklist.append({
-                "aspek": match[1],
-                "deskripsi": match[2]
-            })
+    if not checklist:
+        return [
+            {"aspek": "ASPEK I. Komitmen", "deskripsi": "Pedoman Tata Kelola Perusahaan yang Baik/CoCG"}
+        ]
 
-    return checklist if checklist else [
-        {"aspek": "ASPEK I. Komitmen", "deskripsi": "Pedoman Tata Kelola Perusahaan yang Baik/CoCG"}
-    ]
+    _seed_checklist_memo.update(key=cache_key, checklist=checklist)
+    return checklist
 
 
 def get_seed_direktorat():
@@ -257,8 +461,7 @@ def reset_database():
         os.remove(DB_PATH)
         print(f"Deleted existing database: {DB_PATH}")
 
-    init_database()
-    seed_database()
+    bootstrap_database()
 
 
 if __name__ == "__main__":
@@ -274,8 +477,7 @@ if __name__ == "__main__":
     else:
         # Normal initialization
         if not os.path.exists(DB_PATH):
-            init_database()
-            seed_database()
+            bootstrap_database()
         else:
             print(f"Database already exists at: {DB_PATH}")
             print("Run 'python database.py reset' to reset the database")
@@ -20,8 +20,27 @@ CREATE TABLE IF NOT EXISTS users (
     is_active BOOLEAN DEFAULT 1
 );
 
-CREATE INDEX idx_users_email ON users(email);
-CREATE INDEX idx_users_role ON users(role);
+CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
+CREATE INDEX IF NOT EXISTS idx_users_role ON users(role);
+
+-- Revoked session tokens (tokens are signed and expire on their own;
+-- only logouts before expiry need to be remembered)
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    jti TEXT PRIMARY KEY,
+    user_email TEXT,
+    revoked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    expires_at INTEGER NOT NULL -- unix time, row can be purged afterwards
+);
+
+CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires ON revoked_tokens(expires_at);
+
+-- Secrets generated at runtime that every worker must share
+-- (e.g. the session signing key when SESSION_SECRET_KEY is not set)
+CREATE TABLE IF NOT EXISTS app_secrets (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
 
 -- ============================================
 -- 2. YEAR MANAGEMENT
@@ -48,8 +67,8 @@ CREATE TABLE IF NOT EXISTS direktorat (
     FOREIGN KEY (tahun) REFERENCES years(year) ON DELETE CASCADE
 );
 
-CREATE INDEX idx_direktorat_tahun ON direktorat(tahun);
-CREATE INDEX idx_direktorat_active ON direktorat(is_active);
+CREATE INDEX IF NOT EXISTS idx_direktorat_tahun ON direktorat(tahun);
+CREATE INDEX IF NOT EXISTS idx_direktorat_active ON direktorat(is_active);
 
 -- Subdirektorat (Sub-directorate)
 CREATE TABLE IF NOT EXISTS subdirektorat (
@@ -64,8 +83,9 @@ CREATE TABLE IF NOT EXISTS subdirektorat (
     FOREIGN KEY (tahun) REFERENCES years(year) ON DELETE CASCADE
 );
 
-CREATE INDEX idx_subdirektorat_direktorat ON subdirektorat(direktorat_id);
-CREATE INDEX idx_subdirektorat_tahun ON subdirektorat(tahun);
+CREATE INDEX IF NOT EXISTS idx_subdirektorat_direktorat ON subdirektorat(direktorat_id);
+CREATE INDEX IF NOT EXISTS idx_subdirektorat_tahun ON subdirektorat(tahun);
+CREATE INDEX IF NOT EXISTS idx_subdirektorat_nama ON subdirektorat(nama);
 
 -- Divisi (Division)
 CREATE TABLE IF NOT EXISTS divisi (
@@ -80,8 +100,9 @@ CREATE TABLE IF NOT EXISTS divisi (
     FOREIGN KEY (tahun) REFERENCES years(year) ON DELETE CASCADE
 );
 
-CREATE INDEX idx_divisi_subdirektorat ON divisi(subdirektorat_id);
-CREATE INDEX idx_divisi_tahun ON divisi(tahun);
+CREATE INDEX IF NOT EXISTS idx_divisi_subdirektorat ON divisi(subdirektorat_id);
+CREATE INDEX IF NOT EXISTS idx_divisi_tahun ON divisi(tahun);
+CREATE INDEX IF NOT EXISTS idx_divisi_nama ON divisi(nama);
 
 -- Anak Perusahaan (Subsidiary Companies)
 CREATE TABLE IF NOT EXISTS anak_perusahaan (
@@ -95,8 +116,8 @@ CREATE TABLE IF NOT EXISTS anak_perusahaan (
     FOREIGN KEY (tahun) REFERENCES years(year) ON DELETE CASCADE
 );
 
-CREATE INDEX idx_anak_perusahaan_kategori ON anak_perusahaan(kategori);
-CREATE INDEX idx_anak_perusahaan_tahun ON anak_perusahaan(tahun);
+CREATE INDEX IF NOT EXISTS idx_anak_perusahaan_kategori ON anak_perusahaan(kategori);
+CREATE INDEX IF NOT EXISTS idx_anak_perusahaan_tahun ON anak_perusahaan(tahun);
 
 -- ============================================
 -- 4. GCG CHECKLIST & DOCUMENTS
@@ -115,8 +136,8 @@ CREATE TABLE IF NOT EXISTS aspek_master (
     UNIQUE(nama, tahun)
 );
 
-CREATE INDEX idx_aspek_master_tahun ON aspek_master(tahun);
-CREATE INDEX idx_aspek_master_active ON aspek_master(is_active);
+CREATE INDEX IF NOT EXISTS idx_aspek_master_tahun ON aspek_master(tahun);
+CREATE INDEX IF NOT EXISTS idx_aspek_master_active ON aspek_master(is_active);
 
 -- GCG Checklist (268 items per year)
 CREATE TABLE IF NOT EXISTS checklist_gcg (
@@ -124,13 +145,26 @@ CREATE TABLE IF NOT EXISTS checklist_gcg (
     aspek TEXT NOT NULL, -- "ASPEK I. Komitmen", etc.
     deskripsi TEXT NOT NULL,
     tahun INTEGER NOT NULL,
+    row_number INTEGER, -- 1-based position within the year (the rowNumber batch imports are keyed on)
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     is_active BOOLEAN DEFAULT 1,
     FOREIGN KEY (tahun) REFERENCES years(year) ON DELETE CASCADE
 );
 
-CREATE INDEX idx_checklist_aspek ON checklist_gcg(aspek);
-CREATE INDEX idx_checklist_tahun ON checklist_gcg(tahun);
+CREATE INDEX IF NOT EXISTS idx_checklist_aspek ON checklist_gcg(aspek);
+CREATE INDEX IF NOT EXISTS idx_checklist_tahun ON checklist_gcg(tahun);
+CREATE INDEX IF NOT EXISTS idx_checklist_tahun_aspek ON checklist_gcg(tahun, aspek);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_checklist_tahun_row ON checklist_gcg(tahun, row_number);
+
+-- Items inserted without a row number go after the last one of their year
+CREATE TRIGGER IF NOT EXISTS trg_checklist_row_number
+AFTER INSERT ON checklist_gcg
+WHEN NEW.row_number IS NULL
+BEGIN
+    UPDATE checklist_gcg
+    SET row_number = (SELECT COALESCE(MAX(row_number), 0) + 1 FROM checklist_gcg WHERE tahun = NEW.tahun)
+    WHERE id = NEW.id;
+END;
 
 -- Document Metadata
 CREATE TABLE IF NOT EXISTS document_metadata (
@@ -162,9 +196,9 @@ CREATE TABLE IF NOT EXISTS document_metadata (
     FOREIGN KEY (checklist_id) REFERENCES checklist_gcg(id) ON DELETE SET NULL
 );
 
-CREATE INDEX idx_document_year ON document_metadata(year);
-CREATE INDEX idx_document_type ON document_metadata(document_type);
-CREATE INDEX idx_document_checklist ON document_metadata(checklist_id);
+CREATE INDEX IF NOT EXISTS idx_document_year ON document_metadata(year);
+CREATE INDEX IF NOT EXISTS idx_document_type ON document_metadata(document_type);
+CREATE INDEX IF NOT EXISTS idx_document_checklist ON document_metadata(checklist_id);
 
 -- Uploaded Files Tracking
 CREATE TABLE IF NOT EXISTS uploaded_files (
@@ -177,12 +211,33 @@ CREATE TABLE IF NOT EXISTS uploaded_files (
     checklist_description TEXT,
     aspect TEXT,
     status TEXT DEFAULT 'uploaded' CHECK(status IN ('uploaded', 'pending')),
+    file_path TEXT,
+    catatan TEXT, -- Catatan from the uploader
     FOREIGN KEY (year) REFERENCES years(year) ON DELETE CASCADE,
     FOREIGN KEY (checklist_id) REFERENCES checklist_gcg(id) ON DELETE SET NULL
 );
 
-CREATE INDEX idx_uploaded_files_year ON uploaded_files(year);
-CREATE INDEX idx_uploaded_files_status ON uploaded_files(status);
+CREATE INDEX IF NOT EXISTS idx_uploaded_files_year ON uploaded_files(year);
+CREATE INDEX IF NOT EXISTS idx_uploaded_files_status ON uploaded_files(status);
+CREATE INDEX IF NOT EXISTS idx_uploaded_files_checklist ON uploaded_files(checklist_id, year);
+
+-- Text extracted from stored documents (data/gcg-documents, data/aoi-documents)
+-- for the document_text FTS index; content_hash makes re-indexing incremental
+CREATE TABLE IF NOT EXISTS document_contents (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    file_path TEXT NOT NULL UNIQUE, -- relative to data/
+    tahun INTEGER,
+    content_hash TEXT,
+    file_size INTEGER,
+    file_mtime_ns INTEGER,
+    extractor TEXT,
+    status TEXT DEFAULT 'indexed' CHECK(status IN ('indexed', 'empty', 'unsupported', 'error')),
+    error TEXT,
+    char_count INTEGER DEFAULT 0,
+    indexed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_document_contents_tahun ON document_contents(tahun);
 
 -- ============================================
 -- 5. GCG PERFORMANCE ASSESSMENT (from Excel)
@@ -201,8 +256,8 @@ CREATE TABLE IF NOT EXISTS gcg_aspects_config (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
-CREATE INDEX idx_gcg_config_level ON gcg_aspects_config(level);
-CREATE INDEX idx_gcg_config_type ON gcg_aspects_config(type);
+CREATE INDEX IF NOT EXISTS idx_gcg_config_level ON gcg_aspects_config(level);
+CREATE INDEX IF NOT EXISTS idx_gcg_config_type ON gcg_aspects_config(type);
 
 -- GCG Assessment Results (replaces output.xlsx)
 CREATE TABLE IF NOT EXISTS gcg_assessments (
@@ -223,8 +278,8 @@ CREATE TABLE IF NOT EXISTS gcg_assessments (
     FOREIGN KEY (created_by) REFERENCES users(id) ON DELETE SET NULL
 );
 
-CREATE INDEX idx_gcg_assessments_year ON gcg_assessments(year);
-CREATE INDEX idx_gcg_assessments_config ON gcg_assessments(config_id);
+CREATE INDEX IF NOT EXISTS idx_gcg_assessments_year ON gcg_assessments(year);
+CREATE INDEX IF NOT EXISTS idx_gcg_assessments_config ON gcg_assessments(config_id);
 
 -- GCG Assessment Summary (aggregated results)
 CREATE TABLE IF NOT EXISTS gcg_assessment_summary (
@@ -241,7 +296,39 @@ CREATE TABLE IF NOT EXISTS gcg_assessment_summary (
     UNIQUE(year, aspek)
 );
 
-CREATE INDEX idx_summary_year ON gcg_assessment_summary(year);
+CREATE INDEX IF NOT EXISTS idx_summary_year ON gcg_assessment_summary(year);
+
+-- Materialized GCG trend per year (recomputed from output.xlsx for the saved/deleted year only)
+CREATE TABLE IF NOT EXISTS gcg_trend_years (
+    year INTEGER PRIMARY KEY,
+    total_bobot REAL,
+    total_skor REAL,
+    total_capaian REAL,
+    kategori TEXT, -- TOTAL row penjelasan, e.g. "Sangat Baik"
+    penilai TEXT,
+    jenis_penilaian TEXT,
+    aspect_count INTEGER DEFAULT 0,
+    best_aspect TEXT, -- section with the highest capaian
+    worst_aspect TEXT, -- section with the lowest capaian
+    skor_delta REAL, -- vs previous year with data
+    capaian_delta REAL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Materialized GCG trend per aspect (subtotal rows of output.xlsx)
+CREATE TABLE IF NOT EXISTS gcg_trend_aspects (
+    year INTEGER NOT NULL,
+    section TEXT NOT NULL,
+    deskripsi TEXT,
+    bobot REAL,
+    skor REAL,
+    capaian REAL,
+    skor_delta REAL, -- vs the same section in the previous year with data
+    capaian_delta REAL,
+    PRIMARY KEY (year, section)
+);
+
+CREATE INDEX IF NOT EXISTS idx_gcg_trend_aspects_section ON gcg_trend_aspects(section, year);
 
 -- ============================================
 -- 6. CHECKLIST ASSIGNMENTS (from PengaturanBaru)
@@ -262,9 +349,9 @@ CREATE TABLE IF NOT EXISTS checklist_assignments (
     UNIQUE(checklist_id, tahun)
 );
 
-CREATE INDEX idx_assignments_checklist ON checklist_assignments(checklist_id);
-CREATE INDEX idx_assignments_tahun ON checklist_assignments(tahun);
-CREATE INDEX idx_assignments_subdirektorat ON checklist_assignments(subdirektorat);
+CREATE INDEX IF NOT EXISTS idx_assignments_checklist ON checklist_assignments(checklist_id);
+CREATE INDEX IF NOT EXISTS idx_assignments_tahun ON checklist_assignments(tahun);
+CREATE INDEX IF NOT EXISTS idx_assignments_subdirektorat ON checklist_assignments(subdirektorat);
 
 -- ============================================
 -- 7. AUDIT & CHANGE TRACKING
@@ -283,9 +370,23 @@ CREATE TABLE IF NOT EXISTS audit_log (
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL
 );
 
-CREATE INDEX idx_audit_table ON audit_log(table_name);
-CREATE INDEX idx_audit_action ON audit_log(action);
-CREATE INDEX idx_audit_created ON audit_log(created_at);
+CREATE INDEX IF NOT EXISTS idx_audit_table ON audit_log(table_name);
+CREATE INDEX IF NOT EXISTS idx_audit_action ON audit_log(action);
+CREATE INDEX IF NOT EXISTS idx_audit_created ON audit_log(created_at);
+
+-- Change log for incremental client refresh (GET /api/changes?since=<seq>).
+-- Written by triggers on the tracked tables (see change_log.py) and by the
+-- CSV-backed endpoints; data holds the entity for CSV-backed changes.
+CREATE TABLE IF NOT EXISTS change_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    entity TEXT NOT NULL,
+    entity_id TEXT NOT NULL,
+    op TEXT NOT NULL CHECK(op IN ('insert', 'update', 'delete')),
+    data TEXT, -- JSON
+    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_change_log_entity ON change_log(entity, seq);
 
 -- ============================================
 -- 8. EXCEL EXPORT TRACKING (for your boss!)
@@ -302,14 +403,82 @@ CREATE TABLE IF NOT EXISTS excel_exports (
     export_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     row_count INTEGER,
     file_size INTEGER,
+    data_version TEXT, -- Table versions the file was built from (export_jobs cache key)
     FOREIGN KEY (exported_by) REFERENCES users(id) ON DELETE SET NULL
 );
 
-CREATE INDEX idx_exports_type ON excel_exports(export_type);
-CREATE INDEX idx_exports_date ON excel_exports(export_date);
+CREATE INDEX IF NOT EXISTS idx_exports_type ON excel_exports(export_type);
+CREATE INDEX IF NOT EXISTS idx_exports_date ON excel_exports(export_date);
 
 -- ============================================
--- 9. VIEWS FOR COMMON QUERIES
+-- 9. AREA OF IMPROVEMENT (AOI)
+-- ============================================
+
+-- AOI tables (previously config/aoi-tables.csv)
+CREATE TABLE IF NOT EXISTS aoi_tables (
+    id INTEGER PRIMARY KEY,
+    nama TEXT NOT NULL,
+    tahun INTEGER NOT NULL,
+    target_type TEXT, -- 'direktorat', 'subdirektorat', 'divisi'
+    target_direktorat TEXT,
+    target_subdirektorat TEXT,
+    target_divisi TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    status TEXT DEFAULT 'active'
+);
+
+CREATE INDEX IF NOT EXISTS idx_aoi_tables_tahun ON aoi_tables(tahun);
+CREATE INDEX IF NOT EXISTS idx_aoi_tables_divisi ON aoi_tables(target_divisi);
+CREATE INDEX IF NOT EXISTS idx_aoi_tables_subdirektorat ON aoi_tables(target_subdirektorat);
+CREATE INDEX IF NOT EXISTS idx_aoi_tables_direktorat ON aoi_tables(target_direktorat);
+
+-- AOI recommendations (previously config/aoi-recommendations.csv)
+CREATE TABLE IF NOT EXISTS aoi_recommendations (
+    id INTEGER PRIMARY KEY,
+    aoi_table_id INTEGER,
+    jenis TEXT DEFAULT 'REKOMENDASI',
+    no INTEGER,
+    isi TEXT,
+    tingkat_urgensi TEXT,
+    aspek_aoi TEXT,
+    pihak_terkait TEXT,
+    organ_perusahaan TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    status TEXT DEFAULT 'active'
+);
+
+CREATE INDEX IF NOT EXISTS idx_aoi_recommendations_table ON aoi_recommendations(aoi_table_id, no);
+
+-- AOI supporting documents (previously config/aoi-documents.csv)
+CREATE TABLE IF NOT EXISTS aoi_documents (
+    id TEXT PRIMARY KEY,
+    file_name TEXT,
+    file_size INTEGER,
+    upload_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    aoi_recommendation_id INTEGER,
+    aoi_jenis TEXT,
+    aoi_urutan INTEGER,
+    user_id TEXT,
+    user_direktorat TEXT,
+    user_subdirektorat TEXT,
+    user_divisi TEXT,
+    file_type TEXT,
+    status TEXT DEFAULT 'active',
+    tahun INTEGER,
+    file_path TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_aoi_documents_recommendation ON aoi_documents(aoi_recommendation_id);
+CREATE INDEX IF NOT EXISTS idx_aoi_documents_tahun ON aoi_documents(tahun);
+
+-- One-time data migrations that have already been applied
+CREATE TABLE IF NOT EXISTS data_migrations (
+    name TEXT PRIMARY KEY,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- ============================================
+-- 10. VIEWS FOR COMMON QUERIES
 -- ============================================
 
 -- Complete organizational hierarchy view
@@ -358,3 +527,168 @@ SELECT
 FROM checklist_gcg c
 LEFT JOIN document_metadata d ON c.id = d.checklist_id AND c.tahun = d.year
 GROUP BY c.tahun, c.aspek;
+
+-- ============================================
+-- 11. CHECKLIST COMPLETION COUNTERS
+-- ============================================
+
+-- Required vs uploaded checklist items per (tahun, aspek, subdirektorat).
+-- Kept current by the triggers below, which recompute only the (tahun, aspek)
+-- group touched by a write, so dashboards read O(aspects) rows.
+CREATE TABLE IF NOT EXISTS checklist_completion (
+    tahun INTEGER NOT NULL,
+    aspek TEXT NOT NULL,
+    subdirektorat TEXT NOT NULL DEFAULT '', -- '' = not assigned to a subdirektorat
+    total_required INTEGER NOT NULL DEFAULT 0,
+    total_uploaded INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (tahun, aspek, subdirektorat)
+);
+
+-- Source aggregate for the counters; an item counts as uploaded when it has an
+-- uploaded file or a non-deleted document for its year
+CREATE VIEW IF NOT EXISTS v_checklist_completion_source AS
+SELECT
+    c.tahun,
+    c.aspek,
+    COALESCE(a.subdirektorat, '') as subdirektorat,
+    COUNT(c.id) as total_required,
+    SUM(
+        EXISTS (SELECT 1 FROM uploaded_files u WHERE u.checklist_id = c.id AND u.year = c.tahun)
+        OR EXISTS (SELECT 1 FROM document_metadata d
+                   WHERE d.checklist_id = c.id AND d.year = c.tahun AND COALESCE(d.status, '') != 'deleted')
+    ) as total_uploaded
+FROM checklist_gcg c
+LEFT JOIN checklist_assignments a ON c.id = a.checklist_id AND c.tahun = a.tahun
+WHERE c.is_active = 1
+GROUP BY c.tahun, c.aspek, COALESCE(a.subdirektorat, '');
+
+CREATE TRIGGER IF NOT EXISTS trg_completion_checklist_insert
+AFTER INSERT ON checklist_gcg
+BEGIN
+    DELETE FROM checklist_completion WHERE tahun = NEW.tahun AND aspek = NEW.aspek;
+    INSERT INTO checklist_completion (tahun, aspek, subdirektorat, total_required, total_uploaded)
+    SELECT tahun, aspek, subdirektorat, total_required, total_uploaded
+    FROM v_checklist_completion_source WHERE tahun = NEW.tahun AND aspek = NEW.aspek;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_completion_checklist_update
+AFTER UPDATE OF aspek, tahun, is_active ON checklist_gcg
+BEGIN
+    DELETE FROM checklist_completion WHERE tahun = OLD.tahun AND aspek = OLD.aspek;
+    INSERT INTO checklist_completion (tahun, aspek, subdirektorat, total_required, total_uploaded)
+    SELECT tahun, aspek, subdirektorat, total_required, total_uploaded
+    FROM v_checklist_completion_source WHERE tahun = OLD.tahun AND aspek = OLD.aspek;
+    DELETE FROM checklist_completion WHERE tahun = NEW.tahun AND aspek = NEW.aspek;
+    INSERT INTO checklist_completion (tahun, aspek, subdirektorat, total_required, total_uploaded)
+    SELECT tahun, aspek, subdirektorat, total_required, total_uploaded
+    FROM v_checklist_completion_source WHERE tahun = NEW.tahun AND aspek = NEW.aspek;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_completion_checklist_delete
+AFTER DELETE ON checklist_gcg
+BEGIN
+    DELETE FROM checklist_completion WHERE tahun = OLD.tahun AND aspek = OLD.aspek;
+    INSERT INTO checklist_completion (tahun, aspek, subdirektorat, total_required, total_uploaded)
+    SELECT tahun, aspek, subdirektorat, total_required, total_uploaded
+    FROM v_checklist_completion_source WHERE tahun = OLD.tahun AND aspek = OLD.aspek;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_completion_assignment_insert
+AFTER INSERT ON checklist_assignments
+WHEN NEW.checklist_id IS NOT NULL
+BEGIN
+    DELETE FROM checklist_completion WHERE tahun = NEW.tahun AND aspek = (SELECT aspek FROM checklist_gcg WHERE id = NEW.checklist_id);
+    INSERT INTO checklist_completion (tahun, aspek, subdirektorat, total_required, total_uploaded)
+    SELECT tahun, aspek, subdirektorat, total_required, total_uploaded
+    FROM v_checklist_completion_source WHERE tahun = NEW.tahun AND aspek = (SELECT aspek FROM checklist_gcg WHERE id = NEW.checklist_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_completion_assignment_update
+AFTER UPDATE OF checklist_id, subdirektorat, tahun ON checklist_assignments
+BEGIN
+    DELETE FROM checklist_completion WHERE tahun = OLD.tahun AND aspek = (SELECT aspek FROM checklist_gcg WHERE id = OLD.checklist_id);
+    INSERT INTO checklist_completion (tahun, aspek, subdirektorat, total_required, total_uploaded)
+    SELECT tahun, aspek, subdirektorat, total_required, total_uploaded
+    FROM v_checklist_completion_source WHERE tahun = OLD.tahun AND aspek = (SELECT aspek FROM checklist_gcg WHERE id = OLD.checklist_id);
+    DELETE FROM checklist_completion WHERE tahun = NEW.tahun AND aspek = (SELECT aspek FROM checklist_gcg WHERE id = NEW.checklist_id);
+    INSERT INTO checklist_completion (tahun, aspek, subdirektorat, total_required, total_uploaded)
+    SELECT tahun, aspek, subdirektorat, total_required, total_uploaded
+    FROM v_checklist_completion_source WHERE tahun = NEW.tahun AND aspek = (SELECT aspek FROM checklist_gcg WHERE id = NEW.checklist_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_completion_assignment_delete
+AFTER DELETE ON checklist_assignments
+WHEN OLD.checklist_id IS NOT NULL
+BEGIN
+    DELETE FROM checklist_completion WHERE tahun = OLD.tahun AND aspek = (SELECT aspek FROM checklist_gcg WHERE id = OLD.checklist_id);
+    INSERT INTO checklist_completion (tahun, aspek, subdirektorat, total_required, total_uploaded)
+    SELECT tahun, aspek, subdirektorat, total_required, total_uploaded
+    FROM v_checklist_completion_source WHERE tahun = OLD.tahun AND aspek = (SELECT aspek FROM checklist_gcg WHERE id = OLD.checklist_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_completion_upload_insert
+AFTER INSERT ON uploaded_files
+WHEN NEW.checklist_id IS NOT NULL
+BEGIN
+    DELETE FROM checklist_completion WHERE tahun = NEW.year AND aspek = (SELECT aspek FROM checklist_gcg WHERE id = NEW.checklist_id);
+    INSERT INTO checklist_completion (tahun, aspek, subdirektorat, total_required, total_uploaded)
+    SELECT tahun, aspek, subdirektorat, total_required, total_uploaded
+    FROM v_checklist_completion_source WHERE tahun = NEW.year AND aspek = (SELECT aspek FROM checklist_gcg WHERE id = NEW.checklist_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_completion_upload_update
+AFTER UPDATE OF checklist_id, year, status ON uploaded_files
+BEGIN
+    DELETE FROM checklist_completion WHERE tahun = OLD.year AND aspek = (SELECT aspek FROM checklist_gcg WHERE id = OLD.checklist_id);
+    INSERT INTO checklist_completion (tahun, aspek, subdirektorat, total_required, total_uploaded)
+    SELECT tahun, aspek, subdirektorat, total_required, total_uploaded
+    FROM v_checklist_completion_source WHERE tahun = OLD.year AND aspek = (SELECT aspek FROM checklist_gcg WHERE id = OLD.checklist_id);
+    DELETE FROM checklist_completion WHERE tahun = NEW.year AND aspek = (SELECT aspek FROM checklist_gcg WHERE id = NEW.checklist_id);
+    INSERT INTO checklist_completion (tahun, aspek, subdirektorat, total_required, total_uploaded)
+    SELECT tahun, aspek, subdirektorat, total_required, total_uploaded
+    FROM v_checklist_completion_source WHERE tahun = NEW.year AND aspek = (SELECT aspek FROM checklist_gcg WHERE id = NEW.checklist_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_completion_upload_delete
+AFTER DELETE ON uploaded_files
+WHEN OLD.checklist_id IS NOT NULL
+BEGIN
+    DELETE FROM checklist_completion WHERE tahun = OLD.year AND aspek = (SELECT aspek FROM checklist_gcg WHERE id = OLD.checklist_id);
+    INSERT INTO checklist_completion (tahun, aspek, subdirektorat, total_required, total_uploaded)
+    SELECT tahun, aspek, subdirektorat, total_required, total_uploaded
+    FROM v_checklist_completion_source WHERE tahun = OLD.year AND aspek = (SELECT aspek FROM checklist_gcg WHERE id = OLD.checklist_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_completion_document_insert
+AFTER INSERT ON document_metadata
+WHEN NEW.checklist_id IS NOT NULL
+BEGIN
+    DELETE FROM checklist_completion WHERE tahun = NEW.year AND aspek = (SELECT aspek FROM checklist_gcg WHERE id = NEW.checklist_id);
+    INSERT INTO checklist_completion (tahun, aspek, subdirektorat, total_required, total_uploaded)
+    SELECT tahun, aspek, subdirektorat, total_required, total_uploaded
+    FROM v_checklist_completion_source WHERE tahun = NEW.year AND aspek = (SELECT aspek FROM checklist_gcg WHERE id = NEW.checklist_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_completion_document_update
+AFTER UPDATE OF checklist_id, year, status ON document_metadata
+BEGIN
+    DELETE FROM checklist_completion WHERE tahun = OLD.year AND aspek = (SELECT aspek FROM checklist_gcg WHERE id = OLD.checklist_id);
+    INSERT INTO checklist_completion (tahun, aspek, subdirektorat, total_required, total_uploaded)
+    SELECT tahun, aspek, subdirektorat, total_required, total_uploaded
+    FROM v_checklist_completion_source WHERE tahun = OLD.year AND aspek = (SELECT aspek FROM checklist_gcg WHERE id = OLD.checklist_id);
+    DELETE FROM checklist_completion WHERE tahun = NEW.year AND aspek = (SELECT aspek FROM checklist_gcg WHERE id = NEW.checklist_id);
+    INSERT INTO checklist_completion (tahun, aspek, subdirektorat, total_required, total_uploaded)
+    SELECT tahun, aspek, subdirektorat, total_required, total_uploaded
+    FROM v_checklist_completion_source WHERE tahun = NEW.year AND aspek = (SELECT aspek FROM checklist_gcg WHERE id = NEW.checklist_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_completion_document_delete
+AFTER DELETE ON document_metadata
+WHEN OLD.checklist_id IS NOT NULL
+BEGIN
+    DELETE FROM checklist_completion WHERE tahun = OLD.year AND aspek = (SELECT aspek FROM checklist_gcg WHERE id = OLD.checklist_id);
+    INSERT INTO checklist_completion (tahun, aspek, subdirektorat, total_required, total_uploaded)
+    SELECT tahun, aspek, subdirektorat, total_required, total_uploaded
+    FROM v_checklist_completion_source WHERE tahun = OLD.year AND aspek = (SELECT aspek FROM checklist_gcg WHERE id = OLD.checklist_id);
+END;
@@ -6,9 +6,31 @@ Your boss will love this! 📊
 
 import pandas as pd
 from datetime import datetime
+import itertools
 import os
-from typing import Optional, Dict, Any, List
-from database import get_db_connection
+import queue
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Iterable, Iterator, Tuple, Union
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, PatternFill
+from openpyxl.utils import get_column_letter
+from database import get_db_connection, get_checklist_completion
+
+# Rows fetched from SQLite and streamed into a sheet at a time
+EXPORT_CHUNK_ROWS = 5000
+MAX_COLUMN_WIDTH = 50
+# Queries of a multi-sheet export run concurrently, each on its own read connection,
+# fetching at most PREFETCH_CHUNKS chunks ahead of the sheet being written
+EXPORT_QUERY_WORKERS = 3
+PREFETCH_CHUNKS = 2
+_END_OF_QUERY = object()
+
+HEADER_FILL = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+HEADER_FONT = Font(color="FFFFFF", bold=True)
+HEADER_ALIGNMENT = Alignment(horizontal="center", vertical="center")
 
 
 class ExcelExporter:
@@ -19,10 +41,10 @@ class ExcelExporter:
         os.makedirs(self.export_dir, exist_ok=True)
 
     def _generate_filename(self, export_type: str, year: Optional[int] = None) -> str:
-        """Generate timestamped filename"""
+        """Generate timestamped filename (with a random suffix, so same-second exports never share a file)"""
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         year_suffix = f"_{year}" if year else ""
-        return f"{export_type}{year_suffix}_{timestamp}.xlsx"
+        return f"{export_type}{year_suffix}_{timestamp}_{uuid.uuid4().hex[:8]}.xlsx"
 
     def _track_export(self, conn, export_type: str, file_name: str, file_path: str,
                       year: Optional[int], filters: Dict, exported_by: Optional[int],
@@ -37,16 +59,105 @@ class ExcelExporter:
         """, (export_type, file_name, file_path, year, json.dumps(filters),
               exported_by, row_count, file_size))
 
-    def export_users(self, exported_by: Optional[int] = None) -> str:
-        """Export all users to Excel"""
-        with get_db_connection() as conn:
-            query = """
+    def export_queries(self, export_type: str, year: Optional[int] = None) -> List[Tuple[str, str, tuple]]:
+        """(sheet name, SQL, params) of each sheet of an export, in workbook order
+
+        The workbooks below and the streamed CSV/ZIP exports (csv_export) read the
+        same statements; the CSVs carry the raw values without Excel-only formatting.
+        export_type: 'users', 'checklist', 'documents', 'org_structure', 'gcg_assessment', 'all'
+        """
+        current_year = year or datetime.now().year
+
+        if export_type == 'users':
+            return [('Users', """
                 SELECT id, email, role, name, direktorat, subdirektorat, divisi,
                        created_at, is_active
                 FROM users
                 ORDER BY role, name
-            """
-            df = pd.read_sql_query(query, conn)
+            """, ())]
+
+        if export_type == 'checklist':
+            year_filter = " AND c.tahun = ?" if year else ""
+            params = (year,) if year else ()
+            return [('Checklist GCG', f"""
+                SELECT c.id, c.aspek, c.deskripsi, c.tahun,
+                       COUNT(d.id) as documents_uploaded,
+                       CASE WHEN COUNT(d.id) > 0 THEN 'Complete' ELSE 'Pending' END as status
+                FROM checklist_gcg c
+                LEFT JOIN document_metadata d ON c.id = d.checklist_id
+                WHERE c.is_active = 1{year_filter}
+                GROUP BY c.id ORDER BY c.tahun DESC, c.aspek, c.id
+            """, params), ('Summary by Aspect', f"""
+                SELECT tahun AS "Tahun", aspek AS "Aspek",
+                       SUM(total_required) AS "Total Items",
+                       SUM(total_uploaded) AS "Items Uploaded",
+                       ROUND(CAST(SUM(total_uploaded) AS REAL) / SUM(total_required) * 100, 2) AS "Completion %"
+                FROM checklist_completion c
+                WHERE 1=1{year_filter}
+                GROUP BY tahun, aspek ORDER BY tahun DESC, aspek
+            """, params)]
+
+        if export_type == 'documents':
+            where = "WHERE d.year = ?" if year else "WHERE 1=1"
+            params = (year,) if year else ()
+            return [('Documents', f"""
+                SELECT d.*, c.aspek as checklist_aspek
+                FROM document_metadata d
+                LEFT JOIN checklist_gcg c ON d.checklist_id = c.id
+                {where}
+                ORDER BY d.year DESC, d.upload_date DESC
+            """, params), ('Summary', f"""
+                SELECT d.year, d.document_type, COUNT(*) as count
+                FROM document_metadata d
+                {where} AND d.year IS NOT NULL AND d.document_type IS NOT NULL
+                GROUP BY d.year, d.document_type
+                ORDER BY d.year, d.document_type
+            """, params)]
+
+        if export_type == 'org_structure':
+            return [
+                ('Direktorat', "SELECT * FROM direktorat WHERE tahun = ? AND is_active = 1 ORDER BY nama",
+                 (current_year,)),
+                ('Subdirektorat', "SELECT * FROM subdirektorat WHERE tahun = ? AND is_active = 1 ORDER BY nama",
+                 (current_year,)),
+                ('Divisi', "SELECT * FROM divisi WHERE tahun = ? AND is_active = 1 ORDER BY nama",
+                 (current_year,)),
+                ('Anak Perusahaan', "SELECT * FROM anak_perusahaan WHERE tahun = ? AND is_active = 1 "
+                                    "ORDER BY kategori, nama", (current_year,)),
+            ]
+
+        if export_type == 'gcg_assessment':
+            return [
+                ('Assessment Detail', "SELECT * FROM v_gcg_assessment_detail WHERE year = ? ORDER BY level, section",
+                 (current_year,)),
+                ('Summary', "SELECT * FROM gcg_assessment_summary WHERE year = ? ORDER BY aspek", (current_year,)),
+            ]
+
+        if export_type == 'all':
+            # ORDER BY keeps the rows of every run in the same order
+            return [
+                # 1. Users
+                ('Users', "SELECT * FROM users WHERE is_active = 1 ORDER BY id", ()),
+                # 2. Checklist
+                ('Checklist GCG', "SELECT * FROM checklist_gcg WHERE tahun = ? ORDER BY id", (current_year,)),
+                # 3. Documents
+                ('Documents', "SELECT * FROM document_metadata WHERE year = ? ORDER BY id", (current_year,)),
+                # 4. Organizational Structure
+                ('Direktorat', "SELECT * FROM direktorat WHERE tahun = ? ORDER BY id", (current_year,)),
+                ('Subdirektorat', "SELECT * FROM subdirektorat WHERE tahun = ? ORDER BY id", (current_year,)),
+                ('Anak Perusahaan', "SELECT * FROM anak_perusahaan WHERE tahun = ? ORDER BY id", (current_year,)),
+                # 5. GCG Assessment (sheet only when there is any)
+                ('GCG Assessment', "SELECT * FROM v_gcg_assessment_detail WHERE year = ? ORDER BY id",
+                 (current_year,)),
+            ]
+
+        raise ValueError(f"Unknown export type: {export_type}")
+
+    def export_users(self, exported_by: Optional[int] = None) -> str:
+        """Export all users to Excel"""
+        with get_db_connection() as conn:
+            (_, query, params), = self.export_queries('users')
+            df = pd.read_sql_query(query, conn, params=params)
 
             # Format data
             df['is_active'] = df['is_active'].map({1: 'Active', 0: 'Inactive'})
@@ -55,9 +166,7 @@ class ExcelExporter:
             filename = self._generate_filename('users')
             filepath = os.path.join(self.export_dir, filename)
 
-            with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Users', index=False)
-                self._format_worksheet(writer.sheets['Users'])
+            self._save_workbook([('Users', df)], filepath)
 
             # Track export
             file_size = os.path.getsize(filepath)
@@ -70,40 +179,23 @@ class ExcelExporter:
                             exported_by: Optional[int] = None) -> str:
         """Export GCG checklist to Excel"""
         with get_db_connection() as conn:
-            query = """
-                SELECT c.id, c.aspek, c.deskripsi, c.tahun,
-                       COUNT(d.id) as documents_uploaded,
-                       CASE WHEN COUNT(d.id) > 0 THEN 'Complete' ELSE 'Pending' END as status
-                FROM checklist_gcg c
-                LEFT JOIN document_metadata d ON c.id = d.checklist_id
-                WHERE c.is_active = 1
-            """
-
-            if year:
-                query += f" AND c.tahun = {year}"
-
-            query += " GROUP BY c.id ORDER BY c.tahun DESC, c.aspek, c.id"
-
-            df = pd.read_sql_query(query, conn)
+            _, query, params = self.export_queries('checklist', year)[0]
+            df = pd.read_sql_query(query, conn, params=params)
 
             filename = self._generate_filename('checklist_gcg', year)
             filepath = os.path.join(self.export_dir, filename)
 
-            with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-                # Main checklist
-                df.to_excel(writer, sheet_name='Checklist GCG', index=False)
-                self._format_worksheet(writer.sheets['Checklist GCG'])
-
-                # Summary by aspect
-                summary = df.groupby(['tahun', 'aspek']).agg({
-                    'id': 'count',
-                    'documents_uploaded': 'sum'
-                }).reset_index()
-                summary.columns = ['Tahun', 'Aspek', 'Total Items', 'Documents Uploaded']
-                summary['Completion %'] = (summary['Documents Uploaded'] / summary['Total Items'] * 100).round(2)
+            # Summary by aspect (from the checklist_completion counters)
+            if year:
+                summary_rows = get_checklist_completion(year)
+            else:
+                summary_rows = [row for tahun in sorted(df['tahun'].unique(), reverse=True)
+                                for row in get_checklist_completion(int(tahun))]
+            summary = pd.DataFrame(summary_rows, columns=['tahun', 'aspek', 'total_required',
+                                                          'total_uploaded', 'completion_percentage'])
+            summary.columns = ['Tahun', 'Aspek', 'Total Items', 'Items Uploaded', 'Completion %']
 
-                summary.to_excel(writer, sheet_name='Summary by Aspect', index=False)
-                self._format_worksheet(writer.sheets['Summary by Aspect'])
+            self._save_workbook([('Checklist GCG', df), ('Summary by Aspect', summary)], filepath)
 
             file_size = os.path.getsize(filepath)
             self._track_export(conn, 'checklist_gcg', filename, filepath, year,
@@ -115,35 +207,19 @@ class ExcelExporter:
                         exported_by: Optional[int] = None) -> str:
         """Export document metadata to Excel"""
         with get_db_connection() as conn:
-            query = """
-                SELECT d.*, c.aspek as checklist_aspek
-                FROM document_metadata d
-                LEFT JOIN checklist_gcg c ON d.checklist_id = c.id
-                WHERE 1=1
-            """
-
-            if year:
-                query += f" AND d.year = {year}"
-
-            query += " ORDER BY d.year DESC, d.upload_date DESC"
-
-            df = pd.read_sql_query(query, conn)
+            (_, query, params), (_, summary_query, _) = self.export_queries('documents', year)
+            # Summary is aggregated in SQL so the documents never have to be held in memory
+            summary = pd.read_sql_query(summary_query, conn, params=params)
 
             filename = self._generate_filename('documents', year)
             filepath = os.path.join(self.export_dir, filename)
 
-            with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Documents', index=False)
-                self._format_worksheet(writer.sheets['Documents'])
-
-                # Summary
-                summary = df.groupby(['year', 'document_type']).size().reset_index(name='count')
-                summary.to_excel(writer, sheet_name='Summary', index=False)
-                self._format_worksheet(writer.sheets['Summary'])
+            sheets = [('Documents', self._read_chunks(conn, query, params)), ('Summary', summary)]
+            row_count = self._save_workbook(sheets, filepath) - len(summary)
 
             file_size = os.path.getsize(filepath)
             self._track_export(conn, 'documents', filename, filepath, year,
-                             {'year': year} if year else {}, exported_by, len(df), file_size)
+                             {'year': year} if year else {}, exported_by, row_count, file_size)
 
             return filepath
 
@@ -154,40 +230,12 @@ class ExcelExporter:
             current_year = year or datetime.now().year
 
             # Get data
-            direktorat_query = f"""
-                SELECT * FROM direktorat
-                WHERE tahun = {current_year} AND is_active = 1
-                ORDER BY nama
-            """
-            subdirektorat_query = f"""
-                SELECT * FROM subdirektorat
-                WHERE tahun = {current_year} AND is_active = 1
-                ORDER BY nama
-            """
-            divisi_query = f"""
-                SELECT * FROM divisi
-                WHERE tahun = {current_year} AND is_active = 1
-                ORDER BY nama
-            """
-
-            df_direktorat = pd.read_sql_query(direktorat_query, conn)
-            df_subdirektorat = pd.read_sql_query(subdirektorat_query, conn)
-            df_divisi = pd.read_sql_query(divisi_query, conn)
-
-            # Check if anak_perusahaan table exists
-            cursor = conn.cursor()
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='anak_perusahaan'")
-            has_anak = cursor.fetchone() is not None
-
-            if has_anak:
-                anak_perusahaan_query = f"""
-                    SELECT * FROM anak_perusahaan
-                    WHERE tahun = {current_year} AND is_active = 1
-                    ORDER BY kategori, nama
-                """
-                df_anak = pd.read_sql_query(anak_perusahaan_query, conn)
-            else:
-                df_anak = pd.DataFrame()
+            frames = {sheet_name: pd.read_sql_query(query, conn, params=params)
+                      for sheet_name, query, params in self.export_queries('org_structure', year)}
+            df_direktorat = frames['Direktorat']
+            df_subdirektorat = frames['Subdirektorat']
+            df_divisi = frames['Divisi']
+            df_anak = frames['Anak Perusahaan']
 
             # Check if we have any data
             if df_direktorat.empty and df_subdirektorat.empty and df_divisi.empty:
@@ -196,16 +244,11 @@ class ExcelExporter:
             filename = self._generate_filename('organizational_structure', year)
             filepath = os.path.join(self.export_dir, filename)
 
-            with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-                df_direktorat.to_excel(writer, sheet_name='Direktorat', index=False)
-                df_subdirektorat.to_excel(writer, sheet_name='Subdirektorat', index=False)
-                df_divisi.to_excel(writer, sheet_name='Divisi', index=False)
-
-                if has_anak and not df_anak.empty:
-                    df_anak.to_excel(writer, sheet_name='Anak Perusahaan', index=False)
-
-                for sheet in writer.sheets.values():
-                    self._format_worksheet(sheet)
+            sheets = [('Direktorat', df_direktorat), ('Subdirektorat', df_subdirektorat),
+                      ('Divisi', df_divisi)]
+            if not df_anak.empty:
+                sheets.append(('Anak Perusahaan', df_anak))
+            self._save_workbook(sheets, filepath)
 
             total_rows = len(df_direktorat) + len(df_subdirektorat) + len(df_divisi) + len(df_anak)
             file_size = os.path.getsize(filepath)
@@ -218,36 +261,23 @@ class ExcelExporter:
         """Export GCG assessment results to Excel (replaces output.xlsx)"""
         with get_db_connection() as conn:
             # Detailed assessment data
-            detail_query = f"""
-                SELECT * FROM v_gcg_assessment_detail
-                WHERE year = {year}
-                ORDER BY level, section
-            """
-            df_detail = pd.read_sql_query(detail_query, conn)
+            (_, detail_query, params), (_, summary_query, _) = self.export_queries('gcg_assessment', year)
+            df_detail = pd.read_sql_query(detail_query, conn, params=params)
 
             # Summary data
-            summary_query = f"""
-                SELECT * FROM gcg_assessment_summary
-                WHERE year = {year}
-                ORDER BY aspek
-            """
-            df_summary = pd.read_sql_query(summary_query, conn)
+            df_summary = pd.read_sql_query(summary_query, conn, params=params)
 
             filename = self._generate_filename('gcg_assessment', year)
             filepath = os.path.join(self.export_dir, filename)
 
-            with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-                # Detail sheet
-                df_detail.to_excel(writer, sheet_name='Assessment Detail', index=False)
-                self._format_worksheet(writer.sheets['Assessment Detail'])
-
-                # Summary sheet
-                df_summary.to_excel(writer, sheet_name='Summary', index=False)
-                self._format_worksheet(writer.sheets['Summary'])
+            workbook = Workbook(write_only=True)
+            self._write_sheet(workbook, 'Assessment Detail', df_detail)
+            self._write_sheet(workbook, 'Summary', df_summary)
 
-                # Add chart if data exists
-                if not df_summary.empty:
-                    self._add_chart_sheet(writer, df_summary)
+            # Add chart if data exists
+            if not df_summary.empty:
+                self._add_chart_sheet(workbook, df_summary)
+            workbook.save(filepath)
 
             file_size = os.path.getsize(filepath)
             self._track_export(conn, 'gcg_assessment', filename, filepath, year,
@@ -259,84 +289,137 @@ class ExcelExporter:
                        exported_by: Optional[int] = None) -> str:
         """Export ALL data to a single comprehensive Excel file"""
         with get_db_connection() as conn:
-            current_year = year or datetime.now().year
-
             filename = self._generate_filename('complete_export', year)
             filepath = os.path.join(self.export_dir, filename)
 
-            with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-                # 1. Users
-                df_users = pd.read_sql_query("SELECT * FROM users WHERE is_active = 1", conn)
-                df_users.to_excel(writer, sheet_name='Users', index=False)
-
-                # 2. Checklist
-                df_checklist = pd.read_sql_query(
-                    f"SELECT * FROM checklist_gcg WHERE tahun = {current_year}", conn)
-                df_checklist.to_excel(writer, sheet_name='Checklist GCG', index=False)
+            queries = self.export_queries('all', year)
 
-                # 3. Documents
-                df_docs = pd.read_sql_query(
-                    f"SELECT * FROM document_metadata WHERE year = {current_year}", conn)
-                df_docs.to_excel(writer, sheet_name='Documents', index=False)
-
-                # 4. Organizational Structure
-                df_dir = pd.read_sql_query(
-                    f"SELECT * FROM direktorat WHERE tahun = {current_year}", conn)
-                df_dir.to_excel(writer, sheet_name='Direktorat', index=False)
-
-                df_subdir = pd.read_sql_query(
-                    f"SELECT * FROM subdirektorat WHERE tahun = {current_year}", conn)
-                df_subdir.to_excel(writer, sheet_name='Subdirektorat', index=False)
-
-                df_anak = pd.read_sql_query(
-                    f"SELECT * FROM anak_perusahaan WHERE tahun = {current_year}", conn)
-                df_anak.to_excel(writer, sheet_name='Anak Perusahaan', index=False)
-
-                # 5. GCG Assessment
-                df_gcg = pd.read_sql_query(
-                    f"SELECT * FROM v_gcg_assessment_detail WHERE year = {current_year}", conn)
-                if not df_gcg.empty:
-                    df_gcg.to_excel(writer, sheet_name='GCG Assessment', index=False)
-
-                # Format all sheets
-                for sheet in writer.sheets.values():
-                    self._format_worksheet(sheet)
+            workbook = Workbook(write_only=True)
+            total_rows = 0
+            cancelled = threading.Event()
+            with ThreadPoolExecutor(max_workers=EXPORT_QUERY_WORKERS, thread_name_prefix='export-query') as executor:
+                try:
+                    # Later queries run while earlier sheets are being written
+                    streams = [(sheet_name, self._prefetch_chunks(executor, query, params, cancelled))
+                               for sheet_name, query, params in queries]
+                    for sheet_name, frames in streams:
+                        first = next(frames)
+                        if sheet_name == 'GCG Assessment' and first.empty:
+                            continue
+                        total_rows += self._write_sheet(workbook, sheet_name, itertools.chain([first], frames))
+                finally:
+                    # Release producers still blocked on a full buffer if writing failed
+                    cancelled.set()
+            workbook.save(filepath)
 
             file_size = os.path.getsize(filepath)
-            total_rows = sum([len(df_users), len(df_checklist), len(df_docs),
-                            len(df_dir), len(df_subdir), len(df_anak), len(df_gcg)])
             self._track_export(conn, 'complete_export', filename, filepath, year,
                              {'year': year or 'current'}, exported_by, total_rows, file_size)
 
             return filepath
 
-    def _format_worksheet(self, worksheet):
-        """Apply formatting to Excel worksheet"""
-        from openpyxl.styles import Font, Alignment, PatternFill
+    def _read_chunks(self, conn, query: str, params: Iterable = ()) -> Iterable[pd.DataFrame]:
+        """Query results as DataFrame chunks (at least one, possibly empty, with the columns)"""
+        return pd.read_sql_query(query, conn, params=tuple(params), chunksize=EXPORT_CHUNK_ROWS)
 
-        # Header formatting
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        header_font = Font(color="FFFFFF", bold=True)
+    def _prefetch_chunks(self, executor: ThreadPoolExecutor, query: str, params: Iterable,
+                         cancelled: threading.Event) -> Iterator[pd.DataFrame]:
+        """Run a query on a worker thread with its own connection; yields its chunks in order
 
-        for cell in worksheet[1]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal="center", vertical="center")
+        At most PREFETCH_CHUNKS chunks are buffered, so a query that runs ahead
+        of the writer waits instead of loading its whole table.
+        """
+        buffer: queue.Queue = queue.Queue(maxsize=PREFETCH_CHUNKS)
 
-        # Auto-adjust column widths
-        for column in worksheet.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
+        def put(item) -> bool:
+            while not cancelled.is_set():
                 try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(cell.value)
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            worksheet.column_dimensions[column_letter].width = adjusted_width
-
-    def _add_chart_sheet(self, writer, df_summary):
+                    buffer.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            try:
+                with get_db_connection() as conn:
+                    for chunk in self._read_chunks(conn, query, params):
+                        if not put(chunk):
+                            return
+            except Exception as e:
+                put(e)
+                return
+            put(_END_OF_QUERY)
+
+        executor.submit(produce)
+
+        def consume():
+            while True:
+                item = buffer.get()
+                if item is _END_OF_QUERY:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+
+        return consume()
+
+    def _save_workbook(self, sheets: List[tuple], filepath: str) -> int:
+        """Stream (sheet_name, frames) pairs into a write-only workbook; returns the total row count"""
+        workbook = Workbook(write_only=True)
+        total_rows = sum(self._write_sheet(workbook, sheet_name, frames) for sheet_name, frames in sheets)
+        workbook.save(filepath)
+        return total_rows
+
+    def _column_widths(self, df: pd.DataFrame) -> List[float]:
+        """Column widths from the longest header/value text, computed per column (vectorized)"""
+        text = df.astype(str).where(df.notna(), '')
+        value_lengths = text.apply(lambda values: values.str.len().max()).fillna(0) if len(df) else None
+        widths = []
+        for position, column in enumerate(df.columns):
+            longest = len(str(column))
+            if value_lengths is not None:
+                longest = max(longest, int(value_lengths.iloc[position]))
+            widths.append(min(longest + 2, MAX_COLUMN_WIDTH))
+        return widths
+
+    def _write_sheet(self, workbook: Workbook, sheet_name: str,
+                     frames: Union[pd.DataFrame, Iterable[pd.DataFrame]]) -> int:
+        """Append a sheet and stream the frames into it row by row; returns the row count
+
+        A write-only sheet needs its column widths before the first row, so they are
+        taken from the first chunk (EXPORT_CHUNK_ROWS rows), not from the whole table.
+        """
+        if isinstance(frames, pd.DataFrame):
+            frames = [frames]
+        frames = iter(frames)
+        first = next(frames, None)
+        worksheet = workbook.create_sheet(title=sheet_name)
+        if first is None:
+            return 0
+
+        for position, width in enumerate(self._column_widths(first), start=1):
+            worksheet.column_dimensions[get_column_letter(position)].width = width
+
+        header = []
+        for column in first.columns:
+            cell = WriteOnlyCell(worksheet, value=str(column))
+            cell.fill = HEADER_FILL
+            cell.font = HEADER_FONT
+            cell.alignment = HEADER_ALIGNMENT
+            header.append(cell)
+        worksheet.append(header)
+
+        row_count = 0
+        for chunk in itertools.chain([first], frames):
+            # NaN/NaT -> empty cell
+            values = chunk.astype(object).where(chunk.notna(), None)
+            for row in values.itertuples(index=False, name=None):
+                worksheet.append(row)
+            row_count += len(chunk)
+        return row_count
+
+    def _add_chart_sheet(self, workbook, df_summary):
         """Add visualization sheet with charts"""
         # This would add charts for GCG assessment visualization
         # Keeping it simple for now, can be enhanced later
@@ -0,0 +1,258 @@
+"""
+Export Jobs - Excel exports run as background jobs with reusable artifacts
+An artifact is keyed by (export_type, year, data version); the data version is the
+change-log version of the entities the export reads, so repeating an export while
+its data is unchanged returns the existing file
+"""
+
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+
+import change_log
+from database import get_db_connection
+from excel_exporter import ExcelExporter, export_to_excel
+from windows_utils import safe_print
+
+EXPORT_WORKERS = int(os.environ.get('EXPORT_WORKERS', '2'))
+# Artifacts not used for this long, or beyond the size budget (least recently used first), are evicted
+EXPORT_MAX_AGE_DAYS = float(os.environ.get('EXPORT_MAX_AGE_DAYS', '7'))
+EXPORT_MAX_BYTES = int(os.environ.get('EXPORT_CACHE_MAX_MB', '500')) * 1024 * 1024
+# Files this young may still be being written and are never evicted
+EVICTION_GRACE_SECONDS = 60
+# Finished jobs stay pollable for this long
+JOB_RETENTION_SECONDS = 3600
+# GET /api/export/<type> waits this long for the file before answering 202 with the job id
+EXPORT_WAIT_SECONDS = float(os.environ.get('EXPORT_WAIT_SECONDS', '30'))
+
+# export_to_excel type -> (excel_exports.export_type, change-log entities the export reads)
+# checklist_completion is derived from checklist items, assignments, uploads and documents
+EXPORT_TYPES = {
+    'users': ('users', ['users']),
+    'checklist': ('checklist_gcg', ['checklist', 'document-metadata', 'uploaded-files',
+                                    change_log.ASSIGNMENTS_ENTITY]),
+    'documents': ('documents', ['document-metadata', 'checklist']),
+    'org_structure': ('organizational_structure', ['direktorat', 'subdirektorat', 'divisi', 'anak-perusahaan']),
+    'gcg_assessment': ('gcg_assessment', ['gcg-assessments', 'gcg-aspects-config', 'gcg-assessment-summary',
+                                          'users']),
+    'all': ('complete_export', ['users', 'checklist', 'document-metadata', 'direktorat', 'subdirektorat',
+                                'anak-perusahaan', 'gcg-assessments', 'gcg-aspects-config']),
+}
+# URL spellings used by /api/export/<type>
+EXPORT_TYPE_ALIASES = {'org-structure': 'org_structure', 'gcg-assessment': 'gcg_assessment'}
+# Types that export the current year when none is given
+CURRENT_YEAR_TYPES = ('org_structure', 'gcg_assessment', 'all')
+
+
+def normalize_export_type(export_type: str) -> str:
+    export_type = EXPORT_TYPE_ALIASES.get(export_type, export_type)
+    if export_type not in EXPORT_TYPES:
+        raise ValueError(f"Unknown export type: {export_type}")
+    return export_type
+
+
+def data_version(export_type: str) -> str:
+    """Change-log version of the entities an export reads"""
+    return str(change_log.get_entity_version(EXPORT_TYPES[export_type][1]))
+
+
+class ExportJobs:
+    """Background export jobs, deduplicated per (export_type, year, data version)
+
+    A job for a key that already has a finished artifact on disk completes
+    immediately with cached=True; identical requests while a job is running
+    share that job.
+    """
+
+    def __init__(self, workers: int = EXPORT_WORKERS):
+        self.export_dir = ExcelExporter().export_dir
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='export')
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._running: Dict[tuple, str] = {}
+        self._done: Dict[str, threading.Event] = {}
+
+    def submit(self, export_type: str, year: Optional[int] = None,
+               exported_by: Optional[int] = None) -> Dict[str, Any]:
+        """Start (or reuse) an export; returns the job"""
+        export_type = normalize_export_type(export_type)
+        if export_type == 'users':
+            year = None
+        elif not year and export_type in CURRENT_YEAR_TYPES:
+            year = datetime.now().year
+        # Read the version before the data: a write racing the export only makes the artifact stale-early
+        version = data_version(export_type)
+        key = (export_type, year, version)
+
+        with self._lock:
+            self._prune_jobs()
+            running = self._running.get(key)
+            if running:
+                return dict(self._jobs[running])
+
+            job = {
+                'id': uuid.uuid4().hex,
+                'export_type': export_type,
+                'year': year,
+                'data_version': version,
+                'status': 'queued',
+                'cached': False,
+                'file_name': None,
+                'file_path': None,
+                'error': None,
+                'not_found': False,
+                'created_at': time.time(),
+                'finished_at': None,
+            }
+            self._jobs[job['id']] = job
+            self._done[job['id']] = threading.Event()
+
+            artifact = self._find_artifact(export_type, year, version)
+            if artifact:
+                # Mark it used so LRU eviction keeps it
+                os.utime(artifact)
+                self._finish(job, file_path=artifact, cached=True)
+                return dict(job)
+
+            self._running[key] = job['id']
+
+        self._executor.submit(self._run, job, key, exported_by)
+        return dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Block until the job has finished (or the timeout passed); returns its state"""
+        done = self._done.get(job_id)
+        if done is not None:
+            done.wait(timeout)
+        return self.get(job_id)
+
+    def _run(self, job: Dict[str, Any], key: tuple, exported_by: Optional[int]):
+        export_type, year, version = key
+        with self._lock:
+            job['status'] = 'running'
+        try:
+            file_path = export_to_excel(export_type, year=year, exported_by=exported_by)
+            with get_db_connection() as conn:
+                conn.execute("UPDATE excel_exports SET data_version = ? WHERE file_path = ?", (version, file_path))
+            with self._lock:
+                self._finish(job, file_path=file_path)
+            safe_print(f"📊 Export ready: {os.path.basename(file_path)}")
+        except Exception as e:
+            safe_print(f"❌ Export {export_type} ({year or 'all years'}) failed: {e}")
+            with self._lock:
+                self._finish(job, error=str(e), not_found=isinstance(e, ValueError))
+        finally:
+            with self._lock:
+                self._running.pop(key, None)
+
+        try:
+            self.evict()
+        except Exception as e:
+            safe_print(f"⚠️ Export cache eviction failed: {e}")
+
+    def _finish(self, job: Dict[str, Any], file_path: Optional[str] = None, cached: bool = False,
+                error: Optional[str] = None, not_found: bool = False):
+        """Record the job outcome; caller holds the lock"""
+        job.update({
+            'status': 'error' if error else 'done',
+            'cached': cached,
+            'file_path': file_path,
+            'file_name': os.path.basename(file_path) if file_path else None,
+            'error': error,
+            'not_found': not_found,
+            'finished_at': time.time(),
+        })
+        self._done[job['id']].set()
+
+    def _prune_jobs(self):
+        """Forget finished jobs past their retention; caller holds the lock"""
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job['finished_at'] and job['finished_at'] < cutoff]:
+            del self._jobs[job_id]
+            del self._done[job_id]
+
+    def _find_artifact(self, export_type: str, year: Optional[int], version: str) -> Optional[str]:
+        with get_db_connection() as conn:
+            rows = conn.execute("""
+                SELECT file_path FROM excel_exports
+                WHERE export_type = ? AND year IS ? AND data_version = ?
+                ORDER BY id DESC
+            """, (EXPORT_TYPES[export_type][0], year, version)).fetchall()
+        for row in rows:
+            if row['file_path'] and os.path.exists(row['file_path']):
+                return row['file_path']
+        return None
+
+    def evict(self) -> int:
+        """Delete superseded, expired and over-budget artifacts; returns the number removed
+
+        Superseded artifacts are those of an older data version than the latest
+        export of the same type and year, which can never be served again.
+        """
+        with get_db_connection() as conn:
+            rows = conn.execute("""
+                SELECT export_type, year, file_path FROM excel_exports
+                WHERE data_version IS NOT NULL
+                ORDER BY id DESC
+            """).fetchall()
+        latest = set()
+        current, superseded = set(), set()
+        for row in rows:
+            key = (row['export_type'], row['year'])
+            path = os.path.abspath(row['file_path'])
+            if key in latest:
+                superseded.add(path)
+            else:
+                latest.add(key)
+                current.add(path)
+        # A file still referenced by a current row is never superseded
+        superseded -= current
+
+        with self._lock:
+            in_use = {os.path.abspath(job['file_path']) for job in self._jobs.values() if job['file_path']}
+
+        now = time.time()
+        files = []
+        for name in os.listdir(self.export_dir):
+            path = os.path.abspath(os.path.join(self.export_dir, name))
+            if not name.endswith('.xlsx') or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            if now - stat.st_mtime < EVICTION_GRACE_SECONDS:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+
+        removed: List[str] = []
+        total = sum(size for _, size, _ in files)
+        for mtime, size, path in files:
+            expired = now - mtime > EXPORT_MAX_AGE_DAYS * 86400
+            over_budget = total > EXPORT_MAX_BYTES
+            if path in in_use and not expired:
+                # A finished job may still be downloaded
+                continue
+            if path in superseded or expired or over_budget:
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                removed.append(os.path.basename(path))
+
+        if removed:
+            safe_print(f"🧹 Evicted {len(removed)} export file(s)")
+        return len(removed)
+
+
+# Global export job queue
+export_queue = ExportJobs()
@@ -0,0 +1,190 @@
+"""
+GCG Catalogue - In-memory, preindexed view of GCG_MAPPING.csv
+Loaded on first use and reloaded when the CSV changes on disk; keeps the
+/api/gcg-mapping payload prebuilt plus section/no and token indexes for autocomplete
+"""
+
+import bisect
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Optional, List, Dict
+
+import pandas as pd
+from windows_utils import safe_print
+
+GCG_MAPPING_PATH = Path(__file__).parent.parent / 'GCG_MAPPING.csv'
+SEARCH_LIMIT = 8
+MAX_SEARCH_LIMIT = 50
+
+# CSV column -> API key, in payload order
+CATALOGUE_COLUMNS = [
+    ('Level', 'level'),
+    ('Type', 'type'),
+    ('Section', 'section'),
+    ('No', 'no'),
+    ('Deskripsi', 'deskripsi'),
+    ('Jumlah_Parameter', 'jumlah_parameter'),
+    ('Bobot', 'bobot'),
+]
+
+_TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall((text or '').lower())
+
+
+class GCGCatalogue:
+    """GCG mapping items with a prebuilt JSON payload and lookup indexes
+
+    The catalogue is rebuilt lazily when the CSV's mtime/size changes, so an
+    edited mapping file is picked up without restarting the server.
+    """
+
+    def __init__(self, path: Path = GCG_MAPPING_PATH):
+        self.path = Path(path)
+        self._signature = None
+        self._lock = threading.Lock()
+        self.items: List[Dict[str, str]] = []
+        self.payload: bytes = b''
+        self._by_section: Dict[str, List[int]] = {}
+        self._by_section_no: Dict[tuple, int] = {}
+        self._postings: Dict[str, List[int]] = {}
+        self._tokens: List[str] = []
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _ensure_fresh(self) -> bool:
+        """Reload if the file changed; False when the mapping file is missing"""
+        signature = self._file_signature()
+        if signature is None:
+            return False
+        if signature == self._signature:
+            return True
+        with self._lock:
+            if signature != self._signature:
+                self._build()
+                self._signature = signature
+        return True
+
+    def _build(self):
+        df = pd.read_csv(self.path)
+        for column, _ in CATALOGUE_COLUMNS:
+            if column not in df.columns:
+                df[column] = ''
+        # Same stringification the endpoint always used (e.g. '1', '0.0', 'nan')
+        df = df[[column for column, _ in CATALOGUE_COLUMNS]].apply(lambda values: values.map(str))
+        df.columns = [key for _, key in CATALOGUE_COLUMNS]
+        items = df.to_dict('records')
+
+        by_section: Dict[str, List[int]] = {}
+        by_section_no: Dict[tuple, int] = {}
+        postings: Dict[str, List[int]] = {}
+        for idx, item in enumerate(items):
+            by_section.setdefault(item['section'], []).append(idx)
+            by_section_no.setdefault((item['section'], item['no']), idx)
+            for token in set(tokenize(item['deskripsi'])):
+                postings.setdefault(token, []).append(idx)
+
+        type_counts = df['type'].value_counts()
+        payload = json.dumps({
+            'success': True,
+            'data': items,
+            'total_items': len(items),
+            'headers': int(type_counts.get('header', 0)),
+            'indicators': int(type_counts.get('indicator', 0)),
+            'message': f'Loaded {len(items)} GCG items for autocomplete'
+        }).encode('utf-8')
+
+        self.items = items
+        self._by_section = by_section
+        self._by_section_no = by_section_no
+        self._postings = postings
+        self._tokens = sorted(postings)
+        self.payload = payload
+        safe_print(f"📚 GCG catalogue loaded: {len(items)} items, {len(self._tokens)} tokens")
+
+    def get_payload(self) -> Optional[bytes]:
+        """Full /api/gcg-mapping response body, or None when the CSV is missing"""
+        if not self._ensure_fresh():
+            return None
+        return self.payload
+
+    def find(self, section: Optional[str] = None, no: Optional[str] = None) -> Optional[List[Dict[str, str]]]:
+        """Items by section and/or no (no matches the CSV text, e.g. '12.0' or '12')"""
+        if not self._ensure_fresh():
+            return None
+        if section and no:
+            idx = self._by_section_no.get((section, no))
+            if idx is None:
+                idx = self._by_section_no.get((section, self._normalize_no(no)))
+            return [self.items[idx]] if idx is not None else []
+        if section:
+            return [self.items[i] for i in self._by_section.get(section, [])]
+        if no:
+            wanted = {no, self._normalize_no(no)}
+            return [item for item in self.items if item['no'] in wanted]
+        return list(self.items)
+
+    @staticmethod
+    def _normalize_no(no: str) -> str:
+        try:
+            return str(float(no))
+        except ValueError:
+            return no
+
+    def _prefix_matches(self, prefix: str) -> set:
+        """Item ids containing a token that starts with prefix"""
+        matches = set()
+        start = bisect.bisect_left(self._tokens, prefix)
+        for token in self._tokens[start:]:
+            if not token.startswith(prefix):
+                break
+            matches.update(self._postings[token])
+        return matches
+
+    def search(self, query: str, item_type: Optional[str] = None, section: Optional[str] = None,
+               limit: int = SEARCH_LIMIT) -> Optional[List[Dict[str, str]]]:
+        """Token-prefix search: every query token must prefix a token of the description
+
+        Ranked by: description starts with the query, then exact token hits, then file order.
+        """
+        if not self._ensure_fresh():
+            return None
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return []
+
+        candidates = None
+        for token in query_tokens:
+            matches = self._prefix_matches(token)
+            candidates = matches if candidates is None else candidates & matches
+            if not candidates:
+                return []
+
+        query_text = ' '.join(query_tokens)
+        ranked = []
+        for idx in candidates:
+            item = self.items[idx]
+            if item_type and item_type != 'all' and item['type'] != item_type:
+                continue
+            if section and item['section'] != section:
+                continue
+            item_tokens = tokenize(item['deskripsi'])
+            exact_hits = sum(1 for token in query_tokens if token in item_tokens)
+            starts = ' '.join(item_tokens).startswith(query_text)
+            ranked.append((not starts, -exact_hits, idx))
+        ranked.sort()
+        return [self.items[idx] for _, _, idx in ranked[:limit]]
+
+
+# Global catalogue instance
+gcg_catalogue = GCGCatalogue()
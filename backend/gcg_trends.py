@@ -0,0 +1,194 @@
+"""
+GCG Trends - materialized multi-year aggregates of the assessment data in output.xlsx
+Recomputed only for the year touched by a save/delete and served as a compact trend
+"""
+
+from typing import Optional, List, Dict, Any
+
+import pandas as pd
+import change_log
+from database import get_db_connection
+from storage_service import storage_service
+from windows_utils import safe_print
+
+OUTPUT_XLSX_PATH = 'web-output/output.xlsx'
+# Change-log entity bumped whenever the trend tables change (versions /api/gcg-trends)
+TRENDS_ENTITY = 'gcg-trends'
+
+
+def _number(value) -> Optional[float]:
+    """Numeric cell value, or None for blanks/non-numeric text"""
+    number = pd.to_numeric(value, errors='coerce')
+    return None if pd.isna(number) else float(number)
+
+
+def _text(value) -> str:
+    return '' if pd.isna(value) else str(value)
+
+
+def _refresh_deltas(cursor):
+    """Recompute year-over-year deltas against the previous year that has data"""
+    cursor.execute("""
+        UPDATE gcg_trend_years SET
+            skor_delta = ROUND(total_skor - (SELECT p.total_skor FROM gcg_trend_years p
+                                             WHERE p.year < gcg_trend_years.year AND p.total_skor IS NOT NULL
+                                             ORDER BY p.year DESC LIMIT 1), 4),
+            capaian_delta = ROUND(total_capaian - (SELECT p.total_capaian FROM gcg_trend_years p
+                                                   WHERE p.year < gcg_trend_years.year AND p.total_capaian IS NOT NULL
+                                                   ORDER BY p.year DESC LIMIT 1), 4)
+    """)
+    cursor.execute("""
+        UPDATE gcg_trend_aspects SET
+            skor_delta = ROUND(skor - (SELECT p.skor FROM gcg_trend_aspects p
+                                       WHERE p.section = gcg_trend_aspects.section AND p.year < gcg_trend_aspects.year
+                                       ORDER BY p.year DESC LIMIT 1), 4),
+            capaian_delta = ROUND(capaian - (SELECT p.capaian FROM gcg_trend_aspects p
+                                             WHERE p.section = gcg_trend_aspects.section AND p.year < gcg_trend_aspects.year
+                                             ORDER BY p.year DESC LIMIT 1), 4)
+    """)
+
+
+def _write_year(cursor, year: int, year_df: pd.DataFrame):
+    cursor.execute("DELETE FROM gcg_trend_aspects WHERE year = ?", (year,))
+    cursor.execute("DELETE FROM gcg_trend_years WHERE year = ?", (year,))
+    if year_df.empty:
+        return
+
+    row_type = year_df['Type'].astype(str).str.lower()
+    headers = year_df[row_type == 'header']
+    header_deskripsi = dict(zip(headers['Section'].astype(str), headers['Deskripsi'].map(_text)))
+
+    # Aspect scores live on subtotal rows (detailed mode) or on scored header rows (brief mode)
+    subtotals = year_df[row_type == 'subtotal']
+    scored_headers = headers[pd.to_numeric(headers['Skor'], errors='coerce').notna()]
+    scored_headers = scored_headers[~scored_headers['Section'].astype(str).isin(subtotals['Section'].astype(str))]
+
+    aspects = []
+    for record in pd.concat([subtotals, scored_headers]).to_dict(orient='records'):
+        section = _text(record.get('Section'))
+        aspects.append((year, section, header_deskripsi.get(section) or _text(record.get('Deskripsi')),
+                        _number(record.get('Bobot')), _number(record.get('Skor')), _number(record.get('Capaian'))))
+    cursor.executemany("""
+        INSERT INTO gcg_trend_aspects (year, section, deskripsi, bobot, skor, capaian)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(year, section) DO UPDATE SET
+            deskripsi = excluded.deskripsi, bobot = excluded.bobot,
+            skor = excluded.skor, capaian = excluded.capaian
+    """, aspects)
+
+    # TOTAL row if present, else the sum of the aspect subtotals
+    totals = year_df[row_type == 'total']
+    total = totals.iloc[-1].to_dict() if not totals.empty else {}
+    ranked = sorted((a for a in aspects if a[5] is not None), key=lambda a: a[5])
+    first = year_df.iloc[0].to_dict()
+
+    if total:
+        total_bobot, total_skor = _number(total.get('Bobot')), _number(total.get('Skor'))
+        total_capaian = _number(total.get('Capaian'))
+    elif aspects:
+        total_bobot = sum(a[3] or 0 for a in aspects)
+        total_skor = round(sum(a[4] or 0 for a in aspects), 4)
+        total_capaian = round(total_skor / total_bobot * 100, 2) if total_bobot else None
+    else:
+        total_bobot = total_skor = total_capaian = None
+
+    cursor.execute("""
+        INSERT INTO gcg_trend_years (
+            year, total_bobot, total_skor, total_capaian, kategori, penilai,
+            jenis_penilaian, aspect_count, best_aspect, worst_aspect
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        year,
+        total_bobot,
+        total_skor,
+        total_capaian,
+        _text(total.get('Penjelasan')) if total else '',
+        _text(first.get('Penilai')),
+        _text(first.get('Jenis_Penilaian')),
+        len(aspects),
+        ranked[-1][1] if ranked else None,
+        ranked[0][1] if ranked else None,
+    ))
+
+
+def recompute_year(year: int, df: Optional[pd.DataFrame] = None):
+    """Recompute the trend rows of one year
+
+    df holds (at least) that year's output.xlsx rows when the caller already has
+    them in memory (save/delete), otherwise the year's partition is read.
+    """
+    if df is None:
+        df = storage_service.read_excel(OUTPUT_XLSX_PATH, years=[year])
+    tahun = pd.to_numeric(df['Tahun'], errors='coerce') if df is not None and 'Tahun' in df else None
+    year_df = df[tahun == int(year)] if tahun is not None else pd.DataFrame()
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        _write_year(cursor, int(year), year_df)
+        _refresh_deltas(cursor)
+        change_log.record_change(TRENDS_ENTITY, int(year), 'update', cursor=cursor)
+
+
+def rebuild_all(df: Optional[pd.DataFrame] = None) -> int:
+    """Rebuild the trend tables for every year in output.xlsx; returns the year count"""
+    if df is None:
+        df = storage_service.read_excel(OUTPUT_XLSX_PATH)
+    if df is None or df.empty or 'Tahun' not in df:
+        return 0
+
+    tahun = pd.to_numeric(df['Tahun'], errors='coerce')
+    years = sorted(int(y) for y in tahun.dropna().unique())
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM gcg_trend_aspects")
+        cursor.execute("DELETE FROM gcg_trend_years")
+        for year in years:
+            _write_year(cursor, year, df[tahun == year])
+        _refresh_deltas(cursor)
+        change_log.record_change(TRENDS_ENTITY, 'all', 'update', cursor=cursor)
+    return len(years)
+
+
+def ensure_trends():
+    """Backfill the trend tables once when they are still empty"""
+    with get_db_connection() as conn:
+        empty = conn.execute("SELECT NOT EXISTS (SELECT 1 FROM gcg_trend_years)").fetchone()[0]
+    if empty and storage_service.file_exists(OUTPUT_XLSX_PATH):
+        count = rebuild_all()
+        safe_print(f"✅ Built GCG trend aggregates for {count} year(s)")
+
+
+def get_trends(start_year: Optional[int] = None, end_year: Optional[int] = None,
+               include_aspects: bool = True) -> Dict[str, Any]:
+    """Compact multi-year trend: per-year totals, per-aspect scores, deltas and best/worst"""
+    params = {'start': start_year, 'end': end_year}
+    year_filter = "(:start IS NULL OR year >= :start) AND (:end IS NULL OR year <= :end)"
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT year, total_bobot, total_skor, total_capaian, kategori, penilai, jenis_penilaian,
+                   aspect_count, best_aspect, worst_aspect, skor_delta, capaian_delta
+            FROM gcg_trend_years WHERE {year_filter} ORDER BY year
+        """, params)
+        years = [dict(row) for row in cursor.fetchall()]
+
+        if include_aspects:
+            cursor.execute(f"""
+                SELECT year, section, deskripsi, bobot, skor, capaian, skor_delta, capaian_delta
+                FROM gcg_trend_aspects WHERE {year_filter} ORDER BY year, section
+            """, params)
+            aspects_by_year: Dict[int, List[Dict[str, Any]]] = {}
+            for row in cursor.fetchall():
+                aspect = dict(row)
+                aspects_by_year.setdefault(aspect.pop('year'), []).append(aspect)
+            for year in years:
+                year['aspects'] = aspects_by_year.get(year['year'], [])
+
+    scored = [y for y in years if y['total_skor'] is not None]
+    return {
+        'years': years,
+        'best_year': max(scored, key=lambda y: y['total_skor'])['year'] if scored else None,
+        'worst_year': min(scored, key=lambda y: y['total_skor'])['year'] if scored else None,
+        'latest_year': years[-1]['year'] if years else None,
+    }
@@ -0,0 +1,137 @@
+"""
+Pagination - Keyset cursors and fields= projection for list endpoints
+A cursor is an opaque base64url token holding the sort key of the last row served,
+so the next page starts right after it without OFFSET scans
+"""
+
+import base64
+import json
+from typing import Optional, List, Dict, Any, Sequence, Tuple
+
+import pandas as pd
+
+# Legacy callers (no ?limit= and no ?cursor=) get the full list; paginating clients
+# get DEFAULT_PAGE_LIMIT rows per page unless they ask for fewer, and follow nextCursor
+DEFAULT_PAGE_LIMIT = 5000
+MAX_PAGE_LIMIT = 5000
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+
+class PaginationError(ValueError):
+    """Invalid limit, cursor or fields parameter (reported as HTTP 400)"""
+
+
+class PageRequest:
+    """Parsed ?limit=, ?cursor= and ?fields= parameters"""
+
+    def __init__(self, limit: Optional[int], key: Optional[List[Any]], offset: int, fields: Optional[List[str]]):
+        self.limit = limit  # None: unpaginated request, return every row
+        self.key = key
+        self.offset = offset
+        self.fields = fields
+
+    @property
+    def fetch_limit(self) -> int:
+        """SQL LIMIT value: one row past the page to detect a next page, -1 (no limit) when unpaginated"""
+        return self.limit + 1 if self.limit is not None else -1
+
+    def head(self, df: pd.DataFrame) -> pd.DataFrame:
+        """DataFrame counterpart of fetch_limit"""
+        return df if self.limit is None else df.head(self.limit + 1)
+
+
+def encode_cursor(key: Sequence[Any], offset: int = 0) -> str:
+    payload = json.dumps({'k': list(key), 'n': offset}, separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: Optional[str]) -> Tuple[Optional[List[Any]], int]:
+    """Return (sort key, rows already served); (None, 0) for the first page"""
+    if not token:
+        return None, 0
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        key = payload['k']
+        offset = int(payload.get('n', 0))
+    except Exception:
+        raise PaginationError('Invalid cursor parameter')
+    if not isinstance(key, list):
+        raise PaginationError('Invalid cursor parameter')
+    return key, offset
+
+
+def parse_page_args(args, allowed_fields: Sequence[str]) -> PageRequest:
+    """Parse pagination/projection query args against the endpoint's field list"""
+    raw_limit = args.get('limit')
+    if raw_limit in (None, ''):
+        limit = DEFAULT_PAGE_LIMIT if args.get('cursor') else None
+    else:
+        try:
+            limit = int(raw_limit)
+        except ValueError:
+            raise PaginationError('Invalid limit parameter')
+        if limit < 1:
+            raise PaginationError('limit must be at least 1')
+        limit = min(limit, MAX_PAGE_LIMIT)
+
+    key, offset = decode_cursor(args.get('cursor'))
+
+    fields = None
+    raw_fields = args.get('fields')
+    if raw_fields:
+        fields = [f.strip() for f in raw_fields.split(',') if f.strip()]
+        unknown = [f for f in fields if f not in allowed_fields]
+        if unknown:
+            raise PaginationError(f"Unknown fields: {', '.join(unknown)}")
+
+    return PageRequest(limit, key, offset, fields)
+
+
+def keyset_condition(columns: Sequence[str], key: Sequence[Any], descending: Sequence[str] = ()) -> Tuple[str, List[Any]]:
+    """SQL predicate selecting rows strictly after `key` in ORDER BY `columns`
+
+    Expanded as (a > ?) OR (a = ? AND b > ?) ... so mixed ASC/DESC orderings work
+    """
+    if len(key) != len(columns):
+        raise PaginationError('Invalid cursor parameter')
+    clauses, params = [], []
+    for i, column in enumerate(columns):
+        parts = [f"{previous} = ?" for previous in columns[:i]]
+        parts.append(f"{column} {'<' if column in descending else '>'} ?")
+        clauses.append(f"({' AND '.join(parts)})")
+        params.extend(key[:i + 1])
+    return f"({' OR '.join(clauses)})", params
+
+
+def frame_after(df: pd.DataFrame, columns: Sequence[str], key: Sequence[Any]) -> pd.DataFrame:
+    """DataFrame counterpart of keyset_condition (ascending order only)"""
+    if len(key) != len(columns):
+        raise PaginationError('Invalid cursor parameter')
+    after = pd.Series(False, index=df.index)
+    equal = pd.Series(True, index=df.index)
+    for column, value in zip(columns, key):
+        after |= equal & (df[column] > value)
+        equal &= df[column] == value
+    return df[after]
+
+
+def finish_page(rows: List[Dict[str, Any]], page: PageRequest, key_of) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Trim a limit+1 fetch to the page, build nextCursor and apply the projection"""
+    next_cursor = None
+    if page.limit is not None and len(rows) > page.limit:
+        rows = rows[:page.limit]
+        next_cursor = encode_cursor(key_of(rows[-1]), page.offset + len(rows))
+    return project(rows, page.fields), next_cursor
+
+
+def project(rows: List[Dict[str, Any]], fields: Optional[List[str]]) -> List[Dict[str, Any]]:
+    if not fields:
+        return rows
+    return [{f: row.get(f) for f in fields} for row in rows]
+
+
+def with_cursor_header(response, next_cursor: Optional[str]):
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
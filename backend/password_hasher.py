@@ -0,0 +1,163 @@
+"""
+Password Hasher - Bounded worker pool for bcrypt hashing and verification
+Keeps CPU-heavy bcrypt work off the request threads' critical path, rejects
+work beyond a fixed queue depth, and records hash latency metrics
+"""
+
+import os
+import hmac
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, Optional, Tuple
+
+import bcrypt
+from windows_utils import safe_print
+
+# Target bcrypt work factor; weaker hashes are upgraded on successful login
+PASSWORD_HASH_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+# Concurrent bcrypt operations and how many more may wait for a worker
+HASH_POOL_WORKERS = int(os.environ.get('HASH_POOL_WORKERS', 2))
+HASH_QUEUE_DEPTH = int(os.environ.get('HASH_QUEUE_DEPTH', 16))
+# How long a request waits for a free queue slot before giving up
+HASH_QUEUE_TIMEOUT = float(os.environ.get('HASH_QUEUE_TIMEOUT', 0.5))
+# Number of recent operations kept for latency percentiles
+HASH_METRICS_WINDOW = 500
+
+
+class HashPoolBusy(Exception):
+    """Raised when the hash queue is full; callers should answer 503"""
+
+
+def is_bcrypt_hash(stored: str) -> bool:
+    return stored.startswith(('$2a$', '$2b$', '$2y$'))
+
+
+def hash_cost(stored: str) -> int:
+    """Return the work factor encoded in a bcrypt hash (0 if not bcrypt)"""
+    try:
+        return int(stored.split('$')[2])
+    except (IndexError, ValueError):
+        return 0
+
+
+class PasswordHasher:
+    """Bounded bcrypt worker pool with latency metrics"""
+
+    def __init__(self, workers: int = HASH_POOL_WORKERS, queue_depth: int = HASH_QUEUE_DEPTH):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+        self._slots = threading.BoundedSemaphore(workers + queue_depth)
+        self._workers = workers
+        self._queue_depth = queue_depth
+        self._metrics_lock = threading.Lock()
+        self._latencies = deque(maxlen=HASH_METRICS_WINDOW)
+        self._queue_waits = deque(maxlen=HASH_METRICS_WINDOW)
+        self._counters = {'verify': 0, 'hash': 0, 'rehash': 0, 'rejected': 0, 'errors': 0}
+        self._in_flight = 0
+
+    def _run(self, kind: str, fn: Callable, *args, wait: bool = True):
+        """Run fn on the pool; returns its result, or a Future when wait=False"""
+        acquired = self._slots.acquire(timeout=HASH_QUEUE_TIMEOUT) if wait else self._slots.acquire(blocking=False)
+        if not acquired:
+            with self._metrics_lock:
+                self._counters['rejected'] += 1
+            raise HashPoolBusy(f"Password hashing queue is full ({self._workers + self._queue_depth} slots)")
+
+        submitted = time.perf_counter()
+        with self._metrics_lock:
+            self._in_flight += 1
+
+        def task():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            except Exception:
+                with self._metrics_lock:
+                    self._counters['errors'] += 1
+                raise
+            finally:
+                finished = time.perf_counter()
+                with self._metrics_lock:
+                    self._counters[kind] += 1
+                    self._in_flight -= 1
+                    self._latencies.append(finished - started)
+                    self._queue_waits.append(started - submitted)
+                self._slots.release()
+
+        future = self._executor.submit(task)
+        return future.result() if wait else future
+
+    def verify(self, password: str, stored: str) -> Tuple[bool, bool]:
+        """Check a password against a stored value
+
+        Returns (valid, needs_rehash). Plaintext (legacy) values are compared
+        in constant time; they and bcrypt hashes below PASSWORD_HASH_ROUNDS
+        need a rehash once the password is known to be correct.
+        """
+        if not stored:
+            return False, False
+        if not is_bcrypt_hash(stored):
+            valid = hmac.compare_digest(password.encode('utf-8'), stored.encode('utf-8'))
+            return valid, valid
+        try:
+            valid = self._run('verify', bcrypt.checkpw, password.encode('utf-8'), stored.encode('utf-8'))
+        except ValueError as e:
+            safe_print(f"❌ Invalid bcrypt hash: {e}")
+            return False, False
+        return valid, valid and hash_cost(stored) < PASSWORD_HASH_ROUNDS
+
+    def hash(self, password: str) -> str:
+        """Hash a password at the target work factor"""
+        return self._run('hash', _hashpw, password)
+
+    def rehash_in_background(self, password: str, on_hashed: Callable[[str], None]) -> bool:
+        """Upgrade a hash without blocking the caller; skipped if the pool is busy"""
+        try:
+            future = self._run('rehash', _hashpw, password, wait=False)
+        except HashPoolBusy:
+            return False
+
+        def persist(done):
+            try:
+                on_hashed(done.result())
+            except Exception as e:
+                safe_print(f"⚠️ Could not store upgraded password hash: {e}")
+
+        future.add_done_callback(persist)
+        return True
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._metrics_lock:
+            latencies = sorted(self._latencies)
+            queue_waits = sorted(self._queue_waits)
+            counters = dict(self._counters)
+            in_flight = self._in_flight
+
+        def summary(samples):
+            if not samples:
+                return {'avg_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0}
+            return {
+                'avg_ms': round(sum(samples) / len(samples) * 1000, 2),
+                'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 2),
+                'max_ms': round(samples[-1] * 1000, 2)
+            }
+
+        return {
+            'workers': self._workers,
+            'queue_depth': self._queue_depth,
+            'in_flight': in_flight,
+            'target_rounds': PASSWORD_HASH_ROUNDS,
+            'counters': counters,
+            'hash_latency': summary(latencies),
+            'queue_wait': summary(queue_waits),
+            'samples': len(latencies)
+        }
+
+
+def _hashpw(password: str) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=PASSWORD_HASH_ROUNDS)).decode('utf-8')
+
+
+# Global password hasher instance
+password_hasher = PasswordHasher()
@@ -0,0 +1,62 @@
+"""
+Response Cache - Conditional GET (ETag / If-None-Match) for read-mostly JSON endpoints
+The ETag is derived from a data version (change-log seq of the backing entities, or a
+file signature) plus the request URL, so a matching If-None-Match is answered with
+304 before the view queries anything
+"""
+
+import hashlib
+import os
+from functools import wraps
+
+from flask import request, make_response
+
+import change_log
+from windows_utils import safe_print
+
+# Browsers may keep the body but must revalidate on every use
+CACHE_CONTROL = 'private, no-cache'
+
+
+def entity_version(*entities):
+    """Version source backed by the change log (bumped by triggers / record_change)"""
+    return lambda: change_log.get_entity_version(entities)
+
+
+def file_version(path):
+    """Version source backed by a file's mtime and size"""
+    def version():
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return 'missing'
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+    return version
+
+
+def conditional_get(version_source, cache_control: str = CACHE_CONTROL):
+    """Decorate a view so GETs carry a version ETag and honour If-None-Match"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET':
+                return view(*args, **kwargs)
+            try:
+                # Read the version before the data: a write racing the view only makes the ETag stale-early
+                version = version_source()
+            except Exception as e:
+                safe_print(f"⚠️ Data version unavailable for {request.path}: {e}")
+                return view(*args, **kwargs)
+
+            etag = hashlib.sha1(f"{version}|{request.full_path}".encode('utf-8')).hexdigest()
+            if request.if_none_match.contains(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = cache_control
+            return response
+        return wrapper
+    return decorator
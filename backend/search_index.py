@@ -0,0 +1,236 @@
+"""
+Search Index - SQLite FTS5 full-text index over checklist items, uploaded files
+and AOI recommendations, kept in sync by triggers on the source tables
+Uses the trigram tokenizer (substring/fuzzy matching) and expands query words
+with Indonesian affix-stripped roots, so "pengukuran" also finds "diukur"
+"""
+
+import re
+from typing import Optional, List, Dict, Any, Sequence
+
+from database import get_db_connection
+from windows_utils import safe_print
+
+SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+# Trigram matching needs at least 3 characters per term
+MIN_TERM_LENGTH = 3
+MIN_ROOT_LENGTH = 4
+
+# Index rowid = source rowid * SLOTS + slot ({key} in the selects), so triggers
+# can replace an entry by rowid instead of scanning the index
+SLOTS = 4
+SOURCES = {
+    'checklist': {
+        'slot': 0,
+        'table': 'checklist_gcg',
+        'select': """
+            SELECT {key}, deskripsi, aspek, 'checklist', id, tahun, aspek
+            FROM checklist_gcg t WHERE {where} is_active = 1
+        """,
+    },
+    'uploaded-files': {
+        'slot': 1,
+        'table': 'uploaded_files',
+        'select': """
+            SELECT {key}, file_name,
+                   TRIM(COALESCE(checklist_description, '') || ' ' || COALESCE(catatan, '')),
+                   'uploaded-files', id, year, aspect
+            FROM uploaded_files t WHERE {where} 1
+        """,
+    },
+    'aoi-recommendations': {
+        'slot': 2,
+        'table': 'aoi_recommendations',
+        'select': """
+            SELECT {key}, isi,
+                   TRIM(COALESCE(aspek_aoi, '') || ' ' || COALESCE(pihak_terkait, '') || ' ' || COALESCE(organ_perusahaan, '')),
+                   'aoi-recommendations', id,
+                   (SELECT tahun FROM aoi_tables WHERE id = t.aoi_table_id), aspek_aoi
+            FROM aoi_recommendations t WHERE {where} 1
+        """,
+    },
+}
+
+# Indonesian affixes, longest first; (prefix, replacement for a following vowel)
+_PARTICLES = ('lah', 'kah', 'tah', 'pun')
+_POSSESSIVES = ('nya', 'ku', 'mu')
+_SUFFIXES = ('kan', 'an', 'i')
+_PREFIXES = (
+    ('meny', 's'), ('peny', 's'), ('meng', 'k'), ('peng', 'k'), ('mem', 'p'), ('pem', 'p'),
+    ('men', 't'), ('pen', 't'), ('ber', ''), ('per', ''), ('ter', ''), ('me', ''), ('pe', ''),
+    ('be', ''), ('te', ''), ('di', ''), ('ke', ''), ('se', ''),
+)
+_WORD_PATTERN = re.compile(r'\w+', re.UNICODE)
+_VOWELS = set('aiueo')
+
+
+def _suffix_variants(word: str) -> List[str]:
+    """The word without inflectional particles/possessives, then without each derivational suffix"""
+    for group in (_PARTICLES, _POSSESSIVES):
+        for suffix in group:
+            if word.endswith(suffix) and len(word) - len(suffix) >= MIN_ROOT_LENGTH:
+                word = word[:-len(suffix)]
+                break
+    variants = [word]
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_ROOT_LENGTH:
+            variants.append(word[:-len(suffix)])
+    return variants
+
+
+def indonesian_roots(word: str) -> List[str]:
+    """Candidate root forms of an Indonesian word (the word itself first)
+
+    A light Nazief-Adriani style stripper: particles and possessives, then each
+    derivational suffix and each matching prefix. Affix boundaries are ambiguous
+    (pe-nilai-an vs pen-ilai-an, ke-bijak-an vs ke-bija-kan), so every reading
+    is kept as an alternative, including the nasal recoding (meny- -> s,
+    meng- -> k, mem- -> p, men- -> t) before a vowel.
+    """
+    word = word.lower()
+    candidates = []
+    for stem in _suffix_variants(word):
+        candidates.append(stem)
+        for prefix, recoded in _PREFIXES:
+            if stem.startswith(prefix) and len(stem) - len(prefix) >= MIN_ROOT_LENGTH - 1:
+                rest = stem[len(prefix):]
+                candidates.append(rest)
+                if recoded and rest[:1] in _VOWELS:
+                    candidates.append(recoded + rest)
+    roots = [word]
+    for candidate in candidates:
+        if len(candidate) >= MIN_ROOT_LENGTH and candidate not in roots:
+            roots.append(candidate)
+    return roots
+
+
+def build_match_query(query: str, prefix: bool = False) -> Optional[str]:
+    """FTS5 MATCH expression: every word (or one of its roots) must appear
+
+    prefix=True turns each alternative into a prefix query, for word-tokenized
+    indexes where a root only matches inflected forms as a token prefix.
+    """
+    groups = []
+    for word in _WORD_PATTERN.findall(query or ''):
+        if len(word) < MIN_TERM_LENGTH:
+            continue
+        alternatives = ' OR '.join('"{}"{}'.format(root.replace('"', '""'), '*' if prefix else '')
+                                   for root in indonesian_roots(word))
+        groups.append(f"({alternatives})")
+    return ' AND '.join(groups) if groups else None
+
+
+def _trigger_sql(source: Dict[str, Any]) -> List[str]:
+    table = source['table']
+    slot = source['slot']
+    insert_new = source['select'].format(key=f'NEW.rowid * {SLOTS} + {slot}', where='t.rowid = NEW.rowid AND')
+    return [f"""
+        CREATE TRIGGER IF NOT EXISTS trg_search_{table}_insert AFTER INSERT ON {table}
+        BEGIN
+            INSERT INTO search_index (rowid, title, body, entity, entity_id, tahun, aspek) {insert_new};
+        END;
+    """, f"""
+        CREATE TRIGGER IF NOT EXISTS trg_search_{table}_update AFTER UPDATE ON {table}
+        BEGIN
+            DELETE FROM search_index WHERE rowid = OLD.rowid * {SLOTS} + {slot};
+            INSERT INTO search_index (rowid, title, body, entity, entity_id, tahun, aspek) {insert_new};
+        END;
+    """, f"""
+        CREATE TRIGGER IF NOT EXISTS trg_search_{table}_delete AFTER DELETE ON {table}
+        BEGIN
+            DELETE FROM search_index WHERE rowid = OLD.rowid * {SLOTS} + {slot};
+        END;
+    """]
+
+
+def install() -> bool:
+    """Create the FTS5 index and its triggers; fill it on first install
+
+    Returns False (search disabled) when this SQLite build has no FTS5/trigram.
+    """
+    statements = []
+    for source in SOURCES.values():
+        statements.extend(_trigger_sql(source))
+    # AOI recommendations take their year from the parent table
+    statements.append(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_search_aoi_tables_tahun AFTER UPDATE OF tahun ON aoi_tables
+        BEGIN
+            UPDATE search_index SET tahun = NEW.tahun
+            WHERE rowid IN (SELECT rowid * {SLOTS} + 2 FROM aoi_recommendations WHERE aoi_table_id = NEW.id);
+        END;
+    """)
+
+    try:
+        with get_db_connection() as conn:
+            created = not conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_index'"
+            ).fetchone()
+            conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+                    title, body,
+                    entity UNINDEXED, entity_id UNINDEXED, tahun UNINDEXED, aspek UNINDEXED,
+                    tokenize = 'trigram'
+                )
+            """)
+            conn.executescript('\n'.join(statements))
+    except Exception as e:
+        safe_print(f"⚠️ Full-text search unavailable (SQLite FTS5/trigram): {e}")
+        return False
+
+    if created:
+        count = rebuild()
+        safe_print(f"✅ Built full-text search index: {count} entries")
+    return True
+
+
+def rebuild() -> int:
+    """Repopulate the whole index from the source tables"""
+    with get_db_connection() as conn:
+        conn.execute("DELETE FROM search_index")
+        for source in SOURCES.values():
+            conn.execute(
+                "INSERT INTO search_index (rowid, title, body, entity, entity_id, tahun, aspek) "
+                + source['select'].format(key=f"t.rowid * {SLOTS} + {source['slot']}", where='')
+            )
+        return conn.execute("SELECT COUNT(*) FROM search_index").fetchone()[0]
+
+
+def search(query: str, year: Optional[int] = None, aspek: Optional[str] = None,
+           entities: Optional[Sequence[str]] = None, limit: int = SEARCH_LIMIT) -> List[Dict[str, Any]]:
+    """Ranked (bm25, title weighted over body) search with year/aspek/entity filters"""
+    match = build_match_query(query)
+    if not match:
+        return []
+
+    conditions, params = ['search_index MATCH ?'], [match]
+    if year:
+        conditions.append('tahun = ?')
+        params.append(year)
+    if aspek:
+        conditions.append('aspek = ?')
+        params.append(aspek)
+    if entities:
+        conditions.append(f"entity IN ({', '.join('?' for _ in entities)})")
+        params.extend(entities)
+
+    with get_db_connection() as conn:
+        rows = conn.execute(f"""
+            SELECT entity, entity_id, tahun, aspek, title,
+                   snippet(search_index, -1, '<mark>', '</mark>', '…', 16) AS snippet,
+                   bm25(search_index, 10.0, 2.0) AS score
+            FROM search_index
+            WHERE {' AND '.join(conditions)}
+            ORDER BY score
+            LIMIT ?
+        """, params + [limit]).fetchall()
+
+    return [{
+        'entity': row['entity'],
+        'id': row['entity_id'],
+        'tahun': row['tahun'],
+        'aspek': row['aspek'] or '',
+        'title': row['title'] or '',
+        'snippet': row['snippet'] or '',
+        'score': round(-row['score'], 4),
+    } for row in rows]
@@ -0,0 +1,127 @@
+"""
+Session Tokens - Signed, expiring session tokens for authenticated API calls
+Issued by /api/login-db; revoked tokens are tracked in SQLite (revoked_tokens)
+"""
+
+import os
+import time
+import uuid
+import secrets
+from functools import wraps
+from typing import Optional, Dict, Any
+
+from flask import request, jsonify, g
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+from database import get_db_connection
+from windows_utils import safe_print
+
+# Token lifetime in seconds (default: one working day)
+SESSION_TOKEN_MAX_AGE = int(os.environ.get('SESSION_TOKEN_MAX_AGE', 8 * 60 * 60))
+SESSION_TOKEN_SALT = 'gcg-session'
+# app_secrets row holding the generated key when SESSION_SECRET_KEY is not set
+SESSION_SECRET_NAME = 'session_secret_key'
+
+# Claims copied from the user record into the token
+SESSION_CLAIMS = ('id', 'email', 'role', 'name', 'direktorat', 'subdirektorat', 'divisi')
+
+_serializer: Optional[URLSafeTimedSerializer] = None
+
+
+def _shared_secret_key() -> str:
+    """Random signing key stored in SQLite, so every worker (and restart) uses the same one
+
+    The first worker to get here inserts its key; the others' inserts are
+    ignored and they all read back the stored one.
+    """
+    with get_db_connection() as conn:
+        conn.execute("INSERT OR IGNORE INTO app_secrets (name, value) VALUES (?, ?)",
+                     (SESSION_SECRET_NAME, secrets.token_hex(32)))
+        return conn.execute("SELECT value FROM app_secrets WHERE name = ?",
+                            (SESSION_SECRET_NAME,)).fetchone()['value']
+
+
+def _get_serializer() -> URLSafeTimedSerializer:
+    """Create the token serializer on first use (after .env has been loaded)"""
+    global _serializer
+    if _serializer is None:
+        secret_key = os.environ.get('SESSION_SECRET_KEY')
+        if not secret_key:
+            secret_key = _shared_secret_key()
+            safe_print("⚠️ SESSION_SECRET_KEY not set - using the generated key stored in the database")
+        _serializer = URLSafeTimedSerializer(secret_key, salt=SESSION_TOKEN_SALT)
+    return _serializer
+
+
+def issue_token(user: Dict[str, Any]) -> Dict[str, Any]:
+    """Issue a signed session token carrying the user's role and organisation"""
+    claims = {key: str(user.get(key) or '') for key in SESSION_CLAIMS}
+    claims['jti'] = uuid.uuid4().hex
+    claims['exp'] = int(time.time()) + SESSION_TOKEN_MAX_AGE
+    return {
+        'token': _get_serializer().dumps(claims),
+        'expiresAt': claims['exp']
+    }
+
+
+def _is_revoked(jti: str) -> bool:
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM revoked_tokens WHERE jti = ?", (jti,))
+        return cursor.fetchone() is not None
+
+
+def verify_token(token: str) -> Optional[Dict[str, Any]]:
+    """Return the token's claims, or None if it is invalid, expired or revoked"""
+    if not token:
+        return None
+    try:
+        claims = _get_serializer().loads(token, max_age=SESSION_TOKEN_MAX_AGE)
+    except (SignatureExpired, BadSignature):
+        return None
+    if not isinstance(claims, dict) or 'jti' not in claims:
+        return None
+    if _is_revoked(claims['jti']):
+        return None
+    return claims
+
+
+def revoke_token(token: str) -> bool:
+    """Add a token to the revocation list; expired entries are purged on the way"""
+    claims = verify_token(token)
+    if claims is None:
+        return False
+    now = int(time.time())
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM revoked_tokens WHERE expires_at < ?", (now,))
+        cursor.execute("""
+            INSERT OR IGNORE INTO revoked_tokens (jti, user_email, expires_at)
+            VALUES (?, ?, ?)
+        """, (claims['jti'], claims.get('email'), claims.get('exp', now + SESSION_TOKEN_MAX_AGE)))
+    return True
+
+
+def get_request_token() -> str:
+    """Extract the bearer token from the Authorization header"""
+    auth_header = request.headers.get('Authorization', '')
+    if auth_header.startswith('Bearer '):
+        return auth_header[len('Bearer '):].strip()
+    return ''
+
+
+def require_session(optional: bool = False):
+    """Decorator that verifies the request's session token
+
+    The verified claims are available as flask.g.session (None when the
+    token is missing or invalid and optional=True). Without optional, such
+    requests get a 401.
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            g.session = verify_token(get_request_token())
+            if g.session is None and not optional:
+                return jsonify({'error': 'Invalid or expired session'}), 401
+            return f(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -2,54 +2,640 @@
 Storage Service - Handles file operations for local storage
 """
 
+import atexit
+import csv
+import json
 import os
+import pickle
+import shutil
+import tempfile
 import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, ExitStack
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Callable, Dict, Tuple, Iterable, List
 import pandas as pd
 from windows_utils import safe_print
 
+try:
+    import fcntl
+except ImportError:  # Windows: locks only cover threads of this process
+    fcntl = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as pa_feather
+except ImportError:
+    pa = None
+
+# Keep the previous generation of each written file as <name>.prev for rollback
+KEEP_PREVIOUS_GENERATION = os.environ.get('STORAGE_KEEP_PREVIOUS', '1') != '0'
+PREVIOUS_GENERATION_SUFFIX = '.prev'
+# Seconds to wait for another worker's lock before giving up
+LOCK_TIMEOUT = float(os.environ.get('STORAGE_LOCK_TIMEOUT', '30'))
+LOCK_SUFFIX = '.lock'
+_LOCK_POLL_INTERVAL = 0.01
+_LOCK_POLL_MAX_INTERVAL = 0.2
+# Write-behind window in milliseconds (0 = write through). Buffered writes are
+# only visible to this process until flushed, so it is refused with more than one worker.
+WRITE_BEHIND_MS = int(os.environ.get('STORAGE_WRITE_BEHIND_MS', '0'))
+# Worker processes the server runs (WEB_CONCURRENCY is gunicorn's setting)
+WORKER_PROCESSES = int(os.environ.get('WEB_CONCURRENCY', '1'))
+# Binary read cache next to each xlsx/csv: Feather with pyarrow, else pickle protocol 5
+USE_SIDECAR = os.environ.get('STORAGE_SIDECAR', '1') != '0'
+SIDECAR_SUFFIX = '.feather' if pa is not None else '.pkl'
+_SIDECAR_SOURCE_KEY = b'storage_source'
+
+# Tables stored as one file per year (web-output/output/2024.xlsx, ...) -> year column.
+# Callers keep using the logical path; years= limits reads/writes to those partitions.
+PARTITIONED_TABLES = {
+    'web-output/output.xlsx': 'Tahun',
+    'uploaded-files.xlsx': 'year',
+    'config/checklist.csv': 'tahun',
+    'config/checklist-assignments.csv': 'year',
+    'config/aspects.csv': 'tahun',
+}
+# Rows without a usable year (and the header of an emptied table)
+UNDATED_PARTITION = '_undated'
+# STORAGE_DATA_ROOT points the service at another data directory (used by the test scripts)
+_DATA_ROOT = Path(os.environ.get('STORAGE_DATA_ROOT') or Path(__file__).parent.parent / 'data')
+
+
+def _source_signature(path: Path) -> Optional[list]:
+    """Identity of a file's current content; atomic writes always change the inode"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_ino, stat.st_mtime_ns, stat.st_size]
+
+
+def _partition_key(value) -> str:
+    """Partition name for a year value: '2024' for 2024 / 2024.0 / '2024', else _undated"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return UNDATED_PARTITION
+    if pd.isna(number) or not number.is_integer():
+        return UNDATED_PARTITION
+    return str(int(number))
+
+
+def _partition_keys_of(df: pd.DataFrame, column: str) -> pd.Series:
+    if column not in df.columns:
+        return pd.Series(UNDATED_PARTITION, index=df.index, dtype=object)
+    years = pd.to_numeric(df[column], errors='coerce')
+    keys = years.map(lambda year: str(int(year)) if pd.notna(year) and float(year).is_integer() else UNDATED_PARTITION)
+    return keys.astype(object)
+
+
+def _partition_sort_key(key: str):
+    return (0, int(key), '') if key.isdigit() else (1, 0, key)
+
+
+def _frame_signature(df: pd.DataFrame) -> Optional[tuple]:
+    """Cheap content signature (columns, rows, row-hash sum); None when the frame cannot be hashed"""
+    try:
+        return tuple(df.columns), len(df), int(pd.util.hash_pandas_object(df, index=False).sum())
+    except TypeError:
+        return None
+
+
+def _sidecar_path(source_path: Path) -> Path:
+    return source_path.with_name(f'.~{source_path.name}{SIDECAR_SUFFIX}')
+
+
+def _read_sidecar(source_path: Path, signature: list) -> Optional[pd.DataFrame]:
+    """The cached frame if the sidecar was built from this exact source version"""
+    sidecar = _sidecar_path(source_path)
+    if not sidecar.exists():
+        return None
+    try:
+        if pa is not None:
+            table = pa_feather.read_table(str(sidecar))
+            source = (table.schema.metadata or {}).get(_SIDECAR_SOURCE_KEY)
+            if source is None or json.loads(source) != signature:
+                return None
+            return table.to_pandas()
+        with open(sidecar, 'rb') as f:
+            cached = pickle.load(f)
+        if cached.get('source') != signature:
+            return None
+        return cached['frame']
+    except Exception as e:
+        safe_print(f"⚠️ Ignoring unreadable sidecar {sidecar.name}: {e}")
+        return None
+
+
+def _write_sidecar(source_path: Path, signature: list, df: pd.DataFrame):
+    """Cache a parsed frame; the temp+rename keeps concurrent readers safe"""
+    sidecar = _sidecar_path(source_path)
+    fd, temp_path = tempfile.mkstemp(prefix=f'.~{source_path.name}.', suffix='.tmp', dir=str(source_path.parent))
+    os.close(fd)
+    try:
+        if pa is not None:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            metadata = dict(table.schema.metadata or {})
+            metadata[_SIDECAR_SOURCE_KEY] = json.dumps(signature).encode('utf-8')
+            pa_feather.write_feather(table.replace_schema_metadata(metadata), temp_path)
+        else:
+            with open(temp_path, 'wb') as f:
+                pickle.dump({'source': signature, 'frame': df}, f, protocol=5)
+        os.replace(temp_path, sidecar)
+    except Exception as e:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        safe_print(f"⚠️ Could not write sidecar for {source_path.name}: {e}")
+
+
+class StorageLockTimeout(TimeoutError):
+    """A stored file stayed locked by another thread/process past the timeout"""
+
+
+def _fsync_directory(directory: Path):
+    """Persist a rename; directories cannot be opened for fsync on Windows"""
+    if os.name == 'nt':
+        return
+    fd = os.open(str(directory), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class _HeldLock:
+    """A lock this thread holds on one stored file (re-entered `depth` times)"""
+
+    def __init__(self, handle, exclusive: bool):
+        self.handle = handle
+        self.exclusive = exclusive
+        self.depth = 1
+
+
 class StorageService:
-    """Local file storage service"""
+    """Local file storage service
 
-    def __init__(self):
+    Writes are atomic: the new content goes to a temp file in the same
+    directory, is fsynced and then renamed over the target with os.replace,
+    so readers see either the old or the new file and never a torn one.
+
+    Cross-process reader/writer locks (fcntl.flock on a hidden .~<name>.lock
+    file next to the data file) serialize writers across worker processes.
+    Wrap a read-modify-write cycle in transaction() so no other worker can
+    write the file between the read and the write.
+
+    Write-behind (write_behind_ms > 0, or inside write_behind()) keeps the
+    latest frame per path in memory and rewrites each file once per window.
+    The timed window is single-worker only; write_behind() flushes before
+    the enclosing transaction() releases its locks, so it is safe anywhere.
+    Reads of a buffered path return the buffered frame; flushes write files
+    in the order they were first modified, and run again at interpreter exit.
+
+    Parsed files are cached in a binary sidecar (.~<name>.feather or .pkl)
+    stamped with the source file's inode/mtime/size. Reads use it while it
+    matches the file on disk; after a write it is rebuilt in the background
+    from the new file, so the xlsx/csv stays the source of truth.
+    """
+
+    def __init__(self, keep_previous: bool = KEEP_PREVIOUS_GENERATION, lock_timeout: float = LOCK_TIMEOUT,
+                 write_behind_ms: int = WRITE_BEHIND_MS, use_sidecar: bool = USE_SIDECAR):
         self.storage_mode = 'local'
-        # File locks to prevent race conditions
+        self.use_sidecar = use_sidecar
+        self._sidecar_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='storage-sidecar')
+        self.keep_previous = keep_previous
+        self.lock_timeout = lock_timeout
+        if write_behind_ms > 0 and WORKER_PROCESSES > 1:
+            # A timed flush lands after transaction() released the lock and would
+            # overwrite whatever another worker wrote in the meantime
+            raise RuntimeError(f"STORAGE_WRITE_BEHIND_MS needs a single worker process "
+                               f"(WEB_CONCURRENCY={WORKER_PROCESSES})")
+        self.write_behind_ms = write_behind_ms
+        # Buffered writes: file_path -> (kind, frame), in first-modified order
+        self._pending: Dict[str, Tuple[str, pd.DataFrame]] = {}
+        self._pending_lock = threading.RLock()
+        self._flush_timer: Optional[threading.Timer] = None
+        atexit.register(self.flush)
+        # Locks held by the current thread: file_path -> _HeldLock
+        self._held = threading.local()
+        # Without fcntl, per-file RLocks stand in (single process only)
         self._file_locks = {}
         self._locks_lock = threading.Lock()  # Lock to protect the _file_locks dict itself
+        # Partitions written by this process: partition_path -> ((mtime_ns, size) after the write, frame signature)
+        self._partition_signatures: Dict[str, Tuple[Optional[tuple], tuple]] = {}
+        if fcntl is None:
+            safe_print("⚠️ fcntl unavailable: storage locks only cover this process, run a single worker")
         safe_print("✅ Local storage mode initialized")
 
-    def _get_file_lock(self, file_path: str) -> threading.Lock:
-        """Get or create a threading lock for a specific file path"""
+    def _get_file_lock(self, file_path: str) -> threading.RLock:
+        """Get or create the in-process lock for a file path (no-fcntl fallback)"""
         with self._locks_lock:
             if file_path not in self._file_locks:
-                self._file_locks[file_path] = threading.Lock()
+                self._file_locks[file_path] = threading.RLock()
             return self._file_locks[file_path]
 
-    def read_excel(self, file_path: str) -> Optional[pd.DataFrame]:
-        """Read Excel file from local storage"""
+    def _held_locks(self) -> dict:
+        if not hasattr(self._held, 'locks'):
+            self._held.locks = {}
+        return self._held.locks
+
+    @staticmethod
+    def _lock_path(file_path: str) -> Path:
+        full_path = _DATA_ROOT / file_path
+        return full_path.with_name(f'.~{full_path.name}{LOCK_SUFFIX}')
+
+    def _acquire(self, file_path: str, exclusive: bool, timeout: float):
+        """Take a shared/exclusive lock, polling until the timeout expires"""
+        deadline = time.monotonic() + timeout
+        interval = _LOCK_POLL_INTERVAL
+
+        if fcntl is None:
+            file_lock = self._get_file_lock(file_path)
+            if not file_lock.acquire(timeout=timeout):
+                raise StorageLockTimeout(f"Timed out after {timeout}s waiting for lock on {file_path}")
+            return file_lock
+
+        lock_path = self._lock_path(file_path)
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        handle = open(lock_path, 'a+b')
+        operation = (fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH) | fcntl.LOCK_NB
+        try:
+            while True:
+                try:
+                    fcntl.flock(handle.fileno(), operation)
+                    return handle
+                except BlockingIOError:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise StorageLockTimeout(
+                            f"Timed out after {timeout}s waiting for "
+                            f"{'exclusive' if exclusive else 'shared'} lock on {file_path}"
+                        )
+                    time.sleep(min(interval, remaining))
+                    interval = min(interval * 2, _LOCK_POLL_MAX_INTERVAL)
+        except BaseException:
+            handle.close()
+            raise
+
+    @staticmethod
+    def _release(handle):
+        if fcntl is None:
+            handle.release()
+        else:
+            # Closing the descriptor drops the flock
+            handle.close()
+
+    @contextmanager
+    def lock(self, file_path: str, exclusive: bool = True, timeout: Optional[float] = None):
+        """Hold a shared (readers) or exclusive (writer) lock on a stored file
+
+        Re-entrant per thread: nested lock()/write_*() calls on a file this
+        thread already holds exclusively just pass through. Upgrading a shared
+        lock to exclusive is refused, since flock cannot do it atomically.
+        Raises StorageLockTimeout when the lock is not granted in time.
+        """
+        held_locks = self._held_locks()
+        held = held_locks.get(file_path)
+        if held is not None:
+            if exclusive and not held.exclusive:
+                raise RuntimeError(f"Cannot upgrade shared lock on {file_path} to exclusive")
+            held.depth += 1
+            try:
+                yield
+            finally:
+                held.depth -= 1
+            return
+
+        handle = self._acquire(file_path, exclusive, self.lock_timeout if timeout is None else timeout)
+        held_locks[file_path] = _HeldLock(handle, exclusive)
+        try:
+            yield
+        finally:
+            del held_locks[file_path]
+            self._release(handle)
+
+    @contextmanager
+    def transaction(self, *file_paths: str, timeout: Optional[float] = None):
+        """Exclusive locks on one or more files for a whole read-modify-write cycle
+
+        Files are locked in sorted order so concurrent transactions over the
+        same files cannot deadlock. Also usable as a view decorator.
+        """
+        with ExitStack() as stack:
+            for file_path in sorted(set(file_paths)):
+                stack.enter_context(self.lock(file_path, exclusive=True, timeout=timeout))
+            yield
+
+    # Write-behind buffer
+    def _buffering(self) -> bool:
+        return self.write_behind_ms > 0 or getattr(self._held, 'batch_depth', 0) > 0
+
+    def _buffer_write(self, kind: str, df: pd.DataFrame, file_path: str) -> bool:
+        """Queue the frame as the next content of file_path (replacing an older queued one)"""
+        with self._pending_lock:
+            # Re-queueing a path keeps its position, so flush order follows first modification
+            self._pending[file_path] = (kind, df.copy())
+            if self.write_behind_ms > 0 and self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.write_behind_ms / 1000, self._flush_on_timer)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        return True
+
+    def _pending_frame(self, file_path: str) -> Optional[pd.DataFrame]:
+        with self._pending_lock:
+            pending = self._pending.get(file_path)
+            return pending[1].copy() if pending is not None else None
+
+    def _flush_on_timer(self):
+        with self._pending_lock:
+            self._flush_timer = None
+        self.flush()
+
+    def flush(self, file_path: Optional[str] = None) -> bool:
+        """Write buffered frames to disk (all paths, or just file_path); False if any write failed"""
+        with self._pending_lock:
+            paths = [file_path] if file_path is not None else list(self._pending)
+
+        ok, flushed = True, 0
+        for path in paths:
+            try:
+                # Take the file lock before picking the frame, so a concurrent flush
+                # can never put an older frame on disk after a newer one
+                with self.lock(path):
+                    with self._pending_lock:
+                        pending = self._pending.get(path)
+                    if pending is None:
+                        continue
+                    kind, df = pending
+                    if kind == 'excel':
+                        self._write_excel_local(df, path)
+                    else:
+                        self._write_csv_local(df, path)
+                    with self._pending_lock:
+                        # A newer frame may have been queued meanwhile; only drop the one written
+                        if self._pending.get(path) is pending:
+                            del self._pending[path]
+                    flushed += 1
+            except Exception as e:
+                ok = False
+                safe_print(f"❌ Error flushing buffered write {path}: {e}")
+        if flushed and file_path is None:
+            safe_print(f"💾 Flushed {flushed} buffered file write(s)")
+        return ok
+
+    def _discard_pending(self, file_path: str):
+        """Drop a buffered frame superseded by a direct write"""
+        with self._pending_lock:
+            self._pending.pop(file_path, None)
+
+    @contextmanager
+    def write_behind(self):
+        """Buffer this thread's writes and flush them once when the block ends
+
+        Nest it inside transaction() so the flush happens while the locks are held.
+        """
+        self._held.batch_depth = getattr(self._held, 'batch_depth', 0) + 1
+        try:
+            yield
+        finally:
+            self._held.batch_depth -= 1
+            if self._held.batch_depth == 0:
+                self.flush()
+
+    def read_excel(self, file_path: str, years: Optional[Iterable] = None) -> Optional[pd.DataFrame]:
+        """Read Excel file from local storage (years= reads only those partitions)"""
         try:
-            return self._read_excel_local(file_path)
+            return self._read_table('excel', file_path, years)
         except Exception as e:
             safe_print(f"❌ Error reading Excel file {file_path}: {e}")
             return None
 
-    def write_excel(self, df: pd.DataFrame, file_path: str) -> bool:
-        """Write Excel file to local storage"""
+    def write_excel(self, df: pd.DataFrame, file_path: str, years: Optional[Iterable] = None) -> bool:
+        """Write Excel file to local storage (years= replaces only those partitions)"""
         try:
-            return self._write_excel_local(df, file_path)
+            return self._write_table('excel', df, file_path, years)
         except Exception as e:
             safe_print(f"❌ Error writing Excel file {file_path}: {e}")
             return False
 
     def file_exists(self, file_path: str) -> bool:
         """Check if file exists in local storage"""
+        if file_path in self._pending:
+            return True
         try:
+            if self._is_partitioned(file_path):
+                return bool(self._partition_names(file_path))
             return self._file_exists_local(file_path)
         except Exception as e:
             safe_print(f"❌ Error checking file existence {file_path}: {e}")
             return False
 
+    def get_mtime(self, file_path: str) -> Optional[tuple]:
+        """Return a (mtime_ns, size) signature for a stored file, or None if missing"""
+        try:
+            if self._is_partitioned(file_path):
+                return self._get_partitions_mtime(file_path)
+            # Callers use the signature to detect changes, so buffered content must land first
+            self.flush(file_path)
+            return self._get_mtime_local(file_path)
+        except Exception as e:
+            safe_print(f"❌ Error reading modification time {file_path}: {e}")
+            return None
+
+    def list_partitions(self, file_path: str) -> List[int]:
+        """Years present in a partitioned table (read from the legacy file before migration)"""
+        if self._is_partitioned(file_path):
+            names = self._partition_names(file_path)
+        else:
+            df = self._read_table(self._kind_of(file_path), file_path, None)
+            names = set(_partition_keys_of(df, PARTITIONED_TABLES[file_path]))
+        return sorted(int(name) for name in names if name.isdigit())
+
+    def partition_table(self, file_path: str) -> int:
+        """Split a legacy single-file table into per-year partitions (no-op once split)
+
+        The legacy file is left in place as a backup. Returns the number of
+        partitions written.
+        """
+        with self.lock(file_path):
+            if self._is_partitioned(file_path):
+                return 0
+            kind = self._kind_of(file_path)
+            try:
+                df = self._read_single(kind, file_path)
+            except FileNotFoundError:
+                (_DATA_ROOT / self._partition_dir(file_path)).mkdir(parents=True, exist_ok=True)
+                return 0
+            (_DATA_ROOT / self._partition_dir(file_path)).mkdir(parents=True, exist_ok=True)
+            written = self._write_partitions(kind, df, file_path, None)
+        safe_print(f"🗂️ Partitioned {file_path} into {written} yearly file(s)")
+        return written
+
+    # Table dispatch: single files and per-year partitions
+    @staticmethod
+    def _kind_of(file_path: str) -> str:
+        return 'excel' if file_path.endswith(('.xlsx', '.xls')) else 'csv'
+
+    @staticmethod
+    def _partition_dir(file_path: str) -> str:
+        return file_path.rsplit('.', 1)[0]
+
+    def _partition_path(self, file_path: str, name: str) -> str:
+        return f"{self._partition_dir(file_path)}/{name}{Path(file_path).suffix}"
+
+    def _is_partitioned(self, file_path: str) -> bool:
+        return file_path in PARTITIONED_TABLES and (_DATA_ROOT / self._partition_dir(file_path)).is_dir()
+
+    def _partition_names(self, file_path: str) -> List[str]:
+        """Partition names on disk or buffered, in year order (_undated last)"""
+        directory = _DATA_ROOT / self._partition_dir(file_path)
+        suffix = Path(file_path).suffix
+        names = {path.stem for path in directory.glob(f'*{suffix}') if not self._is_internal_file(path)}
+        prefix = self._partition_dir(file_path) + '/'
+        with self._pending_lock:
+            names.update(Path(path).stem for path in self._pending if path.startswith(prefix))
+        return sorted(names, key=_partition_sort_key)
+
+    def _get_partitions_mtime(self, file_path: str) -> tuple:
+        """Latest mtime and total size over the partitions; the directory mtime covers removals"""
+        prefix = self._partition_dir(file_path) + '/'
+        with self._pending_lock:
+            buffered = [path for path in self._pending if path.startswith(prefix)]
+        for path in buffered:
+            self.flush(path)
+        directory = _DATA_ROOT / self._partition_dir(file_path)
+        latest, total = directory.stat().st_mtime_ns, 0
+        for name in self._partition_names(file_path):
+            stat = (directory / f'{name}{Path(file_path).suffix}').stat()
+            latest, total = max(latest, stat.st_mtime_ns), total + stat.st_size
+        return (latest, total)
+
+    def _read_single(self, kind: str, file_path: str) -> pd.DataFrame:
+        pending = self._pending_frame(file_path)
+        if pending is not None:
+            return pending
+        return self._read_excel_local(file_path) if kind == 'excel' else self._read_csv_local(file_path)
+
+    def _read_table(self, kind: str, file_path: str, years: Optional[Iterable]) -> pd.DataFrame:
+        if years is not None and file_path not in PARTITIONED_TABLES:
+            raise ValueError(f"{file_path} is not partitioned by year")
+        wanted = None if years is None else {_partition_key(year) for year in years}
+
+        if not self._is_partitioned(file_path):
+            df = self._read_single(kind, file_path)
+            if wanted is not None:
+                df = df[_partition_keys_of(df, PARTITIONED_TABLES[file_path]).isin(wanted)].reset_index(drop=True)
+            return df
+
+        available = self._partition_names(file_path)
+        if not available:
+            raise FileNotFoundError(f"No partitions stored for {file_path}")
+        names = [name for name in available if wanted is None or name in wanted]
+        frames = [self._read_single(kind, self._partition_path(file_path, name)) for name in names]
+        # Header-only partitions would turn numeric columns into object on concat
+        filled = [frame for frame in frames if not frame.empty]
+        if len(filled) > 1:
+            # All-NaN columns of a partition parse as float; re-infer so text columns keep their dtype
+            return pd.concat(filled, ignore_index=True).infer_objects()
+        if filled:
+            return filled[0]
+        if frames:
+            return frames[0]
+        # Requested years are absent: an empty frame with the table's columns
+        return self._read_single(kind, self._partition_path(file_path, available[0])).iloc[0:0]
+
+    def _write_single(self, kind: str, df: pd.DataFrame, file_path: str) -> bool:
+        if self._buffering():
+            return self._buffer_write(kind, df, file_path)
+        with self.lock(file_path):
+            self._discard_pending(file_path)
+            if kind == 'excel':
+                return self._write_excel_local(df, file_path)
+            return self._write_csv_local(df, file_path)
+
+    def _write_table(self, kind: str, df: pd.DataFrame, file_path: str, years: Optional[Iterable]) -> bool:
+        if file_path not in PARTITIONED_TABLES:
+            if years is not None:
+                raise ValueError(f"{file_path} is not partitioned by year")
+            return self._write_single(kind, df, file_path)
+
+        with self.lock(file_path):
+            if years is not None:
+                # A partial write needs the legacy rows of the other years split out first
+                self.partition_table(file_path)
+            (_DATA_ROOT / self._partition_dir(file_path)).mkdir(parents=True, exist_ok=True)
+            self._write_partitions(kind, df, file_path, years)
+        return True
+
+    def _write_partitions(self, kind: str, df: pd.DataFrame, file_path: str, years: Optional[Iterable]) -> int:
+        """Replace the given years' partitions (all of them when years is None) with df's rows
+
+        Unchanged partitions are not rewritten and emptied ones are removed, so a
+        whole-table write after editing one year only touches that year's file.
+        A partition counts as unchanged when this process last wrote it with the
+        same frame signature and the file is still as it left it; nothing is read back.
+        """
+        keys = _partition_keys_of(df, PARTITIONED_TABLES[file_path])
+        groups = {name: part.reset_index(drop=True) for name, part in df.groupby(keys, sort=False)}
+        if years is None:
+            targets = set(self._partition_names(file_path)) | set(groups)
+        else:
+            targets = {_partition_key(year) for year in years}
+            stray = set(groups) - targets
+            if stray:
+                raise ValueError(f"Rows for {sorted(stray)} outside the partitions being written ({sorted(targets)})")
+
+        written = 0
+        for name in sorted(targets, key=_partition_sort_key):
+            partition_path = self._partition_path(file_path, name)
+            if name not in groups:
+                self._remove_partition(partition_path)
+                continue
+            signature = _frame_signature(groups[name])
+            last = self._partition_signatures.get(partition_path)
+            if signature is not None and last is not None and last[1] == signature \
+                    and last[0] == self._get_mtime_local(partition_path):
+                continue
+            stored = self._write_single(kind, groups[name], partition_path)
+            if stored and signature is not None and not self._buffering():
+                self._partition_signatures[partition_path] = (self._get_mtime_local(partition_path), signature)
+            else:
+                self._partition_signatures.pop(partition_path, None)
+            written += 1
+
+        if not self._partition_names(file_path):
+            # Keep the columns of an emptied table readable
+            self._write_single(kind, df.iloc[0:0], self._partition_path(file_path, UNDATED_PARTITION))
+        return written
+
+    def _remove_partition(self, partition_path: str):
+        """Delete a partition file (kept as <name>.prev when previous generations are kept)"""
+        with self.lock(partition_path):
+            self._discard_pending(partition_path)
+            self._partition_signatures.pop(partition_path, None)
+            full_path = _DATA_ROOT / partition_path
+            if full_path.exists():
+                if self.keep_previous:
+                    os.replace(full_path, full_path.with_name(full_path.name + PREVIOUS_GENERATION_SUFFIX))
+                else:
+                    full_path.unlink()
+                _fsync_directory(full_path.parent)
+            _sidecar_path(full_path).unlink(missing_ok=True)
+
+    def restore_previous(self, file_path: str) -> bool:
+        """Roll a stored file back to the generation before its last write"""
+        full_path = _DATA_ROOT / file_path
+        previous_path = full_path.with_name(full_path.name + PREVIOUS_GENERATION_SUFFIX)
+        self.flush(file_path)
+        with self.lock(file_path):
+            if not previous_path.exists():
+                safe_print(f"⚠️ No previous generation to restore for {file_path}")
+                return False
+            os.replace(previous_path, full_path)
+            _fsync_directory(full_path.parent)
+        safe_print(f"⏪ Restored previous generation of {file_path}")
+        return True
+
     def list_files(self, directory_path: str = "") -> list:
         """List files in local storage directory"""
         try:
@@ -59,44 +645,121 @@ class StorageService:
             return []
 
     # Local storage methods
-    def _read_excel_local(self, file_path: str) -> pd.DataFrame:
-        """Read Excel file from local storage"""
+    def _atomic_write(self, full_path: Path, write: Callable[[str], None]):
+        """Write via a same-directory temp file, fsync, then os.replace over full_path
+
+        The caller holds the file's exclusive lock. With keep_previous, the current file is
+        hard-linked (copied where links are unsupported) to <name>.prev first.
+        """
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        # Keep the real extension so pandas picks the right writer engine
+        fd, temp_path = tempfile.mkstemp(prefix=f'.~{full_path.stem}.', suffix=full_path.suffix,
+                                         dir=str(full_path.parent))
+        os.close(fd)
+        try:
+            write(temp_path)
+            with open(temp_path, 'rb+') as f:
+                os.fsync(f.fileno())
+
+            if self.keep_previous and full_path.exists():
+                previous_path = full_path.with_name(full_path.name + PREVIOUS_GENERATION_SUFFIX)
+                if previous_path.exists():
+                    previous_path.unlink()
+                try:
+                    os.link(full_path, previous_path)
+                except OSError:
+                    shutil.copy2(full_path, previous_path)
+
+            os.replace(temp_path, full_path)
+            _fsync_directory(full_path.parent)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    @staticmethod
+    def _resolve_local(file_path: str) -> Path:
+        """Existing path of a stored file: data directory first, then the old location"""
         # Use data directory for organized local storage
-        full_path = Path(__file__).parent.parent / 'data' / file_path
+        full_path = _DATA_ROOT / file_path
         if full_path.exists():
-            return pd.read_excel(str(full_path))
-        else:
-            # Fallback to old location for backward compatibility
-            fallback_path = Path(__file__).parent.parent / file_path
-            if fallback_path.exists():
-                return pd.read_excel(str(fallback_path))
-            raise FileNotFoundError(f"Local file not found: {full_path} or {fallback_path}")
+            return full_path
+        # Fallback to old location for backward compatibility
+        fallback_path = Path(__file__).parent.parent / file_path
+        if fallback_path.exists():
+            return fallback_path
+        raise FileNotFoundError(f"Local file not found: {full_path} or {fallback_path}")
+
+    def _read_cached(self, full_path: Path, parse: Callable[[str], pd.DataFrame]) -> pd.DataFrame:
+        """Parse a file, going through its binary sidecar when enabled"""
+        if not self.use_sidecar:
+            return parse(str(full_path))
+        # Take the signature before parsing: a write racing the parse leaves the sidecar stale, not wrong
+        signature = _source_signature(full_path)
+        if signature is not None:
+            cached = _read_sidecar(full_path, signature)
+            if cached is not None:
+                return cached
+        df = parse(str(full_path))
+        if signature is not None:
+            _write_sidecar(full_path, signature, df)
+        return df
+
+    def _refresh_sidecar(self, full_path: Path, parse: Callable[[str], pd.DataFrame]):
+        """Rebuild a written file's sidecar off the request thread"""
+        if not self.use_sidecar:
+            return
+
+        def rebuild():
+            try:
+                self._read_cached(full_path, parse)
+            except Exception as e:
+                safe_print(f"⚠️ Sidecar rebuild failed for {full_path.name}: {e}")
+        self._sidecar_executor.submit(rebuild)
+
+    def _read_excel_local(self, file_path: str) -> pd.DataFrame:
+        """Read Excel file from local storage"""
+        return self._read_cached(self._resolve_local(file_path), pd.read_excel)
 
     def _write_excel_local(self, df: pd.DataFrame, file_path: str) -> bool:
         """Write Excel file to local storage"""
-        file_lock = self._get_file_lock(file_path)
-        with file_lock:
+        with self.lock(file_path):
             # Use data directory for organized local storage
-            full_path = Path(__file__).parent.parent / 'data' / file_path
-            full_path.parent.mkdir(parents=True, exist_ok=True)
-            df.to_excel(str(full_path), index=False)
+            full_path = _DATA_ROOT / file_path
+            self._atomic_write(full_path, lambda temp_path: df.to_excel(temp_path, index=False))
             safe_print(f"📁 Saved Excel file to local storage: {full_path}")
+            self._refresh_sidecar(full_path, pd.read_excel)
             return True
 
     def _file_exists_local(self, file_path: str) -> bool:
         """Check if file exists in local storage"""
         # Check data directory first
-        full_path = Path(__file__).parent.parent / 'data' / file_path
+        full_path = _DATA_ROOT / file_path
         if full_path.exists():
             return True
         # Fallback to old location for backward compatibility
         fallback_path = Path(__file__).parent.parent / file_path
         return fallback_path.exists()
 
+    def _get_mtime_local(self, file_path: str) -> Optional[tuple]:
+        """Return (mtime_ns, size) of a file in local storage"""
+        # Check data directory first, then the old location (same order as reads)
+        for candidate in (_DATA_ROOT / file_path,
+                          Path(__file__).parent.parent / file_path):
+            if candidate.exists():
+                stat = candidate.stat()
+                return (stat.st_mtime_ns, stat.st_size)
+        return None
+
+    @staticmethod
+    def _is_internal_file(path: Path) -> bool:
+        """Temp files of in-flight writes and previous generations"""
+        return path.name.startswith('.~') or path.name.endswith(PREVIOUS_GENERATION_SUFFIX)
+
     def _list_files_local(self, directory_path: str) -> list:
         """List files in local storage directory"""
         # Use data directory for organized local storage
-        full_path = Path(__file__).parent.parent / 'data' / directory_path
+        full_path = _DATA_ROOT / directory_path
         if not full_path.exists():
             # Fallback to old location
             full_path = Path(__file__).parent.parent / directory_path
@@ -106,29 +769,29 @@ class StorageService:
         files = []
         if full_path.is_file():
             # If the path is a file, return just that file
-            files.append(str(full_path.relative_to(Path(__file__).parent.parent / 'data')))
+            files.append(str(full_path.relative_to(_DATA_ROOT)))
         else:
             # If it's a directory, list all files recursively
             for file_path in full_path.rglob('*'):
-                if file_path.is_file():
-                    relative_path = str(file_path.relative_to(Path(__file__).parent.parent / 'data'))
+                if file_path.is_file() and not self._is_internal_file(file_path):
+                    relative_path = str(file_path.relative_to(_DATA_ROOT))
                     files.append(relative_path)
 
         return files
 
     # CSV methods
-    def read_csv(self, file_path: str) -> Optional[pd.DataFrame]:
-        """Read CSV file from local storage"""
+    def read_csv(self, file_path: str, years: Optional[Iterable] = None) -> Optional[pd.DataFrame]:
+        """Read CSV file from local storage (years= reads only those partitions)"""
         try:
-            return self._read_csv_local(file_path)
+            return self._read_table('csv', file_path, years)
         except Exception as e:
             safe_print(f"❌ Error reading CSV file {file_path}: {e}")
             return None
 
-    def write_csv(self, df: pd.DataFrame, file_path: str) -> bool:
-        """Write CSV file to local storage"""
+    def write_csv(self, df: pd.DataFrame, file_path: str, years: Optional[Iterable] = None) -> bool:
+        """Write CSV file to local storage (years= replaces only those partitions)"""
         try:
-            return self._write_csv_local(df, file_path)
+            return self._write_table('csv', df, file_path, years)
         except Exception as e:
             safe_print(f"❌ Error writing CSV file {file_path}: {e}")
             return False
@@ -136,29 +799,41 @@ class StorageService:
     # Local CSV methods
     def _read_csv_local(self, file_path: str) -> pd.DataFrame:
         """Read CSV file from local storage"""
-        # Use data directory for organized local storage
-        full_path = Path(__file__).parent.parent / 'data' / file_path
-        if full_path.exists():
-            return pd.read_csv(str(full_path))
-        else:
-            # Fallback to old location for backward compatibility
-            fallback_path = Path(__file__).parent.parent / file_path
-            if fallback_path.exists():
-                return pd.read_csv(str(fallback_path))
-            raise FileNotFoundError(f"Local file not found: {full_path} or {fallback_path}")
+        return self._read_cached(self._resolve_local(file_path), pd.read_csv)
 
     def _write_csv_local(self, df: pd.DataFrame, file_path: str) -> bool:
         """Write CSV file to local storage"""
-        file_lock = self._get_file_lock(file_path)
-        with file_lock:
+        with self.lock(file_path):
             # Use data directory for organized local storage
-            full_path = Path(__file__).parent.parent / 'data' / file_path
-            full_path.parent.mkdir(parents=True, exist_ok=True)
+            full_path = _DATA_ROOT / file_path
             # Save with proper CSV quoting for string fields only
-            import csv
-            df.to_csv(str(full_path), index=False, quoting=csv.QUOTE_NONNUMERIC)
+            self._atomic_write(full_path, lambda temp_path: df.to_csv(temp_path, index=False,
+                                                                      quoting=csv.QUOTE_NONNUMERIC))
             safe_print(f"📁 Saved CSV file to local storage: {full_path}")
+            self._refresh_sidecar(full_path, pd.read_csv)
             return True
 
 # Global storage service instance
 storage_service = StorageService()
+
+
+def migrate_partitioned_tables() -> List[str]:
+    """One-time split of the single-file year tables into per-year partitions
+
+    Recorded per table in data_migrations so it never runs twice; the legacy
+    files are left in place untouched as a backup.
+    """
+    from database import get_db_connection
+
+    migrated = []
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        for file_path in PARTITIONED_TABLES:
+            migration_name = f'partition_by_year:{file_path}'
+            cursor.execute("SELECT 1 FROM data_migrations WHERE name = ?", (migration_name,))
+            if cursor.fetchone():
+                continue
+            if storage_service.partition_table(file_path):
+                migrated.append(file_path)
+            cursor.execute("INSERT INTO data_migrations (name) VALUES (?)", (migration_name,))
+    return migrated
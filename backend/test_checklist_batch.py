@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Regression check for POST /api/config/checklist/batch: re-importing an existing
+year must update its items in place (keyed on tahun + rowNumber), never touch
+other items and never insert duplicates. Runs against scratch copies of the
+database and data directory.
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+from windows_utils import safe_print, set_console_encoding
+
+# Set console encoding for Windows compatibility
+set_console_encoding()
+
+IMPORT_SIZE = 268  # items per year sent by the frontend's "load default checklist"
+NEW_YEAR = 2107
+
+
+def use_scratch_storage(directory):
+    """Point storage and the database at a scratch directory so checked-in data is never touched"""
+    os.environ['STORAGE_DATA_ROOT'] = os.path.join(directory, 'data')
+    import database
+    scratch_db = os.path.join(directory, 'gcg_database.db')
+    shutil.copyfile(database.DB_PATH, scratch_db)
+    database.DB_PATH = scratch_db
+    return scratch_db
+
+
+def _items(year, count, label):
+    return [{'aspek': 'ASPEK I', 'deskripsi': f'{label} {row}', 'tahun': year, 'rowNumber': row}
+            for row in range(1, count + 1)]
+
+
+def _snapshot(db, where, params=()):
+    return db.execute(f"SELECT id, tahun, row_number, aspek, deskripsi FROM checklist_gcg WHERE {where} ORDER BY id",
+                      params).fetchall()
+
+
+def test_reimport_existing_year(client, db):
+    """Re-importing a year updates rows 1..N of that year by row number and leaves everything else alone"""
+    year = db.execute("SELECT tahun FROM checklist_gcg GROUP BY tahun ORDER BY COUNT(*) DESC LIMIT 1").fetchone()[0]
+    before = {row[2]: row for row in _snapshot(db, "tahun = ?", (year,))}
+    others_before = _snapshot(db, "tahun != ?", (year,))
+    safe_print(f"🔥 Re-importing {IMPORT_SIZE} items into {year} ({len(before)} items stored)...")
+
+    for attempt in ('first', 'repeat'):
+        response = client.post('/api/config/checklist/batch', json={'items': _items(year, IMPORT_SIZE, 'Reimport')})
+        assert response.status_code == 201, f"{attempt} import: {response.status_code} {response.get_json()}"
+        report = response.get_json()['report']
+        statuses = [entry['status'] for entry in report]
+        expected = ['updated' if row in before or attempt == 'repeat' else 'inserted'
+                    for row in range(1, IMPORT_SIZE + 1)]
+        assert statuses == expected, f"{attempt} import: unexpected statuses {set(statuses)}"
+
+        after = {row[2]: row for row in _snapshot(db, "tahun = ?", (year,))}
+        assert len(after) == max(len(before), IMPORT_SIZE), \
+            f"{attempt} import: {len(after)} items stored, expected {max(len(before), IMPORT_SIZE)} (duplicates?)"
+        for row_number in range(1, IMPORT_SIZE + 1):
+            assert after[row_number][4] == f'Reimport {row_number}', f"row {row_number} not updated"
+            if row_number in before:
+                assert after[row_number][0] == before[row_number][0], f"row {row_number} changed id"
+        for row_number, row in before.items():
+            if row_number > IMPORT_SIZE:
+                assert after[row_number] == row, f"row {row_number} outside the import was modified"
+        assert _snapshot(db, "tahun != ?", (year,)) == others_before, "items of other years were modified"
+
+    from storage_service import storage_service
+    mirror = storage_service.read_csv('config/checklist.csv', years=[year])
+    assert mirror['rowNumber'].is_unique and len(mirror) >= IMPORT_SIZE, "CSV mirror has duplicate rows"
+    safe_print("✅ Re-import updates in place")
+
+
+def test_import_new_year(client, db):
+    """A new year's items are all inserted, whatever ids the other years use"""
+    db.execute("INSERT OR IGNORE INTO years (year, is_active) VALUES (?, 1)", (NEW_YEAR,))
+    db.commit()
+    response = client.post('/api/config/checklist/batch', json={'items': _items(NEW_YEAR, IMPORT_SIZE, 'New')})
+    assert response.status_code == 201, f"{response.status_code} {response.get_json()}"
+    report = response.get_json()['report']
+    assert all(entry['status'] == 'inserted' for entry in report), \
+        f"unexpected statuses {[entry for entry in report if entry['status'] != 'inserted'][:3]}"
+    stored = _snapshot(db, "tahun = ?", (NEW_YEAR,))
+    assert [row[2] for row in stored] == list(range(1, IMPORT_SIZE + 1)), "new year not numbered 1..N"
+    assert {entry['id'] for entry in report} == {row[0] for row in stored}, "report ids do not match stored ids"
+    safe_print("✅ New year inserted")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as scratch:
+        scratch_db = use_scratch_storage(scratch)
+        from app import app
+
+        db = sqlite3.connect(scratch_db)
+        try:
+            client = app.test_client()
+            test_reimport_existing_year(client, db)
+            test_import_new_year(client, db)
+        finally:
+            db.close()
@@ -6,6 +6,11 @@ Test script to verify file locking prevents race conditions
 import asyncio
 import aiohttp
 import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
 import time
 from windows_utils import safe_print, set_console_encoding
 
@@ -83,5 +88,111 @@ async def test_concurrent_writes():
             else:
                 safe_print(f"   ❌ Failed to fetch final data: {response.status}")
 
+# Partition of config/checklist.csv used by the multi-process checks (in a scratch data root)
+LOST_UPDATE_YEAR = 9999
+LOST_UPDATE_PROCESSES = 8
+LOST_UPDATE_ROUNDS = 10
+
+
+def _append_checklist_rows(worker, rounds):
+    """One worker process: read-modify-write the scratch partition, one row per round"""
+    from storage_service import storage_service
+    import pandas as pd
+
+    for round_number in range(rounds):
+        with storage_service.transaction('config/checklist.csv'):
+            df = storage_service.read_csv('config/checklist.csv', years=[LOST_UPDATE_YEAR])
+            if df is None:
+                df = pd.DataFrame()
+            row = pd.DataFrame([{
+                'id': worker * 1000 + round_number,
+                'aspek': f'worker-{worker}',
+                'deskripsi': f'Lost update check {worker}/{round_number}',
+                'pic': '',
+                'tahun': LOST_UPDATE_YEAR,
+                'rowNumber': round_number,
+                'created_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+            }])
+            storage_service.write_csv(pd.concat([df, row], ignore_index=True), 'config/checklist.csv',
+                                      years=[LOST_UPDATE_YEAR])
+
+
+def use_scratch_storage(directory):
+    """Point storage and the database at a scratch directory so checked-in data is never touched
+
+    Set before storage_service is imported; spawned workers inherit it through the environment.
+    """
+    os.environ['STORAGE_DATA_ROOT'] = os.path.join(directory, 'data')
+    import database
+    scratch_db = os.path.join(directory, 'gcg_database.db')
+    shutil.copyfile(database.DB_PATH, scratch_db)
+    database.DB_PATH = scratch_db
+
+
+def test_no_lost_updates():
+    """N processes append to config/checklist.csv inside transaction(); every row must survive"""
+    from storage_service import storage_service
+
+    safe_print(f"🔥 {LOST_UPDATE_PROCESSES} processes x {LOST_UPDATE_ROUNDS} read-modify-writes on config/checklist.csv...")
+    context = multiprocessing.get_context('spawn')
+    workers = [context.Process(target=_append_checklist_rows, args=(worker, LOST_UPDATE_ROUNDS))
+               for worker in range(LOST_UPDATE_PROCESSES)]
+    start_time = time.time()
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+
+    assert all(process.exitcode == 0 for process in workers), "a worker process failed"
+    df = storage_service.read_csv('config/checklist.csv', years=[LOST_UPDATE_YEAR])
+    expected = LOST_UPDATE_PROCESSES * LOST_UPDATE_ROUNDS
+    found = 0 if df is None else len(df)
+    safe_print(f"   Rows expected: {expected}, found: {found} ({time.time() - start_time:.2f}s)")
+    assert found == expected, f"{expected - found} row(s) lost"
+    assert df['id'].is_unique, "duplicate rows written"
+    safe_print("✅ No lost updates")
+
+
+def _hold_checklist_lock(locked, release):
+    from storage_service import storage_service
+
+    with storage_service.transaction('config/checklist.csv'):
+        locked.set()
+        release.wait(30)
+
+
+def test_lock_timeout_returns_503():
+    """A view waiting on a file another process keeps locked answers 503 with Retry-After"""
+    from app import app
+    from storage_service import storage_service
+
+    safe_print("🔥 Holding config/checklist.csv in another process...")
+    context = multiprocessing.get_context('spawn')
+    locked, release = context.Event(), context.Event()
+    holder = context.Process(target=_hold_checklist_lock, args=(locked, release))
+    holder.start()
+    lock_timeout = storage_service.lock_timeout
+    try:
+        assert locked.wait(30), "holder process never took the lock"
+        storage_service.lock_timeout = 0.5
+        response = app.test_client().post('/api/config/checklist/batch', json={
+            'items': [{'deskripsi': 'Lock timeout check', 'tahun': LOST_UPDATE_YEAR, 'rowNumber': 1}]
+        })
+        safe_print(f"   Status: {response.status_code}, Retry-After: {response.headers.get('Retry-After')}")
+        assert response.status_code == 503, f"expected 503, got {response.status_code}"
+        assert response.headers.get('Retry-After'), "503 without Retry-After"
+        safe_print("✅ Lock timeout maps to 503")
+    finally:
+        storage_service.lock_timeout = lock_timeout
+        release.set()
+        holder.join()
+
+
 if __name__ == "__main__":
-    asyncio.run(test_concurrent_writes())
\ No newline at end of file
+    # Storage-level checks need no running server; pass --http for the API check against localhost:5000
+    with tempfile.TemporaryDirectory() as scratch:
+        use_scratch_storage(scratch)
+        test_no_lost_updates()
+        test_lock_timeout_returns_503()
+    if '--http' in sys.argv:
+        asyncio.run(test_concurrent_writes())
\ No newline at end of file
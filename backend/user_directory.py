@@ -0,0 +1,165 @@
+"""
+User Directory - In-memory, email-keyed index of users for authentication
+Merges config/users.csv (primary storage) and the SQLite users table into one view
+"""
+
+import math
+import threading
+import time
+from typing import Optional, List, Dict, Any
+
+import pandas as pd
+from storage_service import storage_service
+from windows_utils import safe_print
+
+USERS_CSV_PATH = 'config/users.csv'
+# SQLite user writes this process did not make (other workers, standalone scripts)
+# are noticed within this many seconds; local writes call invalidate()
+SQLITE_POLL_SECONDS = 5.0
+
+
+def safe_str(value) -> str:
+    """Convert a CSV/SQLite cell to a string, mapping NaN/None to ''"""
+    if value is None:
+        return ''
+    if isinstance(value, float) and math.isnan(value):
+        return ''
+    if pd.isna(value):
+        return ''
+    return str(value)
+
+
+class UserDirectory:
+    """Email-keyed user index built once and rebuilt on invalidation
+
+    Each email maps to an ordered list of candidate accounts: CSV rows first
+    (in file order), then the SQLite row. The index is rebuilt lazily when
+    invalidate() has been called, when users.csv changes on disk or when the
+    users change-log version moved (polled every SQLITE_POLL_SECONDS).
+    """
+
+    def __init__(self):
+        self._index: Dict[str, List[Dict[str, Any]]] = {}
+        self._signature = None
+        self._stale = True
+        self._lock = threading.Lock()
+        self._sqlite_version = None
+        self._sqlite_polled_at = float('-inf')
+
+    def invalidate(self):
+        """Mark the index stale; the next lookup rebuilds it"""
+        self._stale = True
+
+    def _polled_sqlite_version(self):
+        """Change-log version of the users, queried at most every SQLITE_POLL_SECONDS"""
+        now = time.monotonic()
+        if now - self._sqlite_polled_at >= SQLITE_POLL_SECONDS:
+            self._sqlite_polled_at = now
+            try:
+                import change_log
+                self._sqlite_version = change_log.get_entity_version(['users'])
+            except Exception:
+                # Keep the last version: invalidate() and the CSV mtime still apply
+                pass
+        return self._sqlite_version
+
+    def _ensure_fresh(self):
+        signature = (storage_service.get_mtime(USERS_CSV_PATH), self._polled_sqlite_version())
+        if not self._stale and signature == self._signature:
+            return
+        with self._lock:
+            # Re-check under the lock so concurrent logins rebuild only once
+            if not self._stale and signature == self._signature:
+                return
+            self._stale = False
+            self._index = self._build()
+            self._signature = signature
+
+    def _build(self) -> Dict[str, List[Dict[str, Any]]]:
+        index: Dict[str, List[Dict[str, Any]]] = {}
+
+        # 1. CSV users (primary storage)
+        csv_data = storage_service.read_csv(USERS_CSV_PATH)
+        if csv_data is not None and not csv_data.empty and 'email' in csv_data.columns:
+            for record in csv_data.to_dict(orient='records'):
+                email = safe_str(record.get('email')).strip()
+                if not email:
+                    continue
+                index.setdefault(email.lower(), []).append({
+                    'source': 'csv',
+                    'password': safe_str(record.get('password')),
+                    'is_active': safe_str(record.get('status')) == 'active',
+                    'record': record
+                })
+
+        # 2. SQLite users (fallback)
+        try:
+            from database import get_db_connection
+            with get_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT id, email, password_hash, role, name, direktorat, subdirektorat, divisi, is_active
+                    FROM users
+                    WHERE is_active = 1
+                """)
+                for row in cursor.fetchall():
+                    record = dict(row)
+                    index.setdefault(record['email'].strip().lower(), []).append({
+                        'source': 'sqlite',
+                        'password': record.pop('password_hash') or '',
+                        'is_active': bool(record['is_active']),
+                        'record': record
+                    })
+        except Exception as db_error:
+            safe_print(f"⚠️ User directory could not read SQLite users: {db_error}")
+
+        safe_print(f"📋 User directory built: {len(index)} emails")
+        return index
+
+    def find(self, email: str) -> List[Dict[str, Any]]:
+        """Return candidate accounts for an email (case-insensitive), CSV first"""
+        if not email:
+            return []
+        self._ensure_fresh()
+        return self._index.get(email.strip().lower(), [])
+
+    def update_password(self, candidate: Dict[str, Any], new_hash: str) -> bool:
+        """Replace a candidate account's stored password (used for hash upgrades)
+
+        Only rows still holding the old value are touched, so a password changed
+        in the meantime is never overwritten.
+        """
+        old_password = candidate['password']
+        updated = False
+
+        if candidate['source'] == 'csv':
+            with storage_service.transaction(USERS_CSV_PATH):
+                csv_data = storage_service.read_csv(USERS_CSV_PATH)
+                if csv_data is not None and not csv_data.empty:
+                    email = safe_str(candidate['record'].get('email')).strip().lower()
+                    mask = (
+                        (csv_data['email'].astype(str).str.strip().str.lower() == email) &
+                        (csv_data['password'].map(safe_str) == old_password)
+                    )
+                    if mask.any():
+                        csv_data['password'] = csv_data['password'].astype(object)
+                        csv_data.loc[mask, 'password'] = new_hash
+                        updated = storage_service.write_csv(csv_data, USERS_CSV_PATH)
+        else:
+            from database import get_db_connection
+            with get_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    UPDATE users SET password_hash = ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ? AND password_hash = ?
+                """, (new_hash, candidate['record']['id'], old_password))
+                updated = cursor.rowcount > 0
+
+        if updated:
+            self.invalidate()
+            safe_print(f"🔄 Upgraded password hash for {candidate['record'].get('email')} ({candidate['source']})")
+        return updated
+
+
+# Global user directory instance
+user_directory = UserDirectory()
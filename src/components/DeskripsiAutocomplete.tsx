@@ -39,29 +39,8 @@ const DeskripsiAutocomplete: React.FC<DeskripsiAutocompleteProps> = ({
   const inputRef = useRef<HTMLInputElement>(null);
   const suggestionRefs = useRef<(HTMLDivElement | null)[]>([]);
 
-  // Load GCG mapping data on mount
+  // Fallback data for local filtering when the search API is unavailable
   useEffect(() => {
-    const loadGCGData = async () => {
-      try {
-        const response = await fetch('/api/gcg-mapping');
-        if (!response.ok) {
-          console.warn('GCG mapping API not available, using fallback data');
-          setFallbackData();
-          return;
-        }
-        const apiResponse = await response.json();
-        if (apiResponse.success && apiResponse.data) {
-          setGcgData(apiResponse.data);
-        } else {
-          console.warn('GCG mapping API returned error:', apiResponse.error);
-          setFallbackData();
-        }
-      } catch (error) {
-        console.warn('Failed to load GCG mapping data:', error);
-        setFallbackData();
-      }
-    };
-
     const setFallbackData = () => {
       // Fallback data - headers and indicators
       setGcgData([
@@ -82,10 +61,10 @@ const DeskripsiAutocomplete: React.FC<DeskripsiAutocompleteProps> = ({
       ]);
     };
 
-    loadGCGData();
+    setFallbackData();
   }, []);
 
-  // Filter suggestions based on input value
+  // Search suggestions server-side (token index), falling back to local filtering
   useEffect(() => {
     // Only show suggestions if the input is focused AND has 2+ characters
     if (!isFocused || value.trim().length < 2) {
@@ -94,7 +73,13 @@ const DeskripsiAutocomplete: React.FC<DeskripsiAutocompleteProps> = ({
       return;
     }
 
-    const filtered = gcgData
+    const controller = new AbortController();
+    const showResults = (items: GCGMappingItem[]) => {
+      setSuggestions(items);
+      setShowSuggestions(items.length > 0 && value.trim() !== '');
+      setSelectedIndex(-1);
+    };
+    const filterLocally = () => gcgData
       .filter(item => {
         // Filter by type based on filterType parameter
         const typeMatch = filterType === 'all' || item.type === filterType;
@@ -104,10 +89,24 @@ const DeskripsiAutocomplete: React.FC<DeskripsiAutocompleteProps> = ({
       })
       .slice(0, 8); // Limit to 8 suggestions
 
-    setSuggestions(filtered);
-    setShowSuggestions(filtered.length > 0 && value.trim() !== '');
-    setSelectedIndex(-1);
-  }, [value, gcgData, isFocused]);
+    const timer = setTimeout(async () => {
+      try {
+        const params = new URLSearchParams({ q: value.trim(), type: filterType, limit: '8' });
+        const response = await fetch(`/api/gcg-mapping/search?${params}`, { signal: controller.signal });
+        const apiResponse = response.ok ? await response.json() : null;
+        showResults(apiResponse?.success ? apiResponse.data : filterLocally());
+      } catch (error) {
+        if ((error as Error).name !== 'AbortError') {
+          showResults(filterLocally());
+        }
+      }
+    }, 150);
+
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [value, gcgData, isFocused, filterType]);
 
   const handleInputChange = (e: React.ChangeEvent<HTMLInputElement>) => {
     onChange(e.target.value);
@@ -101,6 +101,7 @@ export const AOIProvider: React.FC<AOIProviderProps> = ({ children }) => {
           const user = JSON.parse(userStr);
           userParams = {
             userRole: user.role || '',
+            userDirektorat: user.direktorat || '',
             userSubdirektorat: user.subdirektorat || '',
             userDivisi: user.divisi || ''
           };
@@ -1957,7 +1957,8 @@ const PengaturanBaru = () => {
   const handleUserSubmit = async (e: React.FormEvent) => {
     e.preventDefault();
     
-    if (!userForm.name || !userForm.email || !userForm.password || !userForm.role) {
+    // Saat edit, password boleh dikosongkan (password lama tetap dipakai)
+    if (!userForm.name || !userForm.email || (!editingUser && !userForm.password) || !userForm.role) {
       toast({
         title: "Error",
         description: "Nama, email, password, dan role wajib diisi!",
@@ -2025,7 +2026,7 @@ const PengaturanBaru = () => {
       const userData = {
         name: userForm.name,
         email: userForm.email,
-        password: userForm.password,
+        ...(userForm.password ? { password: userForm.password } : {}),
         role: userForm.role,
         adminLevel: userForm.adminLevel,
         direktorat: userForm.direktorat || '',
@@ -2140,7 +2141,7 @@ const PengaturanBaru = () => {
     setUserForm({
       name: user.name,
       email: user.email,
-      password: user.password,
+      password: '',
       role: user.role,
       adminLevel: user.adminLevel,
       direktorat: user.direktorat || '',
@@ -4855,7 +4856,7 @@ const PengaturanBaru = () => {
                       />
                     </div>
                     <div>
-                      <Label htmlFor="user-password" className="text-blue-800 font-medium">Password *</Label>
+                      <Label htmlFor="user-password" className="text-blue-800 font-medium">Password{editingUser ? '' : ' *'}</Label>
                       <div className="flex gap-2 items-center">
                         <div className="relative flex-1">
                           <Input
@@ -4863,8 +4864,8 @@ const PengaturanBaru = () => {
                             type={showPassword ? 'text' : 'password'}
                             value={userForm.password}
                             onChange={(e) => setUserForm(prev => ({ ...prev, password: e.target.value }))}
-                            placeholder="Minimal 6 karakter"
-                            required
+                            placeholder={editingUser ? "Kosongkan jika tidak diubah" : "Minimal 6 karakter"}
+                            required={!editingUser}
                             className="pr-10 border-blue-200 focus:border-blue-500 focus:ring-blue-500"
                           />
                           <button
@@ -112,15 +112,16 @@ export const userAPI = {
       method: 'POST',
       body: JSON.stringify({ email, password }),
     }).then(user => {
-      // Store authentication data
-      localStorage.setItem('authToken', `user-${user.id}`);
+      // Store authentication data (signed session token issued by the backend)
+      localStorage.setItem('authToken', user.token || `user-${user.id}`);
       localStorage.setItem('user', JSON.stringify(user));
       return user;
     });
   },
   
-  // Logout
+  // Logout (revokes the session token on the backend)
   logout: () => {
+    apiCall('/logout', { method: 'POST' }).catch(() => undefined);
     localStorage.removeItem('authToken');
     localStorage.removeItem('user');
   },
@@ -129,9 +130,10 @@ export const userAPI = {
 // AOI Management API
 export const aoiAPI = {
   // Get all AOI tables (with optional user filtering)
-  getTables: (params?: { userRole?: string; userSubdirektorat?: string; userDivisi?: string; year?: number }) => {
+  getTables: (params?: { userRole?: string; userDirektorat?: string; userSubdirektorat?: string; userDivisi?: string; year?: number }) => {
     const queryParams = new URLSearchParams();
     if (params?.userRole) queryParams.append('userRole', params.userRole);
+    if (params?.userDirektorat) queryParams.append('userDirektorat', params.userDirektorat);
     if (params?.userSubdirektorat) queryParams.append('userSubdirektorat', params.userSubdirektorat);
     if (params?.userDivisi) queryParams.append('userDivisi', params.userDivisi);
     if (params?.year) queryParams.append('year', params.year.toString());
@@ -140,6 +142,19 @@ export const aoiAPI = {
     return apiCall(url);
   },
   
+  // Get AOI tables with nested recommendations and documents in one request
+  getTree: (params?: { userRole?: string; userDirektorat?: string; userSubdirektorat?: string; userDivisi?: string; year?: number }) => {
+    const queryParams = new URLSearchParams();
+    if (params?.userRole) queryParams.append('userRole', params.userRole);
+    if (params?.userDirektorat) queryParams.append('userDirektorat', params.userDirektorat);
+    if (params?.userSubdirektorat) queryParams.append('userSubdirektorat', params.userSubdirektorat);
+    if (params?.userDivisi) queryParams.append('userDivisi', params.userDivisi);
+    if (params?.year) queryParams.append('year', params.year.toString());
+
+    const url = queryParams.toString() ? `/aoiTree?${queryParams.toString()}` : '/aoiTree';
+    return apiCall(url);
+  },
+
   // Get AOI table by ID
   getTableById: (id: number) => apiCall(`/aoiTables/${id}`),
   
@@ -286,6 +301,34 @@ export const strukturAPI = {
     ),
 };
 
+// Change log API (incremental cache refresh)
+export const changesAPI = {
+  // Get entities changed since a change-log sequence number; keep `next` as the new cursor
+  getSince: (since: number, entities?: string[]) => {
+    const queryParams = new URLSearchParams({ since: since.toString() });
+    entities?.forEach(entity => queryParams.append('entity', entity));
+    return apiCall(`/changes?${queryParams.toString()}`);
+  },
+};
+
+// Full-text search API (checklist, uploaded files, AOI recommendations)
+export const searchAPI = {
+  search: (q: string, filters?: { year?: number; aspek?: string; types?: string[]; limit?: number }) => {
+    const queryParams = new URLSearchParams({ q });
+    if (filters?.year) queryParams.append('year', filters.year.toString());
+    if (filters?.aspek) queryParams.append('aspek', filters.aspek);
+    if (filters?.limit) queryParams.append('limit', filters.limit.toString());
+    filters?.types?.forEach(type => queryParams.append('type', type));
+    return apiCall(`/search?${queryParams.toString()}`);
+  },
+  // Search inside stored documents (PDF/xlsx/txt text) with highlighted snippets
+  documents: (q: string, year?: number) => {
+    const queryParams = new URLSearchParams({ q });
+    if (year) queryParams.append('year', year.toString());
+    return apiCall(`/search/documents?${queryParams.toString()}`);
+  },
+};
+
 // Health check
 export const healthCheck = () => fetch(`${API_HOST}/health`).then(res => res.json());
 
@@ -296,6 +339,8 @@ export default {
   aoiDocumentAPI,
   checklistAPI,
   strukturAPI,
+  changesAPI,
+  searchAPI,
   uploadFile,
   downloadFile,
   healthCheck,